@@ -1,6 +1,6 @@
 import sys
-import math
 import os
+import numpy as np
 from PySide6.QtWidgets import (
     QApplication,
     QWidget,
@@ -17,123 +17,123 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 
 
-# Utility functions for writing STL files
-def write_box_stl(file_path, width, length, height):
-    vertices = [
+# Triangle arrays for the primitives and an STL writer.
+# Every generator returns an (n, 3, 3) float array of outward-wound
+# triangles built with NumPy; write_stl() stores it as binary STL (default)
+# or ASCII, each in a single buffered write.
+
+# One binary STL facet record: normal, three vertices, attribute byte count
+FACET_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2"),
+])
+
+ASCII_FACET = """  facet normal %.9g %.9g %.9g
+    outer loop
+      vertex %.9g %.9g %.9g
+      vertex %.9g %.9g %.9g
+      vertex %.9g %.9g %.9g
+    endloop
+  endfacet
+"""
+ASCII_CHUNK_FACETS = 65536  # Facets formatted per write, so ASCII output never holds the whole file as text
+
+
+def facet_normals(triangles):
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def write_stl(file_path, triangles, name="shape", binary=True):
+    """Writes an (n, 3, 3) triangle array as a binary (default) or ASCII STL."""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    normals = facet_normals(triangles)
+    if binary:
+        facets = np.zeros(len(triangles), dtype=FACET_DTYPE)
+        facets["normal"] = normals
+        facets["vertices"] = triangles
+        with open(file_path, 'wb') as file:
+            file.write(f"solid {name} (binary)".encode()[:80].ljust(80, b"\0"))
+            file.write(np.uint32(len(facets)).tobytes())
+            file.write(facets.tobytes())
+    else:
+        with open(file_path, 'w') as file:
+            file.write(f"solid {name}\n")
+            for start in range(0, len(triangles), ASCII_CHUNK_FACETS):
+                stop = start + ASCII_CHUNK_FACETS
+                values = np.concatenate([normals[start:stop], triangles[start:stop].reshape(-1, 9)], axis=1)
+                file.write(ASCII_FACET * len(values) % tuple(values.ravel().tolist()))
+            file.write(f"endsolid {name}\n")
+
+
+def box_triangles(width, length, height):
+    vertices = np.array([
         (0, 0, 0), (width, 0, 0), (width, length, 0), (0, length, 0),
         (0, 0, height), (width, 0, height), (width, length, height), (0, length, height)
-    ]
-    faces = [
-        (0, 1, 2), (0, 2, 3),  # Bottom face
+    ], dtype=np.float64)
+    faces = np.array([
+        (0, 2, 1), (0, 3, 2),  # Bottom face
         (4, 5, 6), (4, 6, 7),  # Top face
         (0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5),
         (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7)  # Sides
-    ]
-
-    with open(file_path, 'w') as file:
-        file.write("solid box\n")
-        for face in faces:
-            v1, v2, v3 = vertices[face[0]], vertices[face[1]], vertices[face[2]]
-            file.write(f"  facet normal 0 0 0\n")
-            file.write("    outer loop\n")
-            file.write(f"      vertex {v1[0]} {v1[1]} {v1[2]}\n")
-            file.write(f"      vertex {v2[0]} {v2[1]} {v2[2]}\n")
-            file.write(f"      vertex {v3[0]} {v3[1]} {v3[2]}\n")
-            file.write("    endloop\n")
-            file.write("  endfacet\n")
-        file.write("endsolid box\n")
-        
-        
-def write_cylinder_stl(file_path, radius, height, segments):
+    ])
+    return vertices[faces]
+
+
+def cylinder_triangles(radius, height, segments):
+    angles = 2 * np.pi * np.arange(segments + 1) / segments
+    ring = np.stack([radius * np.cos(angles), radius * np.sin(angles), np.zeros_like(angles)], axis=1)
+    ring[-1] = ring[0]  # Close the seam exactly, so the surface is watertight
+    p1, p2 = ring[:-1], ring[1:]
+    up = np.array([0, 0, height], dtype=np.float64)
+    centre = np.zeros_like(p1)
+
+    bottom = np.stack([centre, p2, p1], axis=1)
+    top = np.stack([centre + up, p1 + up, p2 + up], axis=1)
+    side1 = np.stack([p1, p2, p1 + up], axis=1)
+    side2 = np.stack([p2, p2 + up, p1 + up], axis=1)
+    return np.concatenate([bottom, top, side1, side2])
+
+
+def sphere_triangles(radius, segments):
+    theta = np.pi * np.arange(segments + 1) / segments
+    phi = 2 * np.pi * np.arange(2 * segments + 1) / (2 * segments)
+    sin_theta = np.sin(theta)[:, None]
+    grid = radius * np.stack([sin_theta * np.cos(phi), sin_theta * np.sin(phi),
+                              np.cos(theta)[:, None] * np.ones_like(phi)], axis=2)
+    # Close the seam and the poles exactly, so the surface is watertight
+    grid[:, -1] = grid[:, 0]
+    grid[0] = (0, 0, radius)
+    grid[-1] = (0, 0, -radius)
+
+    # Four vertices of every quad, two triangles per quad
+    v1, v2 = grid[:-1, :-1], grid[:-1, 1:]
+    v3, v4 = grid[1:, :-1], grid[1:, 1:]
+    upper = np.stack([v1, v3, v2], axis=2)
+    lower = np.stack([v2, v3, v4], axis=2)
+    # Quads touching a pole collapse to one triangle; drop the degenerate half
+    keep_upper = np.ones(upper.shape[:2], dtype=bool)
+    keep_lower = np.ones(lower.shape[:2], dtype=bool)
+    keep_upper[0] = False
+    keep_lower[-1] = False
+    return np.concatenate([upper[keep_upper], lower[keep_lower]])
+
+
+def write_box_stl(file_path, width, length, height, binary=True):
+    """Writes an STL file for a box."""
+    write_stl(file_path, box_triangles(width, length, height), "box", binary)
+
+
+def write_cylinder_stl(file_path, radius, height, segments, binary=True):
     """Writes an STL file for a cylinder."""
-    with open(file_path, 'w') as file:
-        file.write("solid cylinder\n")
-        for i in range(segments):
-            angle1 = 2 * math.pi * i / segments
-            angle2 = 2 * math.pi * (i + 1) / segments
-            x1, y1 = radius * math.cos(angle1), radius * math.sin(angle1)
-            x2, y2 = radius * math.cos(angle2), radius * math.sin(angle2)
-
-            # Bottom face
-            file.write("  facet normal 0 0 -1\n")
-            file.write("    outer loop\n")
-            file.write(f"      vertex 0 0 0\n")
-            file.write(f"      vertex {x1} {y1} 0\n")
-            file.write(f"      vertex {x2} {y2} 0\n")
-            file.write("    endloop\n")
-            file.write("  endfacet\n")
-
-            # Top face
-            file.write("  facet normal 0 0 1\n")
-            file.write("    outer loop\n")
-            file.write(f"      vertex 0 0 {height}\n")
-            file.write(f"      vertex {x2} {y2} {height}\n")
-            file.write(f"      vertex {x1} {y1} {height}\n")
-            file.write("    endloop\n")
-            file.write("  endfacet\n")
-
-            # Side face
-            file.write("  facet normal 0 0 0\n")
-            file.write("    outer loop\n")
-            file.write(f"      vertex {x1} {y1} 0\n")
-            file.write(f"      vertex {x2} {y2} 0\n")
-            file.write(f"      vertex {x1} {y1} {height}\n")
-            file.write("    endloop\n")
-            file.write("  endfacet\n")
-
-            file.write("  facet normal 0 0 0\n")
-            file.write("    outer loop\n")
-            file.write(f"      vertex {x2} {y2} 0\n")
-            file.write(f"      vertex {x2} {y2} {height}\n")
-            file.write(f"      vertex {x1} {y1} {height}\n")
-            file.write("    endloop\n")
-            file.write("  endfacet\n")
-        file.write("endsolid cylinder\n")
-
-
-def write_sphere_stl(file_path, radius, segments):
+    write_stl(file_path, cylinder_triangles(radius, height, segments), "cylinder", binary)
+
+
+def write_sphere_stl(file_path, radius, segments, binary=True):
     """Writes an STL file for a sphere."""
-    with open(file_path, 'w') as file:
-        file.write("solid sphere\n")
-        for i in range(segments):
-            theta1 = math.pi * i / segments
-            theta2 = math.pi * (i + 1) / segments
-
-            for j in range(segments * 2):
-                phi1 = 2 * math.pi * j / (segments * 2)
-                phi2 = 2 * math.pi * (j + 1) / (segments * 2)
-
-                # Four vertices of the current quad
-                x1, y1, z1 = (radius * math.sin(theta1) * math.cos(phi1),
-                              radius * math.sin(theta1) * math.sin(phi1),
-                              radius * math.cos(theta1))
-                x2, y2, z2 = (radius * math.sin(theta1) * math.cos(phi2),
-                              radius * math.sin(theta1) * math.sin(phi2),
-                              radius * math.cos(theta1))
-                x3, y3, z3 = (radius * math.sin(theta2) * math.cos(phi1),
-                              radius * math.sin(theta2) * math.sin(phi1),
-                              radius * math.cos(theta2))
-                x4, y4, z4 = (radius * math.sin(theta2) * math.cos(phi2),
-                              radius * math.sin(theta2) * math.sin(phi2),
-                              radius * math.cos(theta2))
-
-                # Two triangles per quad
-                file.write("  facet normal 0 0 0\n")
-                file.write("    outer loop\n")
-                file.write(f"      vertex {x1} {y1} {z1}\n")
-                file.write(f"      vertex {x2} {y2} {z2}\n")
-                file.write(f"      vertex {x3} {y3} {z3}\n")
-                file.write("    endloop\n")
-                file.write("  endfacet\n")
-
-                file.write("  facet normal 0 0 0\n")
-                file.write("    outer loop\n")
-                file.write(f"      vertex {x2} {y2} {z2}\n")
-                file.write(f"      vertex {x4} {y4} {z4}\n")
-                file.write(f"      vertex {x3} {y3} {z3}\n")
-                file.write("    endloop\n")
-                file.write("  endfacet\n")
-        file.write("endsolid sphere\n")
+    write_stl(file_path, sphere_triangles(radius, segments), "sphere", binary)
 
 
 # Main Application Class
@@ -172,11 +172,21 @@ class ShapeSTLApp(QWidget):
         resolution_label = QLabel("Resolution:")
         resolution_label.setStyleSheet("font-size: 14px; font-weight: bold;")
         self.resolution_selector = QComboBox()
-        self.resolution_selector.addItems(["Low", "Medium", "High"])
+        self.resolution_selector.addItems(["Low", "Medium", "High", "Very High"])
         resolution_section.addWidget(resolution_label)
         resolution_section.addWidget(self.resolution_selector)
         layout.addLayout(resolution_section)
 
+        # Format Selection
+        format_section = QHBoxLayout()
+        format_label = QLabel("Format:")
+        format_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        self.format_selector = QComboBox()
+        self.format_selector.addItems(["Binary", "ASCII"])
+        format_section.addWidget(format_label)
+        format_section.addWidget(self.format_selector)
+        layout.addLayout(format_section)
+
         # Input Fields
         self.inputs_layout = QFormLayout()
         self.update_inputs()
@@ -242,7 +252,8 @@ class ShapeSTLApp(QWidget):
         if not file_path.endswith(".stl"):
             file_path += ".stl"
 
-        segments = {"Low": 12, "Medium": 36, "High": 72}[resolution]
+        segments = {"Low": 12, "Medium": 36, "High": 72, "Very High": 512}[resolution]
+        binary = self.format_selector.currentText() == "Binary"
 
         try:
             if shape == "Box":
@@ -250,16 +261,16 @@ class ShapeSTLApp(QWidget):
                 width = float(self.width_input.text())
                 length = float(self.length_input.text())
                 height = float(self.height_input.text())
-                write_box_stl(file_path, width, length, height)
+                write_box_stl(file_path, width, length, height, binary)
             elif shape == "Cylinder":
                 # Retrieve input values for Cylinder
                 radius = float(self.radius_input.text())
                 height = float(self.height_input.text())
-                write_cylinder_stl(file_path, radius, height, segments)
+                write_cylinder_stl(file_path, radius, height, segments, binary)
             elif shape == "Sphere":
                 # Retrieve input values for Sphere
                 radius = float(self.radius_input.text())
-                write_sphere_stl(file_path, radius, segments)
+                write_sphere_stl(file_path, radius, segments, binary)
             else:
                 QMessageBox.critical(self, "Shape Error", "Unknown shape selected.")
                 return
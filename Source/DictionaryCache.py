@@ -0,0 +1,83 @@
+import os
+import threading
+
+# Importing local modules
+from FoamDictionary import FoamDictionary
+
+# ---------------------------------------------------------------------------
+# Session-wide cache of parsed case dictionaries.
+# One entry per file, keyed by absolute path and validated against the
+# file's (mtime, size, inode) on every access: reopening a popup on an
+# unchanged case costs one stat() and no read, while edits made outside
+# Splash (text editor, foamDictionary, a solver run) are picked up on the
+# next access. Our own writes go through write(), which stores the written
+# document back, so they never force a re-read either.
+#
+#   cache = session_dictionary_cache()
+#   cache.get("case/system/controlDict").values(["endTime", "deltaT"])
+#   control_dict = cache.edit("case/system/controlDict")
+#   control_dict.set("endTime", 2000)
+#   cache.write(control_dict)
+# ---------------------------------------------------------------------------
+
+def file_signature(filename):
+    """(mtime_ns, size, inode): any rewrite, in place or by rename, changes it."""
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+class DictionaryCache:
+    def __init__(self):
+        self._entries = {}  # absolute path -> (file signature, FoamDictionary)
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """Parsed dictionary of ``filename``, shared between callers: read it, edit() a copy to change it."""
+        path = os.path.abspath(filename)
+        # Stat before reading: a write racing the read leaves a stale signature, which only forces a re-read
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        document = FoamDictionary.read(path)
+        with self._lock:
+            self._entries[path] = (signature, document)
+        return document
+
+    def edit(self, filename):
+        """Private, editable copy of the cached dictionary (parsed from the cached text, no disk read)."""
+        document = self.get(filename)
+        return FoamDictionary(document.source, document.filename)
+
+    def store(self, document):
+        """Record a document that was just written, so the next get() reuses it."""
+        path = os.path.abspath(document.filename)
+        if document.edits:
+            # Unsaved edits: the object no longer matches the file
+            self.invalidate(path)
+            return
+        with self._lock:
+            self._entries[path] = (file_signature(path), document)
+
+    def write(self, document):
+        """document.write() and store() it -> True if the file changed."""
+        written = document.write()
+        self.store(document)
+        return written
+
+    def invalidate(self, filename=None):
+        """Drop one file, every file below a (case) directory, or everything."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(filename)
+            prefix = path.rstrip(os.sep) + os.sep
+            for key in [key for key in self._entries if key == path or key.startswith(prefix)]:
+                self._entries.pop(key)
+
+_session_cache = DictionaryCache()
+
+def session_dictionary_cache():
+    return _session_cache
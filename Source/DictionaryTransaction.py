@@ -0,0 +1,144 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Importing local modules
+from FoamDictionary import FoamDictionary, FoamDictionaryError, write_temporary
+from DictionaryCache import session_dictionary_cache, file_signature
+
+# ---------------------------------------------------------------------------
+# All-or-nothing edits across the dictionaries of a case.
+# Edits are staged on private copies (DictionaryCache.edit) and nothing
+# touches the disk until commit(), which
+#   1. validates: every edited text must parse again, and no file may have
+#      changed on disk since it was staged;
+#   2. writes every new text to a temporary file next to its target, in
+#      parallel across files;
+#   3. swaps them in with os.replace(), keeping a hard link to each original
+#      so a failure halfway puts the already-replaced files back.
+# A failure before step 3 leaves the case untouched.
+#
+#   with DictionaryTransaction() as transaction:
+#       transaction.update_keys("case/system/fvSolution", {"nOuterCorrectors": 2})
+#       transaction.update_keys("case/constant/transportProperties", {"nu": 1.5e-05})
+#   transaction.changed   # {file: [changed key paths]}
+# ---------------------------------------------------------------------------
+
+class DictionaryTransactionError(FoamDictionaryError):
+    """Validation or write failure; ``problems`` maps each file to what went wrong."""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("; ".join(f"{os.path.basename(path)}: {problem}" for path, problem in problems.items()))
+
+class DictionaryTransaction:
+    def __init__(self, cache=None, workers=None):
+        self.cache = cache or session_dictionary_cache()
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        self.documents = {}  # absolute path -> (file signature when staged, edited FoamDictionary)
+        self.changed = {}  # Filled by commit(): absolute path -> [changed key paths]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+    def edit(self, filename):
+        """Staged copy of ``filename`` (the same object for every call until commit/discard)."""
+        path = os.path.abspath(filename)
+        if path not in self.documents:
+            document = self.cache.edit(path)
+            self.documents[path] = (file_signature(path), document)
+        return self.documents[path][1]
+
+    def set(self, filename, path, value, create=False):
+        return self.edit(filename).set(path, value, create)
+
+    def update(self, filename, values, create=False):
+        return self.edit(filename).update(values, create)
+
+    def update_keys(self, filename, values, scope=None):
+        return self.edit(filename).update_keys(values, scope)
+
+    def discard(self):
+        self.documents = {}
+
+    def validate(self):
+        """Raise DictionaryTransactionError unless every staged edit can be committed."""
+        problems = {}
+        for path, (signature, document) in self.documents.items():
+            if not document.edits:
+                continue
+            try:
+                if file_signature(path) != signature:
+                    problems[path] = "changed on disk since it was edited"
+                    continue
+                FoamDictionary(document.text(), path)
+            except (OSError, FoamDictionaryError) as error:
+                problems[path] = str(error)
+        if problems:
+            raise DictionaryTransactionError(problems)
+
+    def commit(self):
+        """Validate and write every edited file, or none of them -> {file: [changed key paths]}."""
+        self.validate()
+        pending = {path: document for path, (signature, document) in self.documents.items() if document.edits}
+        texts = {path: document.text() for path, document in pending.items()}
+
+        # Temporary files first, in parallel: a failure here leaves every target untouched
+        temp_files, problems = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {path: executor.submit(write_temporary, path, text) for path, text in texts.items()}
+            for path, future in futures.items():
+                try:
+                    temp_files[path] = future.result()
+                except OSError as error:
+                    problems[path] = str(error)
+        if problems:
+            self._remove(temp_files.values())
+            raise DictionaryTransactionError(problems)
+
+        backups, replaced = {}, []
+        try:
+            for path, temp_file in temp_files.items():
+                backups[path] = self._backup(path)
+            for path, temp_file in temp_files.items():
+                os.replace(temp_file, path)
+                replaced.append(path)
+        except OSError as error:
+            # Put back what was already replaced, then report the file that failed
+            for path in replaced:
+                os.replace(backups[path], path)
+            self._remove([temp_file for path, temp_file in temp_files.items() if path not in replaced])
+            self._remove([backups[path] for path in backups if path not in replaced])
+            raise DictionaryTransactionError({getattr(error, "filename", None) or "commit": str(error)})
+        self._remove(backups.values())
+
+        self.changed = {}
+        for path, document in pending.items():
+            self.changed[path] = list(document.changed)
+            document.load(texts[path])
+            self.cache.store(document)
+        self.documents = {}
+        return self.changed
+
+    @staticmethod
+    def _backup(path):
+        # A hard link costs no copy; fall back to copying where links are not supported
+        backup = f"{os.path.join(os.path.dirname(path), '.' + os.path.basename(path))}.{os.getpid()}.bak"
+        try:
+            os.link(path, backup)
+        except OSError:
+            shutil.copy2(path, backup)
+        return backup
+
+    @staticmethod
+    def _remove(paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
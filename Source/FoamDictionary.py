@@ -0,0 +1,568 @@
+import os
+import re
+import shutil
+import tempfile
+
+# ---------------------------------------------------------------------------
+# Lossless OpenFOAM dictionary parser.
+# One regex pass tokenizes the file (whitespace and comments included), a
+# recursive-descent pass groups the tokens into entries and sub-dictionaries,
+# and joining every token text gives back the original file byte for byte.
+# Entries are indexed by dotted path at parse time, so lookups are O(1):
+#
+#   mesh = FoamDictionary.read("system/meshDict")
+#   mesh.get('boundaryLayers.patchBoundaryLayers."wall.*".nLayers')
+#   mesh.find("maxCellSize").value
+#
+# Edits change the tree and record the source span they replace; text() and
+# write() splice only those spans into the original text, so comments,
+# layout and every untouched byte survive (one atomic write per batch):
+#
+#   mesh.update({"maxCellSize": 0.05, "workflowControl.stopAfter": "edgeExtraction"})
+#   mesh.write()
+# ---------------------------------------------------------------------------
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<verbatim>\#\{.*?\#\})
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<punct>[{}()\[\];])
+  | (?P<word>(?:[^\s{}()\[\];"/]|/(?![/*]))+)
+  | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
+
+_WORD_TAIL = re.compile(r"(?:[^\s{}()\[\];\"/]|/(?![/*]))*")
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+TRIVIA = ("space", "comment")
+OPENING = {"(": ")", "[": "]", "{": "}"}
+
+class FoamDictionaryError(ValueError):
+    pass
+
+class Token:
+    __slots__ = ("kind", "text", "start")
+
+    def __init__(self, kind, text, start):
+        self.kind = kind
+        self.text = text
+        self.start = start  # Offset in the source text (None for tokens added by edits)
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r})"
+
+def tokenize(text):
+    """Every token of a dictionary, trivia included: ''.join(t.text for t in tokens) == text."""
+    tokens = []
+    position, length = 0, len(text)
+    while position < length:
+        match = _TOKEN_PATTERN.match(text, position)
+        kind, end = match.lastgroup, match.end()
+        while kind == "word" and end < length and text[end] == "(" and not text[position].isdigit():
+            # Function-like words such as div(phi,U) or grad(U) keep their balanced parentheses
+            depth = 0
+            while end < length:
+                depth += {"(": 1, ")": -1}.get(text[end], 0)
+                end += 1
+                if depth == 0:
+                    break
+            if depth:
+                raise FoamDictionaryError(f"Unbalanced parentheses at line {text.count(chr(10), 0, position) + 1}")
+            end = _WORD_TAIL.match(text, end).end()
+        if kind == "error":
+            raise FoamDictionaryError(f"Unterminated comment or string at line {text.count(chr(10), 0, position) + 1}")
+        tokens.append(Token(kind, text[position:end], position))
+        position = end
+    return tokens
+
+def key_name(text):
+    # "wall.*" and wall.* name the same key; the quotes only mark a regex
+    return text[1:-1] if len(text) >= 2 and text[0] == text[-1] == '"' else text
+
+def format_value(value):
+    """Python value -> dictionary text: True -> 'true', [1, 2, 3] -> '(1 2 3)', else str()."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return "(" + " ".join(format_value(item) for item in value) + ")"
+    return str(value)
+
+def write_temporary(filename, text):
+    """Write ``text`` to a hidden temporary file next to ``filename`` (same mode) -> its path, ready for os.replace()."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temp_file = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, "w", newline="") as dict_file:
+            dict_file.write(text)
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp_file)
+        else:
+            # mkstemp() creates files as 0600; a new dictionary gets the mode open() would give it
+            os.chmod(temp_file, 0o666 & ~_UMASK)
+    except BaseException:
+        os.remove(temp_file)
+        raise
+    return temp_file
+
+def split_path(path):
+    """'a.b."wall.*".c' -> ['a', 'b', 'wall.*', 'c'] (quoted segments may contain dots)."""
+    return [key_name(segment) for segment in re.findall(r'"(?:[^"\\]|\\.)*"|[^.]+', path)]
+
+# ------------------------------- Syntax tree --------------------------------
+class Node:
+    """A run of tokens and child nodes; text() reproduces the source exactly."""
+    __slots__ = ("parts", "parent")
+
+    def __init__(self, parts=None, parent=None):
+        self.parts = parts if parts is not None else []
+        self.parent = parent
+
+    def tokens(self):
+        for part in self.parts:
+            if isinstance(part, Node):
+                yield from part.tokens()
+            else:
+                yield part
+
+    def text(self):
+        return "".join(token.text for token in self.tokens())
+
+    def span(self):
+        """(start, end) of the node in the source text; None for nodes added by edits."""
+        first, last = self.parts[0], self.parts[-1]
+        if first.start is None:
+            return None
+        return first.start, last.start + len(last.text)
+
+class Entry(Node):
+    """``key value ... ;`` (also key-only entries such as ``$include;``)."""
+    __slots__ = ("key",)
+
+    def __init__(self, key, parts, parent=None):
+        super().__init__(parts, parent)
+        self.key = key
+
+    def value_tokens(self):
+        # Significant tokens between the keyword and the closing semicolon
+        return [token for token in self.parts[1:-1] if token.kind not in TRIVIA]
+
+    @property
+    def value(self):
+        """Value text without comments, e.g. '[0 2 -1 0 0 0 0] 1.5e-05' or '(1 2 3)'."""
+        significant = [index for index, token in enumerate(self.parts[1:-1], 1) if token.kind not in TRIVIA]
+        if not significant:
+            return ""
+        # Keep the inner layout (multi-line lists), but drop comments and the outer whitespace
+        return "".join(token.text for token in self.parts[significant[0]:significant[-1] + 1]
+                       if token.kind != "comment").strip()
+
+    def __repr__(self):
+        return f"Entry({self.key!r}, {self.value!r})"
+
+class Directive(Node):
+    """``#include "file"``, ``#inputMode merge``, ``#{ ... #}`` code: kept verbatim, never indexed."""
+    __slots__ = ("key",)
+
+    def __init__(self, key, parts, parent=None):
+        super().__init__(parts, parent)
+        self.key = key
+
+class Dictionary(Node):
+    """``key { entries }``; the root dictionary has no key and no braces."""
+    __slots__ = ("key", "entries")
+
+    def __init__(self, key=None, parts=None, parent=None):
+        super().__init__(parts, parent)
+        self.key = key
+        self.entries = {}  # key name -> Entry/Dictionary, last definition wins as in OpenFOAM
+
+    def items(self):
+        return [part for part in self.parts if isinstance(part, (Entry, Dictionary))]
+
+    def lookup(self, key):
+        """Child by literal key, falling back to quoted regex keys (newest first) as OpenFOAM does."""
+        node = self.entries.get(key)
+        if node is None:
+            for candidate in reversed(self.items()):
+                pattern = candidate.key
+                if len(pattern) >= 2 and pattern[0] == '"' and re.fullmatch(key_name(pattern), key):
+                    return candidate
+        return node
+
+    def __repr__(self):
+        return f"Dictionary({self.key!r}, {list(self.entries)})"
+
+# --------------------------------- Parser -----------------------------------
+class _Parser:
+    def __init__(self, tokens, text):
+        self.tokens = tokens
+        self.text = text
+        self.position = 0
+
+    def error(self, message, token=None):
+        token = token or (self.tokens[self.position] if self.position < len(self.tokens) else None)
+        line = self.text.count("\n", 0, token.start) + 1 if token else self.text.count("\n") + 1
+        raise FoamDictionaryError(f"{message} at line {line}")
+
+    def parse_body(self, dictionary, closing):
+        tokens = self.tokens
+        while self.position < len(tokens):
+            token = tokens[self.position]
+            if token.kind in TRIVIA:
+                dictionary.parts.append(token)
+                self.position += 1
+            elif token.text == "}" and token.kind == "punct":
+                if not closing:
+                    self.error("Unmatched '}'")
+                return
+            elif token.text == ";" and token.kind == "punct":
+                # Stray semicolons (e.g. after a closing brace) are accepted by OpenFOAM; keep them as-is
+                dictionary.parts.append(token)
+                self.position += 1
+            elif token.kind == "verbatim" or token.text.startswith("#"):
+                dictionary.parts.append(self.parse_directive(dictionary))
+            elif token.kind in ("word", "string"):
+                dictionary.parts.append(self.parse_entry(dictionary))
+            else:
+                self.error(f"Unexpected '{token.text}'")
+        if closing:
+            self.error("Missing '}'", dictionary.parts[0] if dictionary.parts else None)
+
+    def parse_directive(self, parent):
+        # The directive and its arguments up to the end of the line (or a verbatim block)
+        start = self.position
+        token = self.tokens[self.position]
+        self.position += 1
+        if token.kind != "verbatim":
+            while self.position < len(self.tokens):
+                token = self.tokens[self.position]
+                if token.kind == "space" and "\n" in token.text:
+                    break
+                self.position += 1
+        return Directive(self.tokens[start].text, self.tokens[start:self.position], parent)
+
+    def parse_entry(self, parent):
+        key_token = self.tokens[self.position]
+        start = self.position
+        self.position += 1
+        # A keyword followed by '{' (after any trivia) opens a sub-dictionary
+        lookahead = self.position
+        while lookahead < len(self.tokens) and self.tokens[lookahead].kind in TRIVIA:
+            lookahead += 1
+        if lookahead < len(self.tokens) and self.tokens[lookahead].text == "{" and self.tokens[lookahead].kind == "punct":
+            dictionary = Dictionary(key_token.text, self.tokens[start:lookahead + 1], parent)
+            self.position = lookahead + 1
+            self.parse_body(dictionary, closing=True)
+            dictionary.parts.append(self.tokens[self.position])  # '}'
+            self.position += 1
+            return dictionary
+
+        # Value tokens up to the ';' at bracket depth 0 ((lists), [dimensions], {dicts inside lists})
+        stack = []
+        while self.position < len(self.tokens):
+            token = self.tokens[self.position]
+            self.position += 1
+            if token.kind != "punct":
+                continue
+            if token.text in OPENING:
+                stack.append(OPENING[token.text])
+            elif token.text in ")]}":
+                if not stack:
+                    self.error(f"Missing ';' after '{key_token.text}'", key_token)
+                if stack.pop() != token.text:
+                    self.error(f"Mismatched '{token.text}'", token)
+            elif token.text == ";" and not stack:
+                return Entry(key_token.text, self.tokens[start:self.position], parent)
+        self.error(f"Missing ';' after '{key_token.text}'", key_token)
+
+# ------------------------------- Document -----------------------------------
+class FoamDictionary:
+    def __init__(self, text, filename=None):
+        self.filename = filename
+        self.load(text)
+
+    def load(self, text):
+        self.source = text
+        self.edits = {}  # (start, end) source span -> node or token that now renders it
+        self.changed = []  # Dotted paths edited since the last load/write
+        self.root = Dictionary()
+        parser = _Parser(tokenize(text), text)
+        parser.parse_body(self.root, closing=False)
+        self.reindex()
+
+    @classmethod
+    def read(cls, filename):
+        # newline="" keeps CRLF files byte-identical through an edit
+        with open(filename, "r", newline="") as dict_file:
+            return cls(dict_file.read(), filename)
+
+    def reindex(self):
+        """Rebuild the per-dictionary key maps and the dotted-path and keyword indexes."""
+        self.paths = {}  # (key name, ...) -> node, in document order
+        self.keywords = {}  # key name -> [path, ...], in document order
+
+        def visit(dictionary, prefix):
+            dictionary.entries = {}
+            for node in dictionary.items():
+                name = key_name(node.key)
+                dictionary.entries[name] = node
+                path = prefix + (name,)
+                self.paths[path] = node
+                self.keywords.setdefault(name, []).append(path)
+                if isinstance(node, Dictionary):
+                    visit(node, path)
+        visit(self.root, ())
+
+    def text(self):
+        """Source text with the edited spans spliced in (the source itself when nothing changed)."""
+        if not self.edits:
+            return self.source
+        pieces, position = [], 0
+        for (start, end), replacement in sorted(self.edits.items(), key=lambda item: item[0]):
+            pieces.append(self.source[position:start])
+            pieces.append(replacement.text() if isinstance(replacement, Node) else replacement.text)
+            position = end
+        pieces.append(self.source[position:])
+        return "".join(pieces)
+
+    def __str__(self):
+        return self.text()
+
+    def lookup(self, path):
+        """Node at a dotted path (Entry or Dictionary), or None.
+
+        Exact paths come straight from the index; otherwise the path is walked
+        with OpenFOAM's regex-key matching, and unquoted segments may join
+        keys that contain dots (geometry.geom.stl.type).
+        """
+        segments = tuple(split_path(path)) if isinstance(path, str) else tuple(path)
+        node = self.paths.get(segments)
+        if node is not None:
+            return node
+        return self._walk(self.root, segments)
+
+    def _walk(self, dictionary, segments):
+        if not segments:
+            return dictionary
+        for count in range(len(segments), 0, -1):
+            # Joined segments only match literal keys; regex keys match one segment at a time
+            node = dictionary.lookup(segments[0]) if count == 1 else dictionary.entries.get(".".join(segments[:count]))
+            if node is None:
+                continue
+            if count == len(segments):
+                return node
+            if isinstance(node, Dictionary):
+                found = self._walk(node, segments[count:])
+                if found is not None:
+                    return found
+        return None
+
+    def get(self, path, default=None):
+        """Value text of the entry at a dotted path (a Dictionary node for sub-dictionaries)."""
+        node = self.lookup(path)
+        if node is None:
+            return default
+        return node.value if isinstance(node, Entry) else node
+
+    def __getitem__(self, path):
+        node = self.lookup(path)
+        if node is None:
+            raise KeyError(path)
+        return node.value if isinstance(node, Entry) else node
+
+    def __contains__(self, path):
+        return self.lookup(path) is not None
+
+    def find_all(self, key, scope=None):
+        """Every node named ``key`` anywhere below ``scope`` (a dotted path), in document order."""
+        prefix = tuple(split_path(scope)) if scope else ()
+        # A key defined twice in one dictionary is its last definition, found at that position
+        paths = dict.fromkeys(path for path in reversed(self.keywords.get(key, ())) if path[:len(prefix)] == prefix)
+        return [self.paths[path] for path in reversed(paths)]
+
+    def find(self, key, scope=None):
+        """First node named ``key`` in document order, anywhere below ``scope`` (a dotted path)."""
+        found = self.find_all(key, scope)
+        return found[0] if found else None
+
+    def values(self, keys, scope=None):
+        """{key: value text} for the keys found below ``scope``, as the Splash popups expect.
+
+        A key defined more than once reads as its last definition, like the
+        regex scans these calls replaced.
+        """
+        found = {}
+        for key in keys:
+            entries = [node for node in self.find_all(key, scope) if isinstance(node, Entry)]
+            if entries:
+                found[key] = entries[-1].value
+        return found
+
+    # ------------------------------- Editing --------------------------------
+    def _node(self, path):
+        node = path if isinstance(path, Node) else self.lookup(path)
+        if node is None:
+            raise KeyError(path)
+        return node
+
+    def path_of(self, node):
+        """Dotted path of a node, keys quoted as in the file ('a."wall.*".b')."""
+        keys = []
+        while node is not None and node.key is not None:
+            keys.append(node.key)
+            node = node.parent
+        return ".".join(reversed(keys))
+
+    def _mark(self, node, replacement=None):
+        # Record that the source span of ``node`` now renders as ``replacement`` (the node itself by default)
+        span = node.span()
+        if span is not None:
+            self.edits[span] = replacement if replacement is not None else node
+        path = self.path_of(node)
+        if path not in self.changed:
+            self.changed.append(path)
+
+    def set(self, path, value, create=False):
+        """Set the value of one entry -> True if the text changed.
+
+        ``path`` is a dotted path or a node from lookup()/find(). With
+        ``create``, a missing entry is appended to its (existing) parent
+        dictionary with the indentation of its last entry.
+        """
+        text = format_value(value)
+        node = path if isinstance(path, Node) else self.lookup(path)
+        if node is None:
+            if not create:
+                raise KeyError(path)
+            return self._create(path, text)
+        if not isinstance(node, Entry):
+            raise FoamDictionaryError(f"'{self.path_of(node)}' is a sub-dictionary, not a value")
+        if node.value == text:
+            return False
+
+        significant = [index for index, token in enumerate(node.parts[1:-1], 1) if token.kind not in TRIVIA]
+        replacement = Token("word", text, None)
+        if significant:
+            # Comments and layout around the old value stay; only the value tokens are replaced
+            node.parts[significant[0]:significant[-1] + 1] = [replacement]
+        else:
+            node.parts[1:1] = [Token("space", " ", None), replacement]
+        self._mark(node)
+        return True
+
+    def _create(self, path, text):
+        segments = split_path(path) if isinstance(path, str) else list(path)
+        parent = self._node(segments[:-1]) if len(segments) > 1 else self.root
+        if not isinstance(parent, Dictionary):
+            raise FoamDictionaryError(f"Cannot add '{segments[-1]}' below the entry '{self.path_of(parent)}'")
+
+        items = parent.items()
+        anchor = items[-1] if items else None
+        indent = "    " * (len(segments) - 1)
+        if anchor is not None:
+            index = parent.parts.index(anchor)
+            before = parent.parts[index - 1] if index else None
+            if isinstance(before, Token) and before.kind == "space":
+                indent = before.text.rsplit("\n", 1)[-1]
+            index += 1
+            # Keep a trailing comment on the anchor's line ("molWeight 28.9;  // air") with the anchor
+            while (index < len(parent.parts) and isinstance(parent.parts[index], Token)
+                   and (parent.parts[index].kind == "comment" or parent.parts[index].kind == "space"
+                        and "\n" not in parent.parts[index].text)):
+                index += 1
+        else:
+            # No entry yet: go last in the scope, but before its closing whitespace (the root's final newline too)
+            index = len(parent.parts) - 1 if parent.key is not None else len(parent.parts)
+            while index and isinstance(parent.parts[index - 1], Token) and parent.parts[index - 1].kind == "space":
+                index -= 1
+
+        key = segments[-1]
+        key = f'"{key}"' if re.search(r"[\s{}()\[\];.]", key) else key
+        entry = Entry(key, [Token("word", key, None), Token("space", " ", None), Token("word", text, None),
+                            Token("punct", ";", None)], parent)
+        newline = Token("space", "\n" + indent, None)
+        parent.parts[index:index] = [newline, entry]
+
+        # Insertions render after the nearest preceding source span; later ones at the same place append
+        position = len(self.source)
+        for part in reversed(parent.parts[:index]):
+            end = self._source_end(part)
+            if end is not None:
+                position = end
+                break
+        inserted = self.edits.setdefault((position, position), Node())
+        inserted.parts.extend([newline, entry])
+
+        self.reindex()
+        self._mark(entry)
+        return True
+
+    def _source_end(self, part):
+        span = part.span() if isinstance(part, Node) else (part.start, part.start + len(part.text)) if part.start is not None else None
+        if span is None:
+            # A comment that replaced an entry stands in for that entry's span
+            span = next((edit_span for edit_span, replacement in self.edits.items() if replacement is part), None)
+        return span[1] if span is not None else None
+
+    def update(self, values, create=False):
+        """set() every {path: value}; returns the paths whose text changed."""
+        return [path for path, value in values.items() if self.set(path, value, create)]
+
+    def update_keys(self, values, scope=None):
+        """set() every entry named like each key below ``scope`` (the write side of values()).
+
+        A key repeated in several blocks (nLayers in each patchBoundaryLayers
+        entry) gets the value everywhere; pass ``scope`` to limit it. Returns
+        the keys whose text changed; keys not in the file are skipped.
+        """
+        changed = []
+        for key, value in values.items():
+            entries = [node for node in self.find_all(key, scope) if isinstance(node, Entry)]
+            # A list, not any(): every occurrence must be set
+            if any([self.set(node, value) for node in entries]):
+                changed.append(key)
+        return changed
+
+    def comment_out(self, path):
+        """Turn an entry into '// key value;' comment lines, keeping it in the file for later."""
+        node = self._node(path)
+        if not isinstance(node, Entry):
+            raise FoamDictionaryError(f"'{self.path_of(node)}' is a sub-dictionary, not a value")
+        text = "\n".join(f"// {line}" for line in node.text().split("\n"))
+        siblings = node.parent.parts
+        following = next((part for part in siblings[siblings.index(node) + 1:]
+                          if not (isinstance(part, Token) and part.kind == "space" and "\n" not in part.text)), None)
+        if following is not None and not (isinstance(following, Token) and (
+                following.kind == "space" or following.kind == "comment" and following.text.startswith("//"))):
+            # Something follows on the same line ("a { b 1; }"): end the line comment before it
+            text += "\n"
+        comment = Token("comment", text, None)
+        for parts in (node.parent.parts,) + tuple(edit.parts for edit in self.edits.values() if type(edit) is Node
+                                                  and node in edit.parts):
+            parts[parts.index(node)] = comment
+        self._mark(node, comment)
+        self.reindex()
+        return True
+
+    def write(self, filename=None):
+        """Write the edited text atomically (temporary file + rename) -> False if there was nothing to write.
+
+        The result becomes the new source, so nodes looked up before the
+        write are stale afterwards.
+        """
+        filename = filename or self.filename
+        if not self.edits and filename == self.filename:
+            return False
+        text = self.text()
+        temp_file = write_temporary(filename, text)
+        try:
+            os.replace(temp_file, filename)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+        self.filename = filename
+        self.load(text)
+        return True
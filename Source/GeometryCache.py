@@ -0,0 +1,161 @@
+import os
+import mmap
+import threading
+import numpy as np
+import vtk
+from collections import OrderedDict
+
+# Importing local modules
+from stl_io import read_solids, facet_triangles, facets_to_polydata, is_plain_stl
+
+# ---------------------------------------------------------------------------
+# Session-wide cache of parsed geometry.
+# One entry per file, keyed by (absolute path, size, mtime), holding the facet
+# records, the VTK surfaces and any derived data (topology, BVH, ...). Import,
+# analysis and the viewer all go through the same instance
+# (session_geometry_cache()), so a file is parsed once per session. Entries
+# are evicted least-recently-used once their estimated size passes max_bytes.
+# ---------------------------------------------------------------------------
+
+def _default_max_bytes():
+    # A quarter of physical RAM, capped at 4 GB
+    try:
+        physical_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        physical_memory = 8 * 1024 ** 3
+    return min(physical_memory // 4, 4 * 1024 ** 3)
+
+def maps_file(value):
+    """True if ``value`` reads through a memory map of its file (a memmap, a view of one, or a container holding one)."""
+    if isinstance(value, np.ndarray):
+        while isinstance(value, np.ndarray):
+            if isinstance(value, np.memmap):
+                return True
+            value = value.base
+        return isinstance(value, mmap.mmap)
+    if isinstance(value, dict):
+        return any(maps_file(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(maps_file(item) for item in value)
+    if hasattr(value, "__dict__") and not isinstance(value, vtk.vtkObjectBase):
+        return maps_file(vars(value))
+    return False
+
+def estimate_nbytes(value):
+    """Resident size estimate of a cached value (memory maps count as free: they live in the page cache)."""
+    if isinstance(value, np.memmap):
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, vtk.vtkDataObject):
+        return value.GetActualMemorySize() * 1024
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(item) for item in value)
+    if hasattr(value, "__dict__"):
+        return estimate_nbytes(vars(value))
+    return 0
+
+class GeometryCache:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or _default_max_bytes()
+        self._entries = OrderedDict()  # key -> {name: value}
+        self._lock = threading.RLock()  # Analysis threads and the GUI share the cache
+
+    def _key(self, filename):
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, filename, name, factory):
+        """Cached ``name`` for this file, computing it with ``factory()`` on a miss."""
+        key = self._key(filename)
+        with self._lock:
+            if key not in self._entries:
+                # A new size/mtime means the file changed: older versions are stale
+                for stale in [stale for stale in self._entries if stale[0] == key[0]]:
+                    self._entries.pop(stale)
+            entry = self._entries.setdefault(key, {})
+            self._entries.move_to_end(key)
+            if name in entry:
+                return entry[name]
+        value = factory()
+        with self._lock:
+            self._entries.setdefault(key, {})[name] = value
+            self._evict(keep=key)
+        return value
+
+    # -------------------------- Standard views ---------------------------
+    def solids(self, filename):
+        # (FACET_DTYPE records, [(solid name, start, stop), ...]); records are memory-mapped for binary STL
+        return self.get(filename, "solids", lambda: read_solids(filename))
+
+    def facets(self, filename):
+        return self.solids(filename)[0]
+
+    def triangles(self, filename):
+        return facet_triangles(self.facets(filename))
+
+    def polydata(self, filename):
+        # Unmerged surface straight from the facets, for rendering
+        return self.get(filename, "polydata", lambda: facets_to_polydata(self.facets(filename)))
+
+    def mesh(self, filename):
+        # Point-merged surface from vtkSTLReader, for curvature and other VTK filters
+        def read():
+            if not is_plain_stl(filename):
+                # vtkSTLReader cannot read OBJ or compressed input: merge the decoded facets instead
+                cleaner = vtk.vtkCleanPolyData()
+                cleaner.SetInputData(self.polydata(filename))
+                cleaner.PointMergingOn()
+                cleaner.Update()
+                return cleaner.GetOutput()
+            reader = vtk.vtkSTLReader()
+            reader.SetFileName(filename)
+            reader.Update()
+            return reader.GetOutput()
+        return self.get(filename, "mesh", read)
+
+    # -------------------------- Maintenance ------------------------------
+    def share(self, source, copy):
+        """Let an identical copy of a file (e.g. Meshing/CAD.stl) reuse what was parsed for the source.
+
+        The copy gets its own entry under its own (size, mtime), so rewriting
+        either file only invalidates that file. Values that read through a
+        memory map of the source are left out: the copy maps itself on demand.
+        """
+        source_key, copy_key = self._key(source), self._key(copy)
+        if source_key[1] != copy_key[1]:
+            return
+        with self._lock:
+            entry = self._entries.get(source_key, {})
+            self._entries[copy_key] = {name: value for name, value in entry.items() if not maps_file(value)}
+
+    def nbytes(self):
+        with self._lock:
+            # Values shared between a file and its copy count once
+            values = {id(value): value for entry in self._entries.values() for value in entry.values()}
+            return sum(estimate_nbytes(value) for value in values.values())
+
+    def _evict(self, keep=None):
+        while len(self._entries) > 1 and self.nbytes() > self.max_bytes:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._entries.pop(oldest)
+
+    def invalidate(self, filename=None):
+        """Drop one file's entries (every version of it), or everything."""
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(filename)
+            for key in [key for key in self._entries if key[0] == path]:
+                self._entries.pop(key)
+
+_session_cache = GeometryCache()
+
+def session_geometry_cache():
+    return _session_cache
@@ -1,6 +1,5 @@
 # Standard library imports 
 import tkinter as tk
-import re
 import shutil
 import tarfile
 import os 
@@ -11,6 +10,7 @@ import threading
 
 # Importing local classes
 from CloudHPCManager import CloudHPCManager
+from DictionaryCache import session_dictionary_cache
 
 class ReplaceControlDictParameters:
     def __init__(self, parent, control_dict_params, existing_values):
@@ -119,39 +119,17 @@ class ReplaceControlDictParameters:
 ## ======================================================<       
 
     def replace_control_dict_parameters(self, new_values):
-        controlDict_start = 'FoamFile\n{'
-        controlDict_end = '}'
-        
-        # Extract the FoamFile block content
-        controlDict_content = re.search(f'{controlDict_start}(.*?){controlDict_end}', self.parent.selected_control_file_content, re.DOTALL).group()
-
-        # Split the file content into header, FoamFile, and body
-        controlDict_end_position = self.parent.selected_control_file_content.find(controlDict_end, self.parent.selected_control_file_content.find(controlDict_start)) + len(controlDict_end)
-        controlDict_content = self.parent.selected_control_file_content[self.parent.selected_control_file_content.find(controlDict_start):controlDict_end_position]
-        body_content = self.parent.selected_control_file_content[controlDict_end_position:]
-
-        # Replace old values with new ones in the body content for control file parameters
-        for param, entry in self.new_values.items():
-            value = new_values[param]  # gets the new values from the user 
-            if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-
-                # Access the entry widget directly from the dictionary
-                entry_widget = self.entry_widgets[param]
-                if isinstance(entry_widget, ttk.Entry):
-                    body_content = re.sub(old_pattern, new_pattern, body_content)
+        control_dict = session_dictionary_cache().edit(self.parent.control_dict_file_path)
 
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{controlDict_content}{body_content}'
+        # Replace old values with new ones; the header, comments and other keys are left untouched
+        control_dict.update_keys({param: value for param, value in new_values.items() if value != ""})
 
         # Show a confirmation popup
         confirmation = tk.messagebox.askyesno("Confirmation", "Are you sure you want to update the file?")
         if confirmation:
-            # Write the updated content to the file
-            with open(self.parent.control_dict_file_path, 'w') as file:
-                print(f"Selected OpenFOAM case: {self.parent.selected_file_path}")  # Debug print
-                file.write(file_content)
+            # Write the updated content to the file (only the changed values differ)
+            session_dictionary_cache().write(control_dict)
+            self.parent.selected_control_file_content = control_dict.text()
 
             # Show a confirmation popup after updating controlDict parameters
             tk.messagebox.showinfo("Update", "ControlDict parameters updated successfully.")
@@ -1,9 +1,12 @@
 import tkinter as tk
-import re
 import os
 import shutil
 import subprocess
-from tkinter import ttk, simpledialog, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox
+
+# Importing local modules
+from FoamDictionary import FoamDictionary, Dictionary
+from DictionaryCache import session_dictionary_cache
 
 class ReplaceMeshParameters:
     def __init__(self, parent, mesh_params, existing_values):
@@ -144,10 +147,7 @@ class ReplaceMeshParameters:
 
     def extract_stop_after_value(self, mesh_file_content):
         # Extract the stopAfter value from the workflowControl block in the meshDict file
-        match = re.search(r'workflowControl\s*{[^}]*stopAfter\s+(\w+);', mesh_file_content, re.DOTALL)
-        if match:
-            return match.group(1)
-        return ""       
+        return FoamDictionary(mesh_file_content).get("workflowControl.stopAfter", "")
 
     def load_last_selected_choice(self):
         # Check if a configuration file with the last selected choice exists
@@ -169,10 +169,6 @@ class ReplaceMeshParameters:
             config_file.write(choice)
 
     def update_mesh_parameters(self):
-    
-        # Initialize body_content
-        body_content = self.parent.selected_mesh_file_content
-
         # Get the new values from the entry fields
         new_values = {param: entry.get() for param, entry in self.new_values.items()}
         
@@ -182,85 +178,13 @@ class ReplaceMeshParameters:
         # Save the selected choice as the last selected choice
         self.save_last_selected_choice(selected_workflow_step)
 
-        # Update the stopAfter value in the meshDict file
-        self.replace_stop_after_value(selected_workflow_step)
-        
-        # Update mesh parameters (you need to implement this part based on your application's needs)
-        self.replace_mesh_parameters(new_values)
-        
-        # Initialize body_content with the latest file content
-        with open(self.parent.mesh_dict_file_path, 'r') as file:
-            body_content = file.read()
-
-        # Get the new values from the entry fields and apply them
-        for param, entry_var in self.new_values.items():
-            value = entry_var.get()  # gets the new values from the user 
-            if value != "":
-                old_pattern = f'{param}\\s*([^;]+);'
-                new_pattern = f'{param} {value};'
-                body_content = re.sub(old_pattern, new_pattern, body_content)
+        # Parameters, stopAfter and disabled parameters go into meshDict in one write
+        self.replace_mesh_parameters(new_values, selected_workflow_step)
 
-        # Apply commenting logic
-        for param, var in self.comment_vars.items():
-            if var.get():
-                # If the checkbutton is checked, comment out the parameter in the file content
-                pattern = f'(?m)^\s*{param}\s+[^;]+;'
-                replacement = f'// {param} {self.new_values[param].get()};'
-                body_content = re.sub(pattern, replacement, body_content)
-
-        # Write the updated content to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(body_content)
-            
         # Maybe give a hint something was updated 
         self.parent.status_label.config(text="Mesh parameters' values are updated successfully!")
 
-    def replace_mesh_parameters(self, new_values):
-        meshdict_start = 'FoamFile\n{'
-        meshdict_end = '}'
-        
-        # Extract the FoamFile block content
-        meshdict_content = re.search(f'{meshdict_start}(.*?){meshdict_end}', self.parent.selected_mesh_file_content, re.DOTALL).group()
-
-        # Split the file content into header, FoamFile, and body
-        meshdict_end_position = self.parent.selected_mesh_file_content.find(meshdict_end, self.parent.selected_mesh_file_content.find(meshdict_start)) + len(meshdict_end)
-        meshdict_content = self.parent.selected_mesh_file_content[self.parent.selected_mesh_file_content.find(meshdict_start):meshdict_end_position]
-        body_content = self.parent.selected_mesh_file_content[meshdict_end_position:]
-
-        # Replace old values with new ones in the body content for mesh parameters
-        for param, entry in self.new_values.items():
-            value = new_values[param]  # gets the new values from the user 
-            if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-
-                # Access the entry widget directly from the dictionary
-                entry_widget = self.entry_widgets[param]
-                if isinstance(entry_widget, ttk.Entry):
-                    body_content = re.sub(old_pattern, new_pattern, body_content)
-
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{meshdict_content}{body_content}'
-
-        # Write the updated content to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(file_content)
-
-    def replace_stop_after_value(self, selected_workflow_step):
-        # Read the content of the meshDict file
-        with open(self.parent.mesh_dict_file_path, 'r') as file:
-            file_content = file.read()
-
-        # Replace the old stopAfter value with the new one
-        updated_content = re.sub(r'workflowControl\s*{[^}]*stopAfter\s+\w+;', f'workflowControl\n{{\n    stopAfter {selected_workflow_step};', file_content, flags=re.DOTALL)
-
-        # Write the updated content back to the file
-        with open(self.parent.mesh_dict_file_path, 'w') as file:
-            file.write(updated_content)
-
-        self.parent.status_label.config(text="Mesh parameters' values are updated successfully!")
-
-        # Show a confirmation popup after ReplaceMeshParameters finishes
+        # Show a confirmation popup once meshDict is up to date
         confirmation = tk.messagebox.askyesno("Confirmation", "Are you ready to launch the mesher?")
         if confirmation:
             # Start meshing!
@@ -268,6 +192,25 @@ class ReplaceMeshParameters:
         else:
             tk.messagebox.showinfo("Meshing Canceled", "No mesh will be created.")
 
+    def replace_mesh_parameters(self, new_values, selected_workflow_step=None):
+        mesh_dict = session_dictionary_cache().edit(self.parent.mesh_dict_file_path)
+
+        # Only the edited values change; header, comments and other keys are kept byte for byte
+        mesh_dict.update_keys({param: value for param, value in new_values.items() if value != ""})
+        if selected_workflow_step and "workflowControl.stopAfter" in mesh_dict:
+            mesh_dict.set("workflowControl.stopAfter", selected_workflow_step)
+
+        # Apply commenting logic
+        for param, var in self.comment_vars.items():
+            if var.get():
+                # If the checkbutton is checked, comment out every occurrence of the parameter (// param value;)
+                for node in mesh_dict.find_all(param):
+                    if not isinstance(node, Dictionary):
+                        mesh_dict.comment_out(node)
+
+        session_dictionary_cache().write(mesh_dict)
+        self.parent.selected_mesh_file_content = mesh_dict.text()
+
     # Saving the created mesh (polyMesh dir) to a specific location 
     def save_mesh(self):
         # Ask the user where to save the folder
@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
-import re
 from tkinter import simpledialog, messagebox
 
+# Importing local modules
+from FoamDictionary import Dictionary
+from DictionaryCache import session_dictionary_cache
+
 class ReplacePropertiesPopup:
     def __init__(self, parent, thermo_type_params, mixture_params, old_values_thermo_type, old_values_mixture):
         self.parent = parent
@@ -50,37 +53,18 @@ class ReplacePropertiesPopup:
 
         
     def replace_mixture_values(self):
-        file_content = self.parent.selected_file_content
-
-        # Define the lines to be preserved
-        foamfile_start = 'FoamFile\n{'
-        foamfile_end = '}'
-
-        # Extract the FoamFile block content
-        foamfile_content = re.search(f'{foamfile_start}(.*?){foamfile_end}', file_content, re.DOTALL).group()
-
-        # Split the file content into header, FoamFile, and body
-        foamfile_end_position = file_content.find(foamfile_end, file_content.find(foamfile_start)) + len(foamfile_end)
-        foamfile_content = file_content[file_content.find(foamfile_start):foamfile_end_position]
-        body_content = file_content[foamfile_end_position:]
+        properties = session_dictionary_cache().edit(self.parent.selected_file_path)
 
-        # Replace old values with new ones in the body content for the mixture block
-        for param, entry in self.new_values_mixture.items():
-            value = entry.get() # gets the new values from the user 
-            if value != "":
-                old_pattern = f'{param}\\s*([^;]+)'
-                new_pattern = f'{param} {value}'
-                body_content = re.sub(old_pattern, new_pattern, body_content)
-
-        # Combine the header, FoamFile, and updated body content
-        file_content = f'{self.parent.header}{foamfile_content}{body_content}'
+        # Replace old values with new ones in the mixture block only (thermoType may share key names)
+        new_values = {param: entry.get() for param, entry in self.new_values_mixture.items()}
+        properties.update_keys({param: value for param, value in new_values.items() if value != ""}, scope="mixture")
         
         # Show a confirmation popup
         confirmation = tk.messagebox.askyesno("Confirmation", "Are you sure you want to update the file?")
         if confirmation:
             # Write the updated content to the file
-            with open(self.parent.selected_file_path, 'w') as file:
-                file.write(file_content)
+            session_dictionary_cache().write(properties)
+            self.parent.selected_file_content = properties.text()
 
             self.parent.status_label.config(text="Values replaced successfully")
             tk.messagebox.showinfo("Update", "Mixture block updated successfully.")
@@ -96,14 +80,19 @@ class ReplacePropertiesPopup:
                 added_values[prop] = value
 
         if added_values:
-            file_content = self.selected_file_content
+            properties = session_dictionary_cache().edit(self.parent.selected_file_path)
+            scope = "mixture" if isinstance(properties.get("mixture"), Dictionary) else None
             for prop, value in added_values.items():
-                file_content += f'\n{prop} {value};'
-
-            with open(self.selected_file_path, 'a') as file:
-                file.write(file_content)
-
-            self.status_label.config(text="Parameters added successfully")
+                # Existing parameters are updated in place, missing ones appended to the mixture block
+                node = properties.find(prop, scope)
+                if node is not None:
+                    properties.set(node, value)
+                else:
+                    properties.set(f"{scope}.{prop}" if scope else prop, value, create=True)
+
+            session_dictionary_cache().write(properties)
+            self.parent.selected_file_content = properties.text()
+            self.parent.status_label.config(text="Parameters added successfully")
 
 if __name__ == "__main__":
     # Code to instantiate and run the ReplacePropertiesPopup class if this script is run 
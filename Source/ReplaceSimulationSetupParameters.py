@@ -1,7 +1,10 @@
 import tkinter as tk
 import os
-import re
-from tkinter import ttk, simpledialog, messagebox
+from tkinter import ttk, messagebox
+
+# Importing local modules
+from FoamDictionary import FoamDictionaryError
+from DictionaryTransaction import DictionaryTransaction
 
 class ReplaceSimulationSetupParameters:
     def __init__(self, parent, constant_params, system_params, existing_values):
@@ -107,37 +110,20 @@ class ReplaceSimulationSetupParameters:
         # Show a confirmation popup
         confirmation = messagebox.askyesno("Confirmation", "Are you sure you want to update the parameters?")
         if confirmation:
-            # Iterate over directories and file_params
-            for directory, file_params in {"constant": self.constant_params, "system": self.system_params}.items():
-                for file_name, param_list in file_params.items():
-                    file_path = os.path.join(self.parent.selected_file_path, directory, file_name)
-                    if os.path.exists(file_path):
-                        with open(file_path, 'r') as file:
-                            # Read the existing content
-                            file_content = file.read()
-
-                        # Define the lines to be preserved
-                        foamfile_start = 'FoamFile\n{'
-                        foamfile_end = '}'
-
-                        # Extract the FoamFile block content
-                        foamfile_content = re.search(f'{foamfile_start}(.*?){foamfile_end}', file_content, re.DOTALL).group()
-
-                        # Split the file content into header, FoamFile, and body
-                        foamfile_end_position = file_content.find(foamfile_end, file_content.find(foamfile_start)) + len(foamfile_end)
-                        foamfile_content = file_content[file_content.find(foamfile_start):foamfile_end_position]
-                        body_content = file_content[foamfile_end_position:]
-
-                        # Replace old values with new ones in the body content
-                        for param_name in param_list:
-                            old_pattern = f'{param_name}\\s*([^;]+)'
-                            new_pattern = f'{param_name} {new_values.get(param_name, "")}'
-                            body_content = re.sub(old_pattern, new_pattern, body_content)
-
-                        # Combine the header, FoamFile, and updated body content
-                        file_content = f'{self.parent.header}{foamfile_content}{body_content}'
-
-                        # Write the updated content back to the file
-                        with open(file_path, 'w') as file:
-                            file.write(file_content)
-
+            # Stage the edits of every file, then write them all or none
+            transaction = DictionaryTransaction()
+            try:
+                for directory, file_params in {"constant": self.constant_params, "system": self.system_params}.items():
+                    for file_name, param_list in file_params.items():
+                        file_path = os.path.join(self.parent.selected_file_path, directory, file_name)
+                        if os.path.exists(file_path):
+                            transaction.update_keys(file_path, {param_name: new_values[param_name] for param_name in param_list
+                                                                if new_values.get(param_name, "") != ""})
+                changed = transaction.commit()
+            except (OSError, FoamDictionaryError) as e:
+                messagebox.showerror("Error", f"No parameters were updated: {e}")
+                return
+
+            changed_keys = [key for keys in changed.values() for key in keys]
+            self.parent.status_label.config(text=f"{len(changed_keys)} simulation setup parameter(s) updated")
+            messagebox.showinfo("Update", f"Updated {', '.join(changed_keys) or 'nothing'} in {len(changed)} file(s).")
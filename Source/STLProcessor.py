@@ -1,21 +1,46 @@
 import tkinter as tk
+from tkinter import messagebox
 import vtk
 import numpy as np
-import json
 import os
+import time
+import threading
+from vtk.util import numpy_support
+
+# Importing local modules
+from stl_metrics import compute_facet_metrics, reduce_facet_metrics, combine_facet_metrics, finalize_facet_metrics, summarize_curvature
+from stl_io import geometry_stem, facet_triangles, iter_facet_chunks, write_binary_stl, flip_facets, CHUNK_FACETS
+from stl_parallel import compute_parallel_partials
+from STLReportCache import STLReportCache, CACHE_DIR_NAME
+from stl_topology import build_topology, file_topology, summarize_topology, analyze_orientation
+from report_io import write_report, COMPRESSION_SUFFIXES
+from STLReport import STLReport
+from TriangleBVH import TriangleBVH
+from GeometryCache import session_geometry_cache
+from stl_solids import patch_metrics, patch_names, facet_patch_ids, compute_patch_partials, combine_patch_partials, finalize_patch_metrics
+
+# The in-memory path holds roughly this many bytes per byte of binary STL
+# (float64 triangles plus the per-facet metric arrays)
+IN_MEMORY_BYTES_PER_FILE_BYTE = 12
 
 class STLProcessor:
+    # The compute methods (read_mesh ... compute_report) never touch Tk and are
+    # safe to run off the GUI thread; only the *_visual/display methods and
+    # process_stl/process_stl_async use self.parent.
     def __init__(self, parent):
         self.parent = parent  # Storing a reference to the parent
+        self._facet_metrics_cache = (None, None)  # (mesh, metrics) of the last analysed mesh
+
+    def read_mesh(self, filename):
+        # Parsed once per session: import, analysis and the viewer share the cached surface
+        return session_geometry_cache().mesh(filename)
                 
     def read_stl_file(self, filename):
-        reader = vtk.vtkSTLReader()
-        reader.SetFileName(filename)
-        reader.Update()
+        mesh = self.read_mesh(filename)
         
         # Initiate the text_box with the default CAD representation! 
         self.generate_cad_visual()
-        return reader.GetOutput()
+        return mesh
 
     def compute_volume_and_surface_area(self, mesh):
         mass_properties = vtk.vtkMassProperties()
@@ -39,8 +64,9 @@ class STLProcessor:
         return curvature_filter.GetOutput()
 
     def extract_curvature_data(self, curved_mesh):
+        # Whole curvature array in one zero-copy NumPy view
         curvature_data = curved_mesh.GetPointData().GetScalars()
-        return [curvature_data.GetValue(i) for i in range(curved_mesh.GetNumberOfPoints())]
+        return numpy_support.vtk_to_numpy(curvature_data)
 
     def compute_bounding_box(self, mesh):
         bounds = mesh.GetBounds()
@@ -49,111 +75,307 @@ class STLProcessor:
         return min_bounds, max_bounds
 
     def compute_surface_normals(self, mesh):
-        normals_filter = vtk.vtkPolyDataNormals()
-        normals_filter.SetInputData(mesh)
-        normals_filter.ComputePointNormalsOff()
-        normals_filter.ComputeCellNormalsOn()
-        normals_filter.Update()
-        
-        normals = normals_filter.GetOutput().GetCellData().GetNormals()
-        outward_facing = inward_facing = 0
-        for i in range(normals.GetNumberOfTuples()):
-            normal = normals.GetTuple(i)
-            if np.dot(normal, normal) > 0:
-                outward_facing += 1
-            else:
-                inward_facing += 1
-        
+        # Facets wound against the consistent outward orientation count as inward facing
+        triangles = self.extract_triangles(mesh)
+        topology = build_topology(triangles)
+        _, flip = analyze_orientation(triangles, topology)
+        inward_facing = int(np.count_nonzero(flip))
+        outward_facing = int(np.count_nonzero(~topology["collapsed"])) - inward_facing
         return outward_facing, inward_facing
 
+    def extract_triangles(self, mesh):
+        # Pull points and connectivity out of the polydata once as contiguous arrays
+        points = numpy_support.vtk_to_numpy(mesh.GetPoints().GetData()).astype(np.float64)
+        polys = mesh.GetPolys()
+        offsets = numpy_support.vtk_to_numpy(polys.GetOffsetsArray())
+        connectivity = numpy_support.vtk_to_numpy(polys.GetConnectivityArray())
+
+        sizes = np.diff(offsets)
+        if np.all(sizes == 3):
+            triangle_ids = connectivity.reshape(-1, 3)
+        else:
+            # Skip any non-triangular cells, as the per-cell loops used to
+            starts = offsets[:-1][sizes == 3]
+            triangle_ids = connectivity[starts[:, None] + np.arange(3)]
+        return points[triangle_ids]
+
+    def compute_facet_metrics(self, mesh, timings=None):
+        # Computed once per mesh and shared by the area, edge and aspect-ratio queries
+        cached_mesh, metrics = self._facet_metrics_cache
+        if cached_mesh is not mesh:
+            start = time.perf_counter()
+            triangles = self.extract_triangles(mesh)
+            if timings is not None:
+                timings["Extract Arrays"] = time.perf_counter() - start
+            metrics = compute_facet_metrics(triangles, timings)
+            self._facet_metrics_cache = (mesh, metrics)
+        return metrics
+
+    def needs_streaming(self, filename):
+        # Stream when the in-memory analysis would not comfortably fit in physical RAM
+        try:
+            physical_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (AttributeError, ValueError, OSError):
+            return False
+        return os.path.getsize(filename) * IN_MEMORY_BYTES_PER_FILE_BYTE > physical_memory // 2
+
+    def compute_streaming_partials(self, filename, chunk_size=CHUNK_FACETS, timings=None, progress=None, patches=None):
+        # Running sums/extrema over bounded chunks: peak memory is independent of file size.
+        # When a ``patches`` dict is given, it is filled with the per-solid metrics, accumulated in the same pass.
+        partials = patch_partials = None
+        solids, names = [], []
+        facet_count = 0
+        for index, chunk in enumerate(iter_facet_chunks(filename, chunk_size, solids), 1):
+            triangles = facet_triangles(chunk)
+            chunk_partials = reduce_facet_metrics(compute_facet_metrics(triangles, timings))
+            partials = chunk_partials if partials is None else combine_facet_metrics(partials, chunk_partials)
+            if patches is not None:
+                # Solid headers up to this chunk are already recorded, so its facets can be assigned
+                names.extend(name for name in patch_names(solids) if name not in names)
+                ids = facet_patch_ids(solids, facet_count, facet_count + len(chunk), names)
+                chunk_patches = compute_patch_partials(triangles, ids, len(names))
+                patch_partials = chunk_patches if patch_partials is None else combine_patch_partials(patch_partials, chunk_patches)
+            facet_count += len(chunk)
+            if progress:
+                progress(f"Streaming chunk {index}", None)
+        if partials is None:
+            raise ValueError(f"No facets found in {filename}")
+        if patches is not None:
+            # Markers of solids that turned out empty are dropped, as solid_ranges does
+            patches.update((name, metrics) for name, metrics in finalize_patch_metrics(patch_partials, names).items() if metrics["Facets"])
+        return partials
+
     def compute_facet_areas(self, mesh):
-        areas = []
-        for i in range(mesh.GetNumberOfCells()):
-            cell = mesh.GetCell(i)
-            points = cell.GetPoints()
-            if points.GetNumberOfPoints() == 3:
-                pt1, pt2, pt3 = [np.array(points.GetPoint(j)) for j in range(3)]
-                edge1, edge2 = pt2 - pt1, pt3 - pt1
-                areas.append(np.linalg.norm(np.cross(edge1, edge2)) / 2)
-        return min(areas), max(areas)
+        areas = self.compute_facet_metrics(mesh)["areas"]
+        return float(areas.min()), float(areas.max())
 
     def compute_edge_lengths(self, mesh):
-        edge_lengths = []
-        for i in range(mesh.GetNumberOfCells()):
-            cell = mesh.GetCell(i)
-            points = cell.GetPoints()
-            if points.GetNumberOfPoints() == 3:
-                pt1, pt2, pt3 = [np.array(points.GetPoint(j)) for j in range(3)]
-                edge_lengths.extend([np.linalg.norm(pt2 - pt1), np.linalg.norm(pt3 - pt1), np.linalg.norm(pt3 - pt2)])
-        return min(edge_lengths), max(edge_lengths)
+        edge_lengths = self.compute_facet_metrics(mesh)["edge_lengths"]
+        return float(edge_lengths.min()), float(edge_lengths.max())
 
     def compute_aspect_ratios(self, mesh):
-        aspect_ratios = []
-        for i in range(mesh.GetNumberOfCells()):
-            cell = mesh.GetCell(i)
-            points = cell.GetPoints()
-            if points.GetNumberOfPoints() == 3:
-                pt1, pt2, pt3 = [np.array(points.GetPoint(j)) for j in range(3)]
-                edges = [np.linalg.norm(pt2 - pt1), np.linalg.norm(pt3 - pt1), np.linalg.norm(pt3 - pt2)]
-                aspect_ratios.append(max(edges) / min(edges))
-        return min(aspect_ratios), max(aspect_ratios)
-
-    def write_json_report(self, filename, **metrics):
-        base_name = os.path.splitext(os.path.basename(filename))[0]
-        json_output_file = f"{base_name}_report.json"
-        with open(json_output_file, 'w') as outfile:
-            json.dump(metrics, outfile, indent=4)
+        aspect_ratios = self.compute_facet_metrics(mesh)["aspect_ratios"]
+        return float(aspect_ratios.min()), float(aspect_ratios.max())
+
+    def spatial_index(self, filename):
+        # Cached BVH for inside tests, wall distances and ray casts (refinement objects, locationInMesh)
+        return TriangleBVH.from_file(filename)
+
+    def invalidate_report_cache(self, filename=None):
+        # Drop cached reports for one STL file, or the whole cache in the working directory
+        STLReportCache(os.path.abspath(CACHE_DIR_NAME)).invalidate(filename)
+
+    def report_cache_options(self, streaming, curvature_sidecar=False, oriented_stl=False):
+        # Only options that change the report content are part of the cache key
+        return {"curvature": not streaming, "topology": not streaming, "orientation": not streaming, "patches": True,
+                "curvature_sidecar": bool(curvature_sidecar), "oriented_stl": bool(oriented_stl)}
+
+    def write_json_report(self, filename, arrays=None, array_format="npz", compression=None, **metrics):
+        # Compact JSON for the scalars; per-facet/per-vertex arrays go to a binary sidecar
+        base_name = geometry_stem(filename)
+        return write_report(f"{base_name}_report.json", metrics, arrays, array_format, compression)
         
-    def process_stl(self, filename):
-        mesh = self.read_stl_file(filename)
-
-        # Compute metrics
-        volume, surface_area = self.compute_volume_and_surface_area(mesh)
-        center_of_mass = self.compute_center_of_mass(mesh)
-        min_bounds, max_bounds = self.compute_bounding_box(mesh)
-        min_area, max_area = self.compute_facet_areas(mesh)
-        min_edge_length, max_edge_length = self.compute_edge_lengths(mesh)
-        min_aspect_ratio, max_aspect_ratio = self.compute_aspect_ratios(mesh)
-        surface_normals = self.compute_surface_normals(mesh)
-
-        # Curvature analysis (mean curvature)
-        curved_mesh = self.compute_curvature(mesh)
-        curvature_values = self.extract_curvature_data(curved_mesh)
+    def analyze_stl(self, filename, streaming=False, chunk_size=CHUNK_FACETS, workers=1, curvature_file=None, arrays=None,
+                    progress=None, oriented_file=None):
+        """Compute the full report_data dict for an STL file.
+
+        Per-vertex curvature is summarised in the report; pass ``curvature_file``
+        to also save the full array as a .npy sidecar, and ``oriented_file`` to
+        write a copy of the STL with consistent outward winding. When an ``arrays`` dict is
+        given (in-memory mode only), it is filled with the per-facet and
+        per-vertex arrays for report_io.write_report. ``progress(stage, fraction)``
+        is called from the calling thread as the analysis advances.
+
+        ``workers`` other than 1 shards only the per-facet metrics across processes.
+        Patches, topology, orientation and curvature need the whole (welded)
+        surface at once and still run serially in this process afterwards, so
+        on large files they bound the overall speed-up.
+        """
+        progress = progress or (lambda stage, fraction: None)
+        timings = {}
+        patches = {}
+        progress("Facet metrics", 0.0)
+        if workers != 1:
+            # Shard the facet range across a process pool (workers=None uses every core)
+            start = time.perf_counter()
+            partials = compute_parallel_partials(filename, workers, chunk_size)
+            timings["Parallel Metrics"] = time.perf_counter() - start
+        elif streaming:
+            partials = self.compute_streaming_partials(filename, chunk_size, timings, progress, patches)
+        else:
+            start = time.perf_counter()
+            # Memory-mapped facet records: metrics start without a full VTK parse
+            facets = session_geometry_cache().facets(filename)
+            timings["Map Facets"] = time.perf_counter() - start
+
+            # Fused pipeline: every facet metric comes from a single sweep over the triangles
+            metrics = compute_facet_metrics(facet_triangles(facets), timings)
+            start = time.perf_counter()
+            partials = reduce_facet_metrics(metrics)
+            timings["Reduce"] = time.perf_counter() - start
+            if arrays is not None:
+                arrays["facet_area"] = metrics["areas"]
+                arrays["facet_aspect_ratio"] = metrics["aspect_ratios"]
+                arrays["facet_normal"] = metrics["normals"]
+        summary = finalize_facet_metrics(partials)
+
+        # Watertightness, manifold and orientation checks need every facet at once, so streaming skips them
+        topology_summary = orientation_summary = None
+        if not streaming:
+            # Per-solid metrics (inlet/outlet areas ...) from the facet ranges kept by the parser
+            progress("Patches", 0.2)
+            start = time.perf_counter()
+            patches = patch_metrics(*session_geometry_cache().solids(filename))
+            timings["Patches"] = time.perf_counter() - start
+
+            progress("Topology", 0.3)
+            start = time.perf_counter()
+            # Shared with feature-edge extraction and spatial queries through the session cache
+            triangles, topology = file_topology(filename)
+            topology_summary = summarize_topology(topology, metrics["areas"] if workers == 1 else None)
+            timings["Topology"] = time.perf_counter() - start
+
+            progress("Orientation", 0.4)
+            start = time.perf_counter()
+            orientation_summary, flip = analyze_orientation(triangles, topology)
+            if oriented_file:
+                write_binary_stl(oriented_file, flip_facets(session_geometry_cache().facets(filename), flip))
+                orientation_summary["Oriented STL"] = os.path.abspath(oriented_file)
+            timings["Orientation"] = time.perf_counter() - start
+
+        curvature_summary = None
+        # Curvature needs the whole point-merged surface in memory, so streaming skips it
+        if not streaming:
+            # Curvature needs the point-merged surface, so only this stage goes through VTK
+            progress("Reading surface", 0.5)
+            start = time.perf_counter()
+            mesh = self.read_mesh(filename)
+            timings["Read"] = time.perf_counter() - start
+
+            # Curvature analysis (mean curvature)
+            progress("Curvature", 0.7)
+            start = time.perf_counter()
+            curved_mesh = self.compute_curvature(mesh)
+            curvature_values = self.extract_curvature_data(curved_mesh)
+            points = numpy_support.vtk_to_numpy(curved_mesh.GetPoints().GetData())
+            curvature_summary = {"Type": "mean"}
+            curvature_summary.update(summarize_curvature(curvature_values, points))
+            if curvature_file:
+                np.save(curvature_file, curvature_values)
+                curvature_summary["Sidecar"] = os.path.abspath(curvature_file)
+            if arrays is not None:
+                arrays["vertex_position"] = points
+                arrays["vertex_curvature"] = curvature_values
+            timings["Curvature"] = time.perf_counter() - start
 
         # Prepare data for JSON and text box output
-        report_data = {
-            "Volume": volume,
-            "Surface Area": surface_area,
-            "Center of Mass": center_of_mass,
-            "Bounding Box": {
-                "Min Bounds": min_bounds,
-                "Max Bounds": max_bounds
-            },
-            "Min Facet Area": min_area,
-            "Max Facet Area": max_area,
-            "Min Edge Length": min_edge_length,
-            "Max Edge Length": max_edge_length,
-            "Min Aspect Ratio": min_aspect_ratio,
-            "Max Aspect Ratio": max_aspect_ratio,
-            "Curvature Values": curvature_values,
-            "Surface Normals": {
-                "Outward Facing": surface_normals[0],
-                "Inward Facing": surface_normals[1]}
-            }
-
-        # Write the report to a JSON file
-        base_name = os.path.splitext(os.path.basename(filename))[0]
-        json_output_file = f"{base_name}_report.json"
-        with open(json_output_file, 'w') as outfile:
-            json.dump(report_data, outfile, indent=4)
-        
-        # Display the report in the text box
-        self.display_report_in_text_box(report_data)
+        report_data = dict(summary)
+        report_data["Patches"] = patches
+        if topology_summary is not None:
+            report_data["Topology"] = topology_summary
+        if curvature_summary is not None:
+            report_data["Curvature"] = curvature_summary
+        if orientation_summary is not None:
+            report_data["Orientation"] = orientation_summary
+            # Facets that have to be flipped for a consistent outward surface face inward
+            inward_facing = orientation_summary["Facets To Flip"]
+            report_data["Surface Normals"] = {
+                "Outward Facing": int(np.count_nonzero(~topology["collapsed"])) - inward_facing,
+                "Inward Facing": inward_facing}
+        report_data["Stage Timings (s)"] = {stage: round(seconds, 6) for stage, seconds in timings.items()}
+
+        progress("Analysis complete", 1.0)
+        return report_data
+
+    def compute_report(self, filename, streaming=None, chunk_size=CHUNK_FACETS, workers=1, use_cache=True, curvature_sidecar=False,
+                       array_format=None, compression=None, reorient=False, progress=None):
+        """Analyse an STL file, write its report file and return an STLReport.
+
+        Pure compute: safe to call from a worker thread or process.
+        """
+        # streaming=None picks the chunked mode automatically for files too big for RAM
+        if streaming is None:
+            streaming = self.needs_streaming(filename)
+        # array_format ("npz"/"parquet") also saves per-facet and per-vertex arrays;
+        # compression ("gzip"/"zstd") applies to the JSON and the array files
+        arrays = {} if array_format and not streaming and workers == 1 else None
+
+        base_name = geometry_stem(filename)
+        json_output_file = f"{base_name}_report.json{COMPRESSION_SUFFIXES[compression]}"
+        curvature_file = f"{base_name}_curvature.npy" if curvature_sidecar and not streaming else None
+        # reorient writes {base}_oriented.stl with every shell consistently wound outward
+        oriented_file = f"{base_name}_oriented.stl" if reorient and not streaming else None
+
+        # The cache lives next to the report
+        cache = STLReportCache(os.path.join(os.path.dirname(os.path.abspath(json_output_file)), CACHE_DIR_NAME))
+        cache_options = self.report_cache_options(streaming, curvature_file, oriented_file)
+        start = time.perf_counter()
+        # Arrays are not cached, so a request for them always recomputes
+        report_data = cache.get(filename, cache_options) if use_cache and arrays is None else None
+        if any(sidecar and not os.path.exists(sidecar) for sidecar in (curvature_file, oriented_file)):
+            report_data = None  # A sidecar was removed, so recompute it
+        from_cache = report_data is not None
+        if from_cache:
+            report_data["Stage Timings (s)"] = {"Cache Hit": round(time.perf_counter() - start, 6)}
+        else:
+            report_data = self.analyze_stl(filename, streaming, chunk_size, workers, curvature_file, arrays, progress, oriented_file)
+            if use_cache:
+                cache.put(filename, cache_options, report_data)
+
+        # Write the report: compact JSON plus the optional binary array sidecar
+        output_file = write_report(json_output_file, report_data, arrays, array_format or "npz", compression)
+        return STLReport(filename, report_data, arrays, output_file, from_cache)
+
+    def process_stl(self, filename, **options):
+        # Synchronous GUI entry point; options are those of compute_report
+        self.generate_cad_visual()
+        report = self.compute_report(filename, **options)
+        self.display_report_in_text_box(report)
+        print(f"Analysis complete. Report generated: {report.output_file}")
+        return report
+
+    def process_stl_async(self, filename, on_complete=None, on_progress=None, on_error=None, **options):
+        """Run compute_report in a background thread so the Tk window stays responsive.
 
-        print(f"Analysis complete. Report generated: {json_output_file}")
+        Every callback is marshalled to the GUI thread with root.after:
+        ``on_progress(stage, fraction)``, ``on_complete(report)`` and
+        ``on_error(exception)`` (an error dialog by default).
+        """
+        root = self.parent.root
+        self.generate_cad_visual()
+
+        def progress(stage, fraction):
+            if on_progress:
+                root.after(0, on_progress, stage, fraction)
+
+        def finish(report):
+            self.display_report_in_text_box(report)
+            print(f"Analysis complete. Report generated: {report.output_file}")
+            if on_complete:
+                on_complete(report)
+
+        def fail(error):
+            if on_error:
+                on_error(error)
+            else:
+                messagebox.showerror("STL Analysis Error", f"Could not analyse {os.path.basename(filename)}:\n{error}")
+
+        def worker():
+            try:
+                report = self.compute_report(filename, progress=progress, **options)
+            except Exception as e:
+                root.after(0, fail, e)
+            else:
+                root.after(0, finish, report)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
         
     # Decoration function for CAD import  
     def generate_cad_visual(self):
+        if self.parent is None:
+            return  # Headless use (e.g. stl_batch) has no text box to decorate
         cad_representation = self.create_cad_visual()
         self.parent.text_box.delete(1.0, tk.END)  # Clear existing content
         self.parent.text_box.insert(tk.END, cad_representation)
@@ -184,32 +406,16 @@ _____________________________________________________
 \n"""
         return pattern1 + cad + pattern2
         
-    def display_report_in_text_box(self, report_data):
-        """Display structured data from report_data on the text widget."""
+    def display_report_in_text_box(self, report):
+        """Display structured data from an STLReport (or a report_data dict) on the text widget."""
+        if not isinstance(report, STLReport):
+            report = STLReport(None, report)
         #self.parent.text_box.delete(1.0, "end")  # Clear previous content if any
         self.parent.text_box.insert("end", "              ->  STL Geometry Analysis <-              \n")
         self.parent.text_box.insert("end", "              ----------------------------              \n\n")
 
-        # Recursively display the report data
-        def format_and_display(data, indent=0):
-            indent_space = " " * (indent * 4)
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, (dict, list)):
-                        self.parent.text_box.insert("end", f"{indent_space}{key}:\n")
-                        format_and_display(value, indent + 1)
-                    else:
-                        self.parent.text_box.insert("end", f"{indent_space}{key}: {value}\n")
-            elif isinstance(data, list):
-                for item in data:
-                    if isinstance(item, (dict, list)):
-                        format_and_display(item, indent + 1)
-                    else:
-                        self.parent.text_box.insert("end", f"{indent_space}- {item}\n")
-            else:
-                self.parent.text_box.insert("end", f"{indent_space}{data}\n")
-
-        format_and_display(report_data)
+        # Format the whole report, then insert it in one go
+        self.parent.text_box.insert("end", "".join(report.format_lines()))
 
         # Ensure the text box shows the start of the content
         self.parent.text_box.yview_moveto(0)
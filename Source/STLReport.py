@@ -0,0 +1,49 @@
+# ---------------------------------------------------------------------------
+# Result object returned by STLProcessor.compute_report.
+# Holds no Tk state, so it can be produced in a worker thread or process and
+# handed to the GUI (or a batch script) afterwards.
+# ---------------------------------------------------------------------------
+
+class STLReport:
+    def __init__(self, filename, report_data, arrays=None, output_file=None, from_cache=False):
+        self.filename = filename
+        self.report_data = report_data  # Plain JSON-compatible dict
+        self.arrays = arrays or {}  # Per-facet/per-vertex arrays, when requested
+        self.output_file = output_file  # Report file written to disk, if any
+        self.from_cache = from_cache
+
+    def __getitem__(self, key):
+        return self.report_data[key]
+
+    def __contains__(self, key):
+        return key in self.report_data
+
+    def to_dict(self):
+        return dict(self.report_data)
+
+    def format_lines(self):
+        """Indented text lines of the report, as shown in the Splash text box."""
+        lines = []
+        def format_data(data, indent=0):
+            indent_space = " " * (indent * 4)
+            if isinstance(data, dict):
+                for key, value in data.items():
+                    if isinstance(value, (dict, list)):
+                        lines.append(f"{indent_space}{key}:\n")
+                        format_data(value, indent + 1)
+                    else:
+                        lines.append(f"{indent_space}{key}: {value}\n")
+            elif isinstance(data, list):
+                for item in data:
+                    if isinstance(item, (dict, list)):
+                        format_data(item, indent + 1)
+                    else:
+                        lines.append(f"{indent_space}- {item}\n")
+            else:
+                lines.append(f"{indent_space}{data}\n")
+
+        format_data(self.report_data)
+        return lines
+
+    def __str__(self):
+        return "".join(self.format_lines())
@@ -0,0 +1,164 @@
+import os
+import json
+import glob
+import hashlib
+import tempfile
+
+# Optional advisory locking of the shared hash index (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ---------------------------------------------------------------------------
+# Content-addressed cache for STLProcessor reports.
+# Entries are keyed by a BLAKE2 hash of the STL bytes plus the analysis
+# options, so renamed or copied geometries still hit. The content hash itself
+# is memoised per (path, size, mtime, inode), which makes a repeat analysis
+# of an unchanged file a couple of stat calls and one small JSON read.
+# Several processes may share one cache directory (stl_batch workers): every
+# write goes through its own temporary file, index updates are merged into
+# the on-disk index under a lock, and a failed write only costs a cache miss.
+# ---------------------------------------------------------------------------
+
+CACHE_DIR_NAME = ".stl_report_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # Evict least-recently-used entries above this size
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+# mkstemp() creates files as 0600; cache files get the mode open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+class STLReportCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._hash_index = None
+
+    # -------------------------- Content hashing --------------------------
+    def _load_hash_index(self):
+        if self._hash_index is None:
+            try:
+                with open(self.index_path, "r") as index_file:
+                    self._hash_index = json.load(index_file)
+            except (FileNotFoundError, ValueError):
+                self._hash_index = {}
+        return self._hash_index
+
+    def _write_json(self, path, data):
+        # A unique temporary file per write, so concurrent writers never rename each other's files
+        os.makedirs(self.cache_dir, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(descriptor, "w") as json_file:
+                json.dump(data, json_file)
+            os.chmod(temp_path, FILE_MODE)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _save_hash_index(self, path):
+        """Merge this process's entry for ``path`` into the on-disk index (never raises)."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, "index.lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Re-read under the lock: other processes may have added entries since we loaded it
+                try:
+                    with open(self.index_path, "r") as index_file:
+                        index = json.load(index_file)
+                except (FileNotFoundError, ValueError):
+                    index = {}
+                index[path] = self._hash_index[path]
+                self._write_json(self.index_path, index)
+                self._hash_index = index
+        except OSError as error:
+            print(f"STL report cache: could not update {self.index_path}: {error}")
+
+    def content_hash(self, filename):
+        """BLAKE2b digest of the file, recomputed only when its stat signature changes."""
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+        index = self._load_hash_index()
+        entry = index.get(path)
+        if entry and entry["signature"] == signature:
+            return entry["hash"]
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as stl_file:
+            for block in iter(lambda: stl_file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        index[path] = {"signature": signature, "hash": digest.hexdigest()}
+        content_hash = index[path]["hash"]
+        self._save_hash_index(path)
+        return content_hash
+
+    def entry_path(self, content_hash, options):
+        options_hash = hashlib.blake2b(json.dumps(options, sort_keys=True).encode(), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"{content_hash}_{options_hash}.json")
+
+    # -------------------------- Lookup / store ---------------------------
+    def get(self, filename, options):
+        """Return the cached report for this file content and options, or None."""
+        path = self.entry_path(self.content_hash(filename), options)
+        try:
+            with open(path, "r") as entry_file:
+                report_data = json.load(entry_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)  # Mark as recently used for LRU eviction
+        return report_data
+
+    def put(self, filename, options, report_data):
+        """Store a report -> False if the cache could not be written (the caller keeps its report)."""
+        try:
+            path = self.entry_path(self.content_hash(filename), options)
+            self._write_json(path, report_data)
+            self.evict()
+        except (OSError, TypeError, ValueError) as error:
+            print(f"STL report cache: could not store the report of {filename}: {error}")
+            return False
+        return True
+
+    # -------------------------- Eviction ---------------------------------
+    def _entries(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*_*.json")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        # Drop least-recently-used entries until the cache fits in max_bytes
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def invalidate(self, filename=None):
+        """Remove the entries for one STL file (any options), or every entry when no file is given."""
+        if filename is None:
+            pattern = "*_*.json"
+            self._hash_index = {}
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+        else:
+            pattern = f"{self.content_hash(filename)}_*.json"
+        for path in glob.glob(os.path.join(self.cache_dir, pattern)):
+            os.remove(path)
@@ -1,6 +1,5 @@
 # Standard library imports 
 import os
-import re
 import vtk
 import signal
 import time
@@ -23,6 +22,12 @@ from collections import defaultdict # Import defaultdict | for mesh parameters
 from tkinter.colorchooser import askcolor
 from tkinter.font import Font
 from STLProcessor import STLProcessor
+from GeometryCache import session_geometry_cache
+from stl_io import is_geometry_file, write_binary_stl, COMPRESSED_SUFFIXES
+from stl_solids import write_solids
+from DictionaryCache import session_dictionary_cache
+from stl_lod import load_lod_levels_async, attach_lod_switching
+from stl_thumbnail import render_thumbnail_async, THUMBNAIL_SUFFIXES
 
 # Importing local classes
 from SearchWidget import SearchWidget  # Import the SearchWidget class from the other file
@@ -83,6 +88,7 @@ class Splash:
         file_menu.add_command(label="New File", command=self.file_new)
         file_menu.add_command(label="Create Case", command=self.case_creator)
         file_menu.add_command(label="Analyze STL file", command=self.process_stl)
+        file_menu.add_command(label="Clear STL report cache", command=self.clear_stl_report_cache)
         file_menu.add_command(label="Profile theme", command=self.change_theme)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=root.quit)
@@ -509,10 +515,55 @@ class Splash:
 
     def process_stl(self):
         # Open file dialog to select STL file
-        self.selected_file_path = filedialog.askopenfilename(title="Select STL File", filetypes=[("STL files", "*.stl")])
+        self.selected_file_path = filedialog.askopenfilename(title="Select STL File", filetypes=[("STL files", "*.stl"), ("Compressed Geometry", "*.stl.gz *.obj.gz *.zip"), ("OBJ files", "*.obj")])
         if self.selected_file_path:
-            self.stl_processor.process_stl(self.selected_file_path)
-            messagebox.showinfo("Processing Complete", "STL analysis completed. Check the generated report.")
+            # Analysis runs in a background thread; progress comes back through root.after
+            self.stl_processor.process_stl_async(
+                self.selected_file_path,
+                on_progress=self.update_stl_progress,
+                on_complete=lambda report: (
+                    self.finish_stl_progress(report),
+                    messagebox.showinfo("Processing Complete", "STL analysis completed. Check the generated report.")),
+                on_error=self.fail_stl_progress)
+
+    def update_stl_progress(self, stage, fraction):
+        self.status_label.config(text=f"STL analysis: {stage} ...")
+        if fraction is not None:
+            self.progress_bar_canvas.configure(mode="determinate")
+            self.progress_bar_canvas["value"] = 100 * fraction
+
+    def finish_stl_progress(self, report):
+        self.progress_bar_canvas["value"] = 0
+        self.status_label.config(text=f"STL analysis complete. Report generated: {report.output_file}")
+
+    def fail_stl_progress(self, error):
+        self.progress_bar_canvas["value"] = 0
+        self.status_label.config(text="STL analysis failed!")
+        messagebox.showerror("STL Analysis Error", str(error))
+
+    def show_geometry_preview(self, file_path, preview_label=None):
+        # Rendered off-screen in the background (cached by content hash), then shown
+        # at the top of the text box and, if given, in the import popup
+        if not file_path.lower().endswith(THUMBNAIL_SUFFIXES):
+            return
+
+        def show(path):
+            self.geometry_preview = ImageTk.PhotoImage(Image.open(path))  # Keep a reference for Tk
+            self.text_box.image_create("1.0", image=self.geometry_preview)
+            self.text_box.insert("1.1", "\n")
+            if preview_label is not None and preview_label.winfo_exists():
+                preview_label.config(image=self.geometry_preview, text="")
+
+        render_thumbnail_async(
+            file_path,
+            on_complete=lambda path: self.root.after(0, show, path),
+            on_error=lambda error: self.root.after(0, print, f"Geometry preview failed: {error}"))
+
+    def clear_stl_report_cache(self):
+        # Force the next STL analysis to recompute everything from scratch
+        self.stl_processor.invalidate_report_cache()
+        session_geometry_cache().invalidate()
+        self.status_label.config(text="STL report cache cleared!")
             
     def paraview_application(self):
         # This function will be executed in a separate thread to avoid blocking the main GUI thread
@@ -568,14 +619,12 @@ class Splash:
                         self.selected_fuel.set(fuel)
                         break
 
-            with open(selected_file, 'r') as file:
-                file_content = file.read()
-                self.selected_file_content = file_content
-                old_values_mixture = {param: match.group(1) for param in self.mixture_params
-                                      for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
-                old_values_thermo_type = {param: match.group(1) for param in self.thermo_type_params
-                                           for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
-                self.open_replace_properties_popup(old_values_mixture, old_values_thermo_type)
+            # One parse per file version; each parameter is looked up in its own block, never in comments
+            properties = session_dictionary_cache().get(selected_file)
+            self.selected_file_content = properties.source
+            old_values_mixture = properties.values(self.mixture_params, scope="mixture")
+            old_values_thermo_type = properties.values(self.thermo_type_params, scope="thermoType")
+            self.open_replace_properties_popup(old_values_mixture, old_values_thermo_type)
         else:
             tk.messagebox.showerror("Error", "Selected file is not a physicalProperties file! Please look for the constant dir in your OF case!")
             
@@ -619,6 +668,7 @@ class Splash:
         
         # Execute the sed command
         subprocess.run(sed_command, shell=True)
+        session_dictionary_cache().invalidate(os.path.join(case_directory, 'constant'))
         
         # --------------------- Renaming files inside constant/ after the selected fuel ----------------------->
         # Rename the file associated with the current fuel
@@ -788,7 +838,7 @@ class Splash:
     def import_geometry(self):
         file_path = filedialog.askopenfilename(
             title="Select Geometry File",
-            filetypes=[("STL Files", "*.stl"), ("OBJ Files", "*.obj"), ("STEP Files", "*.stp"), ("All Files", "*.*")],
+            filetypes=[("STL Files", "*.stl"), ("OBJ Files", "*.obj"), ("Compressed Geometry", "*.stl.gz *.obj.gz *.zip"), ("STEP Files", "*.stp"), ("All Files", "*.*")],
             initialdir=os.path.dirname(self.selected_file_path) if self.selected_file_path else None
         )
             
@@ -807,10 +857,24 @@ class Splash:
             self.generate_cad_visual()
            
             # Copy and rename the geometry file
-            geometry_filename = f"CAD.{file_path.split('.')[-1].lower()}"
-            geometry_dest = os.path.join(meshing_folder, geometry_filename)
-            self.geometry_dest_path = os.path.join(geometry_dest.split('CAD')[0])
-            shutil.copyfile(self.selected_file_path, geometry_dest)
+            if file_path.lower().endswith(COMPRESSED_SUFFIXES):
+                # Compressed geometry is decoded in one streamed pass (kept in the session cache) and staged as STL
+                geometry_filename = "CAD.stl"
+                geometry_dest = os.path.join(meshing_folder, geometry_filename)
+                self.geometry_dest_path = os.path.join(geometry_dest.split('CAD')[0])
+                facets, solids = session_geometry_cache().solids(self.selected_file_path)
+                if len(solids) > 1:
+                    # Named solids (zip members, OBJ groups) become the patches meshDict renames
+                    write_solids(geometry_dest, facets, solids)
+                else:
+                    write_binary_stl(geometry_dest, facets)
+            else:
+                geometry_filename = f"CAD.{file_path.split('.')[-1].lower()}"
+                geometry_dest = os.path.join(meshing_folder, geometry_filename)
+                self.geometry_dest_path = os.path.join(geometry_dest.split('CAD')[0])
+                shutil.copyfile(self.selected_file_path, geometry_dest)
+                # The staged copy reuses whatever was already parsed for the original file
+                session_geometry_cache().share(self.selected_file_path, geometry_dest)
 
             # Find the path to the directory just before "Resources"
             current_path = os.getcwd()
@@ -828,8 +892,13 @@ class Splash:
             # Create a popup to ask the user whether to open the CAD file in FreeCAD, Gmsh, or ParaView
             popup = tk.Toplevel(self.root)
             popup.title("Choose CAD Viewer")
-            popup.geometry("400x750")
+            popup.geometry("400x950")
             popup.configure(bg="white")
+
+            # Geometry preview, filled in once the off-screen thumbnail is ready
+            preview_label = tk.Label(popup, text="Rendering preview ...", bg="white")
+            preview_label.pack(side=tk.TOP, pady=5)
+            self.show_geometry_preview(self.selected_file_path, preview_label)
             
             # --------- Toggle for processing the imported CAD file ----------->
             # Add a toggle button at the bottom of the popup
@@ -839,7 +908,11 @@ class Splash:
                 if not self.toggle_on:
                     frame_toggle_button.config(bg="lightblue")
                     # Process the STL file when toggle is on.. 
-                    self.stl_processor.process_stl(self.selected_file_path)
+                    self.stl_processor.process_stl_async(
+                        self.selected_file_path,
+                        on_progress=self.update_stl_progress,
+                        on_complete=self.finish_stl_progress,
+                        on_error=self.fail_stl_progress)
                 else:
                     frame_toggle_button.config(bg="white")
                 self.toggle_on = not self.toggle_on
@@ -1002,13 +1075,21 @@ class Splash:
    # ------------------------------------- Importing the geometry -------------------------------------<    
         
     def visualize_stl(self, file_path):
-        # Read the STL file
-        reader = vtk.vtkSTLReader()
-        reader.SetFileName(file_path)
+        # The surface (from the memory-mapped facets) and its decimated levels of detail are
+        # built in a background thread; the viewer opens through root.after once they are ready
+        self.status_label.config(text=f"Loading {os.path.basename(file_path)} ...")
+        load_lod_levels_async(
+            file_path,
+            on_complete=lambda polydata, lod_levels: self.root.after(0, self.show_stl_viewer, polydata, lod_levels),
+            on_error=lambda error: self.root.after(0, messagebox.showerror, "Visualization Error", str(error)),
+            progress=lambda message: self.root.after(0, lambda: self.status_label.config(text=message)))
+
+    def show_stl_viewer(self, polydata, lod_levels):
+        self.status_label.config(text="")
 
         # Create a mapper
         mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputConnection(reader.GetOutputPort())
+        mapper.SetInputData(polydata)
 
         # Create an actor
         actor = vtk.vtkActor()
@@ -1020,6 +1101,11 @@ class Splash:
         render_window.AddRenderer(renderer)
         interactor = vtk.vtkRenderWindowInteractor()
         interactor.SetRenderWindow(render_window)
+        interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+
+        # Large surfaces: decimated levels (cached on disk) are shown while the camera moves
+        if lod_levels:
+            attach_lod_switching(interactor, renderer, mapper, polydata, lod_levels)
 
         # Add the actor to the scene
         renderer.AddActor(actor)
@@ -1038,10 +1124,10 @@ class Splash:
             return
 
         # Visualize the imported STL file using the existing functionality
-        if self.selected_file_path.lower().endswith(".stl"):
+        if is_geometry_file(self.selected_file_path):
             self.visualize_stl(self.selected_file_path)
         else:
-            tk.messagebox.showerror("Error", "Splash Visualizer currently supports only STL files.")
+            tk.messagebox.showerror("Error", "Splash Visualizer currently supports only STL and OBJ files (optionally gzipped or zipped).")
 
 # -------------------------------- Mesh Construction ------------------------------>
     def create_mesh(self):
@@ -1083,17 +1169,17 @@ class Splash:
                     shutil.copytree(source_system_directory, dest_system_directory)
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to copy 'system' directory: {e}")
+                session_dictionary_cache().invalidate(dest_system_directory)
 
             # Read the content of the "meshDict" file
             self.mesh_dict_file_path = os.path.join(self.geometry_dest_path, "system", "meshDict")
 
             try:
-                with open(self.mesh_dict_file_path, "r") as mesh_dict_file:
-                    file_content = mesh_dict_file.read()
-                    self.selected_mesh_file_content = file_content
+                mesh_dict = session_dictionary_cache().get(self.mesh_dict_file_path)
+                self.selected_mesh_file_content = mesh_dict.source
 
-                old_values_mesh = {param: match.group(1) for param in self.mesh_params
-                                   for match in re.finditer(f'{param}\s+(\S+)(;|;//.*)', file_content)}
+                # First definition of each parameter (global settings precede per-patch overrides)
+                old_values_mesh = mesh_dict.values(self.mesh_params)
 
                 # Open a popup to replace mesh parameters
                 self.open_replace_mesh_parameters_popup(old_values_mesh)
@@ -1372,9 +1458,11 @@ _____________________________________________________
                     self.text_box.update_idletasks()  # Update_idletasks() 
                     
                     try:
-                        subprocess.run(mesh_script_path, shell=True, check=True, cwd=self.selected_directory)
+                        # The mesh script extracts the feature edges after its clean step, with feature_edges.py from here
+                        mesh_env = dict(os.environ, SPLASH_SOURCE_DIR=os.path.dirname(os.path.abspath(__file__)))
+                        subprocess.run(mesh_script_path, shell=True, check=True, cwd=self.selected_directory, env=mesh_env)
                         self.status_label.config(text="Meshing completed successfully!", foreground="green")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, OSError, ValueError) as e:
                         self.status_label.config(text=f"Error executing meshing script: {e}", foreground="red")
                         return  # Stop execution if meshing fails
 
@@ -1519,13 +1607,7 @@ _____________________________________________________
     def read_simulation_setup_existing_values(self, directory, file_name, param_list):
         file_path = os.path.join(self.selected_file_path, directory, file_name)
         try:
-            with open(file_path, "r") as file:
-                file_content = file.read()
-                existing_values = {
-                    param: match.group(1).strip() for param in param_list
-                    for match in re.finditer(f'{param}[ \\t]+([^;]+?)(;|[ \\t]*//.*)', file_content)
-                }
-            
+            existing_values = session_dictionary_cache().get(file_path).values(param_list)
             return existing_values
         except FileNotFoundError:
             #tk.messagebox.showerror("Error", f"File not found - {file_path}")
@@ -1578,13 +1660,9 @@ _____________________________________________________
         self.control_dict_file_path = os.path.join(self.selected_file_path, "system", "controlDict")
 
         try:
-            with open(self.control_dict_file_path, "r") as control_dict_file:
-                file_content = control_dict_file.read()
-                self.selected_control_file_content = file_content
-                existing_values_control_dict = {
-                    param: match.group(1) for param in self.control_dict_params
-                    for match in re.finditer(f'{param}\\s+([^;]+)(;|;//.*)', file_content)
-                }
+            control_dict = session_dictionary_cache().get(self.control_dict_file_path)
+            self.selected_control_file_content = control_dict.source
+            existing_values_control_dict = control_dict.values(self.control_dict_params)
 
             # Open a popup to replace controlDict parameters
             self.open_replace_control_dict_parameters_popup(existing_values_control_dict)
@@ -1609,9 +1687,10 @@ _____________________________________________________
             tk.messagebox.showerror("Error", "No case was identified. Please make sure your case is loaded properly.")
             return
 
-        # FLAG! In case the controlDict still has more than 1 instance of "writeNow"
+        # FLAG! In case the controlDict is still set to "writeNow" by a previous stop
         control_dict_path = os.path.join(self.selected_file_path, "system", "controlDict")
-        self.replace_write_now_with_end_time(control_dict_path)
+        if os.path.exists(control_dict_path):
+            self.replace_write_now_with_end_time(control_dict_path)
                 
         if not self.simulation_running:
             #self.simulation_thread = threading.Thread(target=self.run_openfoam_simulation)
@@ -1710,11 +1789,14 @@ _____________________________________________________
         control_dict_path = os.path.join(self.selected_file_path, "system", "controlDict")  # FLAG! Duplication..
         if os.path.exists(control_dict_path):
             try:
-                subprocess.run(["sed", "-i", '0,/endTime/s//writeNow/', control_dict_path], check=True)
+                # The solver writes the current time step and exits once it sees stopAt writeNow
+                control_dict = session_dictionary_cache().edit(control_dict_path)
+                control_dict.set("stopAt", "writeNow")
+                session_dictionary_cache().write(control_dict)
                 print(control_dict_path) # FLAG! DEBUGGING        
                 tk.messagebox.showinfo("Stop Simulation", "Simulation stopped successfully.")
-            except subprocess.CalledProcessError as e:
-                tk.messagebox.showerror("Error", f"Error stopping simulation: {e.stderr}")
+            except (OSError, KeyError, ValueError) as e:
+                tk.messagebox.showerror("Error", f"Error stopping simulation: {e}")
         else:
             tk.messagebox.showerror("Error", "controlDict file not found!")
 
@@ -1728,7 +1810,12 @@ _____________________________________________________
 
     
     def replace_write_now_with_end_time(self, control_dict_path):
-        subprocess.run(["sed", "-i", 's/writeNow/endTime/g', control_dict_path], check=True)
+        # Checked against the cached controlDict; the file is only rewritten when a stop left writeNow behind
+        cache = session_dictionary_cache()
+        if cache.get(control_dict_path).get("stopAt") == "writeNow":
+            control_dict = cache.edit(control_dict_path)
+            control_dict.set("stopAt", "endTime")
+            cache.write(control_dict)
                 
     def start_progress_bar(self):
         self.root.after(100, self.update_progress)
@@ -0,0 +1,341 @@
+import numpy as np
+
+# Importing local modules
+from GeometryCache import session_geometry_cache
+
+# ---------------------------------------------------------------------------
+# Bounding-volume hierarchy over an (n, 3, 3) triangle array.
+# Triangles are sorted along a Morton curve and packed into fixed-size leaves;
+# the tree above them is implicit (node i has children 2i and 2i+1 one level
+# down), so building it is a sort plus a few reduceat calls. Queries are
+# batched: every (query, node) pair still alive at one level is tested in a
+# single vectorized step, so Python only loops over tree levels.
+# Nearest-point queries first take a bound from the leaves next to the query
+# on the Morton curve (plus a narrow nearest-box-first descent for points
+# away from the surface), so the full descent prunes on the squared box
+# distance from the top; the leaves left are visited nearest box first.
+# The boxes used there are aligned with each node's principal normal, which
+# on tilted patches are much thinner than the axis-aligned ones.
+# ---------------------------------------------------------------------------
+
+LEAF_SIZE = 8
+QUERY_BATCH = 4096  # Queries traversed together; bounds the (query, node) pair arrays
+SEED_LEAVES = 1  # Leaves on each side of a query's Morton position that seed its nearest-point bound
+SEED_BEAM = 4  # Nearest boxes per query kept at each level of the seeding descent
+SEED_RADIUS_LEAVES = 4  # Queries farther than this many leaf diagonals from their Morton seed also take the descent
+ORIENTED_MAX_TRIANGLES = 1024  # Largest nodes that get a normal-aligned box for distance queries
+
+# Slightly skewed directions so inside-test rays do not run along axis-aligned edges
+INSIDE_RAY_DIRECTIONS = np.array([
+    [1.0, 0.0137, 0.0071],
+    [-0.0093, 1.0, 0.0211],
+    [0.0167, -0.0059, 1.0],
+])
+
+def _spread_bits(values):
+    # Insert two zero bits between each of the lower 21 bits (for 3-D Morton codes)
+    values = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for shift, mask in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF), (8, 0x100F00F00F00F00F),
+                        (4, 0x10C30C30C30C30C3), (2, 0x1249249249249249)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+def morton_codes(points, lower, upper):
+    scale = (2 ** 21 - 1) / np.maximum(upper - lower, 1e-300)
+    cells = ((points - lower) * scale).astype(np.uint64)
+    return _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << np.uint64(1)) | (_spread_bits(cells[:, 2]) << np.uint64(2))
+
+def closest_points_on_triangles(points, a, b, c):
+    """Closest point on each triangle (a[i], b[i], c[i]) to points[i] (Ericson's region tests)."""
+    ab, ac, ap = b - a, c - a, points - a
+    d1, d2 = np.einsum('ij,ij->i', ab, ap), np.einsum('ij,ij->i', ac, ap)
+    bp = points - b
+    d3, d4 = np.einsum('ij,ij->i', ab, bp), np.einsum('ij,ij->i', ac, bp)
+    cp = points - c
+    d5, d6 = np.einsum('ij,ij->i', ab, cp), np.einsum('ij,ij->i', ac, cp)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Face interior by default, then overwrite with edge and vertex regions
+        denominator = va + vb + vc
+        v, w = vb / denominator, vc / denominator
+        result = a + ab * v[:, None] + ac * w[:, None]
+
+        edge_bc = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+        t = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        result = np.where(edge_bc[:, None], b + (c - b) * t[:, None], result)
+        edge_ac = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        t = d2 / (d2 - d6)
+        result = np.where(edge_ac[:, None], a + ac * t[:, None], result)
+        edge_ab = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        t = d1 / (d1 - d3)
+        result = np.where(edge_ab[:, None], a + ab * t[:, None], result)
+
+    result = np.where(((d6 >= 0) & (d5 <= d6))[:, None], c, result)
+    result = np.where(((d3 >= 0) & (d4 <= d3))[:, None], b, result)
+    result = np.where(((d1 <= 0) & (d2 <= 0))[:, None], a, result)
+    # Collapsed triangles fall back to their first corner
+    return np.where(np.isfinite(result), result, a)
+
+def ray_triangle_hits(origins, directions, a, b, c):
+    """Möller–Trumbore: hit distance t per (ray, triangle) pair, inf where there is no hit."""
+    edge1, edge2 = b - a, c - a
+    p = np.cross(directions, edge2)
+    determinant = np.einsum('ij,ij->i', edge1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / determinant
+        s = origins - a
+        u = np.einsum('ij,ij->i', s, p) * inverse
+        q = np.cross(s, edge1)
+        v = np.einsum('ij,ij->i', directions, q) * inverse
+        t = np.einsum('ij,ij->i', edge2, q) * inverse
+        hit = (np.abs(determinant) > 1e-300) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+    return np.where(hit, t, np.inf)
+
+class TriangleBVH:
+    def __init__(self, triangles, leaf_size=LEAF_SIZE):
+        triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        if not len(triangles):
+            raise ValueError("Cannot build a BVH without triangles")
+        self.leaf_size = leaf_size
+
+        # Morton order keeps spatially close triangles in the same leaf
+        centroids = triangles.mean(axis=1)
+        self.centroid_bounds = centroids.min(axis=0), centroids.max(axis=0)
+        codes = morton_codes(centroids, *self.centroid_bounds)
+        self.order = np.argsort(codes, kind="stable")
+        self.codes = codes[self.order]
+        self.triangles = triangles[self.order]
+        self.triangle_count = len(triangles)
+        # Bounding sphere per triangle (centroid, farthest corner): a cheap test before the exact one
+        self.sphere_centers = self.triangles.mean(axis=1)
+        self.sphere_radii = np.sqrt(np.max(np.sum((self.triangles - self.sphere_centers[:, None]) ** 2, axis=2), axis=1))
+
+        # Level 0 holds the leaf boxes; each higher level merges pairs of boxes
+        starts = np.arange(0, self.triangle_count, leaf_size)
+        lower = np.minimum.reduceat(self.triangles.min(axis=1), starts)
+        upper = np.maximum.reduceat(self.triangles.max(axis=1), starts)
+        self.levels = [(lower, upper)]
+        while len(lower) > 1:
+            if len(lower) % 2:
+                lower, upper = np.vstack([lower, lower[-1:]]), np.vstack([upper, upper[-1:]])
+            lower = np.minimum(lower[0::2], lower[1::2])
+            upper = np.maximum(upper[0::2], upper[1::2])
+            self.levels.append((lower, upper))
+
+        # A seed bound above a few leaf sizes is worth tightening before the full descent
+        self.seed_radius = SEED_RADIUS_LEAVES * np.median(np.linalg.norm(self.levels[0][1] - self.levels[0][0], axis=1))
+
+        # Distance queries use boxes aligned with each node's principal normal instead: on a tilted
+        # patch they are far thinner than the axis-aligned ones, so much less of the tree is reached.
+        # The sign-free normal spread of a node gives its frame (rows, normal last); large nodes
+        # span too many directions to gain from it and keep their axis-aligned box
+        normals = np.cross(self.triangles[:, 1] - self.triangles[:, 0], self.triangles[:, 2] - self.triangles[:, 0])
+        spread = np.einsum('ti,tj->tij', normals, normals)
+        self.oriented_levels = []
+        for level, (lower, upper) in enumerate(self.levels):
+            node_size = leaf_size << level
+            if node_size > ORIENTED_MAX_TRIANGLES:
+                self.oriented_levels.append((np.broadcast_to(np.eye(3), (len(lower), 3, 3)), lower, upper))
+                continue
+            frames = np.linalg.eigh(np.add.reduceat(spread, np.arange(0, self.triangle_count, node_size))
+                                    + 1e-300 * np.eye(3))[1].transpose(0, 2, 1)
+            # Pad with copies of the last triangle so every node is one block of vertices
+            padding = -self.triangle_count % node_size
+            vertices = np.concatenate([self.triangles, np.repeat(self.triangles[-1:], padding, axis=0)])
+            local = np.matmul(frames, vertices.reshape(len(frames), node_size * 3, 3).transpose(0, 2, 1))
+            self.oriented_levels.append((frames, local.min(axis=2), local.max(axis=2)))
+
+    @classmethod
+    def from_file(cls, filename):
+        """BVH for an STL file, kept in the session geometry cache while the file is unchanged."""
+        cache = session_geometry_cache()
+        return cache.get(filename, "bvh", lambda: cls(cache.triangles(filename)))
+
+    # ---------------------------- Traversal ------------------------------
+    def _children(self, queries, nodes, level):
+        # Expand (query, node) pairs at `level` into pairs with the children one level down
+        size = len(self.levels[level - 1][0])
+        queries, nodes = np.repeat(queries, 2), np.repeat(nodes * 2, 2)
+        nodes[1::2] += 1
+        keep = nodes < size
+        return queries[keep], nodes[keep]
+
+    def _leaf_triangles(self, queries, leaves):
+        # Expand (query, leaf) pairs into (query, sorted triangle index) pairs
+        queries = np.repeat(queries, self.leaf_size)
+        triangles = (np.repeat(leaves, self.leaf_size) * self.leaf_size
+                     + np.tile(np.arange(self.leaf_size), len(leaves)))
+        keep = triangles < self.triangle_count
+        return queries[keep], triangles[keep]
+
+    def _batches(self, count):
+        for start in range(0, count, QUERY_BATCH):
+            yield start, min(start + QUERY_BATCH, count)
+
+    def _oriented_distance(self, points, level, nodes):
+        # Squared distance to the oriented node boxes: a lower bound for every triangle inside them
+        frames, lower, upper = self.oriented_levels[level]
+        local = np.einsum('pij,pj->pi', frames[nodes], points)
+        return np.sum((local - np.clip(local, lower[nodes], upper[nodes])) ** 2, axis=1)
+
+    @staticmethod
+    def _nearest_first(queries, nodes, near):
+        # Sort (query, node) pairs by query, then box distance -> sorted arrays plus each pair's rank within its query
+        order = np.lexsort((near, queries))
+        queries, nodes, near = queries[order], nodes[order], near[order]
+        starts = np.r_[0, np.flatnonzero(queries[1:] != queries[:-1]) + 1] if len(queries) else queries
+        rank = np.arange(len(queries)) - np.repeat(starts, np.diff(np.r_[starts, len(queries)]))
+        return queries, nodes, near, rank
+
+    def _morton_leaves(self, points):
+        # (query, leaf) pairs for the leaves around each query's position on the Morton curve
+        lower, upper = self.centroid_bounds
+        positions = np.searchsorted(self.codes, morton_codes(np.clip(points, lower, upper), lower, upper))
+        leaves = np.minimum(positions, self.triangle_count - 1) // self.leaf_size
+        leaves = np.clip(leaves[:, None] + np.arange(-SEED_LEAVES, SEED_LEAVES + 1), 0, len(self.levels[0][0]) - 1)
+        return np.repeat(np.arange(len(points)), leaves.shape[1]), leaves.ravel()
+
+    def _beam_leaves(self, points, queries):
+        # (query, leaf) pairs a descent keeping only the SEED_BEAM nearest boxes per query ends in
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        for level in range(len(self.levels) - 1, 0, -1):
+            queries, nodes = self._children(queries, nodes, level)
+            near = self._oriented_distance(points[queries], level - 1, nodes)
+            queries, nodes, near, rank = self._nearest_first(queries, nodes, near)
+            queries, nodes = queries[rank < SEED_BEAM], nodes[rank < SEED_BEAM]
+        return queries, nodes
+
+    def _leaf_candidates(self, points, queries, leaves, bound=None):
+        # Exact closest points for the triangles of the given (query, leaf) pairs; with a per-query
+        # squared-distance ``bound``, triangles whose bounding sphere lies beyond it are skipped first
+        queries, sorted_ids = self._leaf_triangles(queries, leaves)
+        if bound is not None:
+            gap = np.maximum(np.linalg.norm(points[queries] - self.sphere_centers[sorted_ids], axis=1)
+                             - self.sphere_radii[sorted_ids], 0.0)
+            keep = gap * gap < bound[queries]
+            queries, sorted_ids = queries[keep], sorted_ids[keep]
+        candidates = self.triangles[sorted_ids]
+        points_on = closest_points_on_triangles(points[queries], candidates[:, 0], candidates[:, 1], candidates[:, 2])
+        squared = np.sum((points_on - points[queries]) ** 2, axis=1)
+        return queries, sorted_ids, points_on, squared
+
+    @staticmethod
+    def _keep_best(best, queries, sorted_ids, points_on, squared):
+        # Fold (query, triangle) candidates into the per-query best (squared distance, sorted index, point)
+        best_squared, best_ids, best_points = best
+        order = np.lexsort((squared, queries))
+        first = order[np.r_[True, queries[order][1:] != queries[order][:-1]]] if len(order) else order
+        first = first[squared[first] < best_squared[queries[first]]]
+        best_squared[queries[first]] = squared[first]
+        best_ids[queries[first]] = sorted_ids[first]
+        best_points[queries[first]] = points_on[first]
+
+    # ------------------------------ Queries ------------------------------
+    def nearest(self, points):
+        """Nearest surface point per query -> (distances, triangle indices, closest points)."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        distances = np.empty(len(points))
+        triangle_ids = np.empty(len(points), dtype=np.int64)
+        closest = np.empty((len(points), 3))
+        for start, stop in self._batches(len(points)):
+            batch = points[start:stop]
+            best = (np.full(len(batch), np.inf), np.zeros(len(batch), dtype=np.int64), np.empty((len(batch), 3)))
+            best_squared = best[0]
+
+            # The leaves next to each query on the Morton curve hold or neighbour its nearest triangle
+            # when the query lies among the geometry; queries left with a loose bound (away from the
+            # surface) also take the leaves a narrow nearest-box-first descent ends in
+            self._keep_best(best, *self._leaf_candidates(batch, *self._morton_leaves(batch)))
+            loose = np.flatnonzero(best_squared > self.seed_radius ** 2)
+            if len(loose):
+                self._keep_best(best, *self._leaf_candidates(batch, *self._beam_leaves(batch, loose), best_squared))
+
+            # Descend, dropping every box farther away than the best triangle so far
+            queries, nodes = np.arange(len(batch)), np.zeros(len(batch), dtype=np.int64)
+            near = np.zeros(len(batch))
+            for level in range(len(self.levels) - 1, 0, -1):
+                queries, nodes = self._children(queries, nodes, level)
+                near = self._oriented_distance(batch[queries], level - 1, nodes)
+                keep = near < best_squared[queries]
+                queries, nodes, near = queries[keep], nodes[keep], near[keep]
+
+            # Visit the surviving leaves nearest box first, in rounds of doubling size,
+            # pruning what is left against the bound each round leaves behind
+            queries, nodes, near, rank = self._nearest_first(queries, nodes, near)
+            visited, width = 0, 1
+            while len(queries):
+                visit = rank < visited + width
+                self._keep_best(best, *self._leaf_candidates(batch, queries[visit], nodes[visit], best_squared))
+                keep = ~visit
+                keep[keep] = near[keep] < best_squared[queries[keep]]
+                queries, nodes, near, rank = queries[keep], nodes[keep], near[keep], rank[keep]
+                visited, width = visited + width, width * 2
+
+            distances[start:stop] = np.sqrt(best_squared)
+            triangle_ids[start:stop] = self.order[best[1]]
+            closest[start:stop] = best[2]
+        return distances, triangle_ids, closest
+
+    def distance(self, points):
+        return self.nearest(points)[0]
+
+    def _ray_hits(self, origins, directions):
+        # All (ray, original triangle, t) hits for one batch of rays
+        with np.errstate(divide='ignore'):
+            inverse = 1.0 / directions
+        rays = np.arange(len(origins))
+        nodes = np.zeros(len(origins), dtype=np.int64)
+        for level in range(len(self.levels), 0, -1):
+            if level < len(self.levels):
+                rays, nodes = self._children(rays, nodes, level)
+            lower, upper = self.levels[level - 1]
+            # Slab test against the node boxes
+            with np.errstate(invalid='ignore'):
+                t1 = (lower[nodes] - origins[rays]) * inverse[rays]
+                t2 = (upper[nodes] - origins[rays]) * inverse[rays]
+            t1, t2 = np.nan_to_num(t1, nan=-np.inf), np.nan_to_num(t2, nan=np.inf)
+            t_enter = np.max(np.minimum(t1, t2), axis=1)
+            t_exit = np.min(np.maximum(t1, t2), axis=1)
+            keep = (t_exit >= np.maximum(t_enter, 0.0))
+            rays, nodes = rays[keep], nodes[keep]
+
+        rays, sorted_ids = self._leaf_triangles(rays, nodes)
+        candidates = self.triangles[sorted_ids]
+        t = ray_triangle_hits(origins[rays], directions[rays], candidates[:, 0], candidates[:, 1], candidates[:, 2])
+        hit = np.isfinite(t)
+        return rays[hit], sorted_ids[hit], t[hit]
+
+    def ray_cast(self, origins, directions):
+        """First hit along each ray -> (distance along the direction, triangle index); inf/-1 on a miss."""
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.broadcast_to(np.asarray(directions, dtype=np.float64), origins.shape)
+        hit_t = np.full(len(origins), np.inf)
+        hit_ids = np.full(len(origins), -1, dtype=np.int64)
+        for start, stop in self._batches(len(origins)):
+            rays, sorted_ids, t = self._ray_hits(origins[start:stop], directions[start:stop])
+            order = np.lexsort((t, rays))
+            first = order[np.r_[True, rays[order][1:] != rays[order][:-1]]] if len(order) else order
+            hit_t[start:stop][rays[first]] = t[first]
+            hit_ids[start:stop][rays[first]] = self.order[sorted_ids[first]]
+        return hit_t, hit_ids
+
+    def contains(self, points):
+        """Inside test for a closed surface: majority vote of the crossing parity of three rays.
+
+        Points outside the root box need no ray, and the third ray is only cast
+        where the first two disagree.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        votes = np.zeros(len(points), dtype=np.int64)
+        lower, upper = self.levels[-1][0][0], self.levels[-1][1][0]
+        pending = np.flatnonzero(np.all((points >= lower) & (points <= upper), axis=1))
+        for count, direction in enumerate(INSIDE_RAY_DIRECTIONS):
+            if count == 2:
+                pending = pending[votes[pending] == 1]
+            direction = direction / np.linalg.norm(direction)
+            for start, stop in self._batches(len(pending)):
+                chunk = pending[start:stop]
+                rays, _, _ = self._ray_hits(points[chunk], np.broadcast_to(direction, (len(chunk), 3)))
+                votes[chunk] += np.bincount(rays, minlength=len(chunk)) % 2
+        return votes >= 2
@@ -0,0 +1,241 @@
+import os
+import sys
+import csv
+import json
+import shutil
+import argparse
+import itertools
+import numpy as np
+
+# Importing local modules
+from FoamDictionary import Entry, write_temporary
+from DictionaryCache import session_dictionary_cache
+from stl_io import GEOMETRY_SUFFIXES
+
+# ---------------------------------------------------------------------------
+# Parametric case generator for design-of-experiments sweeps.
+# A JSON spec names dictionary entries as "file:key" (the key is a dotted
+# path, or a keyword whose every occurrence is edited, as in the Splash
+# popups) and gives each one a list of values or a range:
+#
+#   {"method": "lhs", "samples": 50, "seed": 1,
+#    "parameters": {
+#      "system/meshDict:maxCellSize": [0.1, 0.2, 0.4],
+#      "system/meshDict:boundaryLayers.nLayers": {"min": 2, "max": 6, "integer": true},
+#      "constant/transportProperties:nu": {"min": 1e-6, "max": 1e-4, "log": true},
+#      "0/U:boundaryField.inlet.value": {"min": 5, "max": 20, "format": "uniform ({} 0 0)"}}}
+#
+#   python case_sweep.py base_case sweep.json -o sweeps/
+#
+# Each base dictionary is parsed once; a variant only re-splices the edited
+# values into its text. Only read-only inputs are shared: the surface
+# geometry in constant/triSurface (constant/geometry in newer OpenFOAM) is
+# hard-linked into every variant, so 200 variants take seconds and little
+# disk. Everything the tools of a run write into, polyMesh, feature edge files
+# and all dictionaries included, is copied, because blockMesh, snappyHexMesh
+# -overwrite, cartesianMesh and surfaceFeatureExtract truncate their output
+# files in place and would otherwise rewrite the base case and every sibling.
+# When a swept parameter lives in a mesh dictionary nothing is linked at all.
+# ---------------------------------------------------------------------------
+
+LINKED_DIRECTORIES = (os.path.join("constant", "triSurface"), os.path.join("constant", "geometry"))
+LINKED_SUFFIXES = GEOMETRY_SUFFIXES  # Surfaces only; .eMesh/.fms files next to them are regenerated by meshing
+MESH_DICTIONARIES = ("blockMeshDict", "snappyHexMeshDict", "meshDict", "surfaceFeatureExtractDict", "surfaceFeaturesDict")
+MANIFEST_NAME = "sweep.csv"
+
+def _is_result_directory(name):
+    # Time directories other than 0/, decomposed processors and function object output belong to a run
+    if name.startswith("processor") or name == "postProcessing":
+        return True
+    try:
+        return float(name) != 0
+    except ValueError:
+        return False
+
+def format_number(value):
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.6g}"
+    return str(value)
+
+class SweepParameter:
+    """One swept entry: 'file:key' plus a list of values or a [min, max] range."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.file, separator, self.key = name.partition(":")
+        if not separator or not self.key:
+            raise ValueError(f"Parameter '{name}' must be written as 'file:key'")
+        spec = {"values": spec} if isinstance(spec, list) else dict(spec)
+        self.values = spec.get("values")
+        self.minimum, self.maximum = spec.get("min"), spec.get("max")
+        self.levels = spec.get("levels")
+        self.log = spec.get("log", False)
+        self.integer = spec.get("integer", False)
+        self.template = spec.get("format", "{}")
+        if self.values is None and (self.minimum is None or self.maximum is None):
+            raise ValueError(f"Parameter '{name}' needs a list of values or min and max")
+        if self.log and self.values is None and min(self.minimum, self.maximum) <= 0:
+            raise ValueError(f"Parameter '{name}' needs a positive range for log sampling")
+
+    def _from_unit(self, units):
+        # Map [0, 1) onto the range (linearly or in log space)
+        units = np.asarray(units, dtype=np.float64)
+        if self.log:
+            values = np.exp(np.log(self.minimum) + units * (np.log(self.maximum) - np.log(self.minimum)))
+        else:
+            values = self.minimum + units * (self.maximum - self.minimum)
+        return np.rint(values).astype(np.int64) if self.integer else values
+
+    def grid_values(self):
+        """Levels of a full-factorial grid: the value list, or 'levels' points spanning the range."""
+        if self.values is not None:
+            return list(self.values)
+        if not self.levels:
+            raise ValueError(f"Parameter '{self.name}' needs 'levels' for a grid sweep")
+        return list(dict.fromkeys(self._from_unit(np.linspace(0.0, 1.0, self.levels)).tolist()))
+
+    def sample(self, units):
+        """Values at unit-interval positions (a value list is split into equal strata)."""
+        if self.values is not None:
+            indices = np.minimum((np.asarray(units) * len(self.values)).astype(np.int64), len(self.values) - 1)
+            return [self.values[index] for index in indices]
+        return self._from_unit(units).tolist()
+
+    def format(self, value):
+        return self.template.format(format_number(value))
+
+def grid_design(parameters):
+    """Full-factorial design: every combination of every parameter's levels."""
+    return [list(values) for values in itertools.product(*(parameter.grid_values() for parameter in parameters))]
+
+def latin_hypercube(parameters, samples, seed=None):
+    """``samples`` variants, each parameter's range cut into ``samples`` strata with one value per stratum."""
+    generator = np.random.default_rng(seed)
+    columns = []
+    for parameter in parameters:
+        units = (generator.permutation(samples) + generator.random(samples)) / samples
+        columns.append(parameter.sample(units))
+    return [list(values) for values in zip(*columns)]
+
+def load_spec(filename):
+    """(parameters, design) from a JSON sweep spec."""
+    with open(filename, "r") as spec_file:
+        spec = json.load(spec_file)
+    parameters = [SweepParameter(name, value) for name, value in spec["parameters"].items()]
+    method = spec.get("method", "grid").lower()
+    if method == "grid":
+        design = grid_design(parameters)
+    elif method in ("lhs", "latin_hypercube"):
+        design = latin_hypercube(parameters, int(spec["samples"]), spec.get("seed"))
+    else:
+        raise ValueError(f"Unknown sweep method '{method}' (use 'grid' or 'lhs')")
+    return parameters, design
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Other file system, or links not supported
+        shutil.copy2(source, destination)
+
+def _materialize(base_case, case_dir, edited, link_dirs, output_dir):
+    # Recreate the case tree: linked directories by hard link, everything else by copy; edited files are written later
+    for root, dirs, files in os.walk(base_case):
+        relative = os.path.relpath(root, base_case)
+        if relative == ".":
+            dirs[:] = [name for name in dirs if not _is_result_directory(name)]
+        # Never copy the sweep into itself when the output lives inside the base case
+        dirs[:] = [name for name in dirs if os.path.join(root, name) != output_dir]
+        target = os.path.normpath(os.path.join(case_dir, relative))
+        os.makedirs(target, exist_ok=True)
+        linked = any(relative == directory or relative.startswith(directory + os.sep) for directory in link_dirs)
+        for name in files:
+            source = os.path.join(root, name)
+            destination = os.path.join(target, name)
+            if os.path.normpath(os.path.join(relative, name)) in edited:
+                continue
+            if os.path.islink(source):
+                os.symlink(os.readlink(source), destination)
+            elif linked and name.lower().endswith(LINKED_SUFFIXES):
+                _link_or_copy(source, destination)
+            else:
+                shutil.copy2(source, destination)
+
+def sweeps_mesh(parameters):
+    """True when a swept parameter lives in a mesh dictionary, i.e. every variant is remeshed."""
+    return any(os.path.basename(parameter.file) in MESH_DICTIONARIES for parameter in parameters)
+
+def generate_sweep(base_case, parameters, design, output_dir, prefix=None, link_dirs=LINKED_DIRECTORIES, overwrite=False):
+    """Write one case directory per design row -> list of case directories (plus a sweep.csv manifest)."""
+    if sweeps_mesh(parameters):
+        # Remeshing variants must not share a single file with the base case
+        link_dirs = ()
+    base_case = os.path.abspath(base_case)
+    output_dir = os.path.abspath(output_dir)
+    prefix = prefix or os.path.basename(base_case)
+    cache = session_dictionary_cache()
+
+    # Parse every edited dictionary once and resolve each key before anything is written
+    documents, targets = {}, []
+    for parameter in parameters:
+        file = os.path.normpath(parameter.file)
+        if file not in documents:
+            documents[file] = cache.edit(os.path.join(base_case, file))
+        document = documents[file]
+        node = document.lookup(parameter.key)
+        nodes = [node] if node is not None else document.find_all(parameter.key)
+        if not nodes or not all(isinstance(node, Entry) for node in nodes):
+            raise KeyError(f"'{parameter.key}' is not a value entry of {file}")
+        targets.append((document, nodes))
+
+    width = len(str(max(len(design) - 1, 1)))
+    case_dirs = [os.path.join(output_dir, f"{prefix}_{index:0{width}d}") for index in range(len(design))]
+    for case_dir in case_dirs:
+        if os.path.exists(case_dir):
+            if not overwrite:
+                raise FileExistsError(f"Sweep case already exists: {case_dir}")
+            shutil.rmtree(case_dir)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", newline="") as manifest_file:
+        writer = csv.writer(manifest_file)
+        writer.writerow(["Case"] + [parameter.name for parameter in parameters])
+        for case_dir, values in zip(case_dirs, design):
+            _materialize(base_case, case_dir, documents, link_dirs, output_dir)
+            formatted = [parameter.format(value) for parameter, value in zip(parameters, values)]
+            for (document, nodes), text in zip(targets, formatted):
+                # The shared document keeps one edit per entry: each variant only re-splices its values
+                for node in nodes:
+                    document.set(node, text)
+            for file, document in documents.items():
+                destination = os.path.join(case_dir, file)
+                os.replace(write_temporary(destination, document.text()), destination)
+                shutil.copymode(document.filename, destination)
+            writer.writerow([os.path.basename(case_dir)] + formatted)
+    return case_dirs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate OpenFOAM case variants for a parameter sweep (grid or Latin hypercube).")
+    parser.add_argument("base_case", help="Case directory to vary")
+    parser.add_argument("spec", help="JSON sweep spec (parameters, method, samples, seed)")
+    parser.add_argument("-o", "--output", default="sweep", help="Directory for the generated cases")
+    parser.add_argument("--prefix", default=None, help="Case name prefix (default: base case name)")
+    parser.add_argument("--copy-constant", action="store_true",
+                        help="Copy the surface geometry instead of hard-linking it (automatic when a mesh dictionary is swept)")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing cases of the same name")
+    args = parser.parse_args(argv)
+
+    parameters, design = load_spec(args.spec)
+    link_dirs = () if args.copy_constant else LINKED_DIRECTORIES
+    case_dirs = generate_sweep(args.base_case, parameters, design, args.output, args.prefix, link_dirs, args.overwrite)
+    if sweeps_mesh(parameters) and link_dirs:
+        print("A mesh dictionary is swept: every case is a full copy (no hard links)")
+    print(f"{len(case_dirs)} cases written to {os.path.abspath(args.output)} (see {MANIFEST_NAME})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
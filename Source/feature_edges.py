@@ -0,0 +1,134 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+
+# Importing local modules
+from stl_topology import file_topology, edge_groups, edge_vertices
+
+# ---------------------------------------------------------------------------
+# Native feature-edge extraction (replaces the surfaceFeatureExtract step).
+# Works on the welded edge table from stl_topology: an edge shared by two
+# facets is a feature edge when their normals differ by more than
+# 180 - includedAngle degrees; open and non-manifold edges can be added too.
+# Output is an OpenFOAM featureEdgeMesh (.eMesh) for snappyHexMesh, or OBJ.
+# ---------------------------------------------------------------------------
+
+FEATURE_INCLUDED_ANGLE = 170  # Same default as the old surfaceFeatureExtractDict
+
+EMESH_HEADER = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     | Website:  https://openfoam.org
+    \\\\  /    A nd           | Version:  Splash v0.2
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{{
+    version     2.0;
+    format      ascii;
+    class       featureEdgeMesh;
+    location    "constant/triSurface";
+    object      {object};
+}}
+"""
+
+def extract_feature_edges(triangles, topology, included_angle=FEATURE_INCLUDED_ANGLE, open_edges=True, non_manifold_edges=False):
+    """Feature edges of a welded surface -> (points (m, 3), edges (k, 2) indices into points)."""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    vertex_ids = topology["vertex_ids"]
+    edge_counts = topology["edge_counts"]
+    edge_facets = topology["edge_facets"]
+    order, group_starts = edge_groups(topology)
+
+    # Unit facet normals, from the same corner order the edge table uses
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    feature = np.zeros(len(edge_counts), dtype=bool)
+    manifold = np.flatnonzero(edge_counts == 2)
+    first, second = order[group_starts[manifold]], order[group_starts[manifold] + 1]
+    cosines = np.einsum('ij,ij->i', normals[edge_facets[first]], normals[edge_facets[second]])
+    # Neighbours wound the same way along the edge have one normal flipped
+    flipped = topology["edge_flipped"]
+    cosines = np.where(flipped[first] == flipped[second], -cosines, cosines)
+    feature[manifold] = cosines < np.cos(np.radians(180.0 - included_angle))
+    if open_edges:
+        feature |= edge_counts == 1
+    if non_manifold_edges:
+        feature |= edge_counts > 2
+
+    starts, ends = edge_vertices(topology, order[group_starts[feature]])
+
+    # Welded vertex coordinates, compacted to the vertices the feature edges use
+    positions = np.empty((topology["vertex_count"], 3))
+    positions[vertex_ids.reshape(-1)] = triangles.reshape(-1, 3)
+    used, edges = np.unique(np.r_[starts, ends], return_inverse=True)
+    return positions[used], edges.reshape(2, -1).T
+
+def write_emesh(filename, points, edges):
+    with open(filename, "w") as emesh_file:
+        emesh_file.write(EMESH_HEADER.format(object=os.path.basename(filename)))
+        emesh_file.write(f"\n// points\n{len(points)}\n(\n")
+        emesh_file.writelines(f"({x:.9g} {y:.9g} {z:.9g})\n" for x, y, z in points)
+        emesh_file.write(f")\n\n// edges\n{len(edges)}\n(\n")
+        emesh_file.writelines(f"({a} {b})\n" for a, b in edges)
+        emesh_file.write(")\n")
+    return filename
+
+def write_edge_obj(filename, points, edges):
+    with open(filename, "w") as obj_file:
+        obj_file.writelines(f"v {x:.9g} {y:.9g} {z:.9g}\n" for x, y, z in points)
+        obj_file.writelines(f"l {a + 1} {b + 1}\n" for a, b in edges)
+    return filename
+
+def write_feature_file(stl_file, output_file, included_angle=FEATURE_INCLUDED_ANGLE, open_edges=True, non_manifold_edges=False):
+    """Extract the feature edges of an STL and write them as .eMesh or .obj (by extension)."""
+    # The welded adjacency is cached per file, so repeated meshing iterations skip the rebuild
+    triangles, topology = file_topology(stl_file)
+    points, edges = extract_feature_edges(triangles, topology, included_angle, open_edges, non_manifold_edges)
+    if output_file.lower().endswith(".obj"):
+        return write_edge_obj(output_file, points, edges)
+    return write_emesh(output_file, points, edges)
+
+def write_case_features(case_dir, included_angle=FEATURE_INCLUDED_ANGLE):
+    """Write every .eMesh listed under 'features' in system/snappyHexMeshDict from constant/triSurface."""
+    snappy_dict = os.path.join(case_dir, "system", "snappyHexMeshDict")
+    tri_surface = os.path.join(case_dir, "constant", "triSurface")
+    if not os.path.isfile(snappy_dict):
+        return []
+    with open(snappy_dict, "r") as dict_file:
+        emesh_names = set(re.findall(r'file\s+"([^"]+\.eMesh)"', dict_file.read()))
+
+    written = []
+    for emesh_name in sorted(emesh_names):
+        stl_file = os.path.join(tri_surface, f"{os.path.splitext(emesh_name)[0]}.stl")
+        if os.path.isfile(stl_file):
+            written.append(write_feature_file(stl_file, os.path.join(tri_surface, emesh_name), included_angle))
+        else:
+            print(f"Warning: no surface found for feature file {emesh_name}")
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Feature-edge extraction for snappyHexMesh (.eMesh / .obj).")
+    parser.add_argument("source", help="STL file, or an OpenFOAM case directory")
+    parser.add_argument("-o", "--output", help="Output .eMesh/.obj (STL input only; default <stl>.eMesh)")
+    parser.add_argument("-a", "--included-angle", type=float, default=FEATURE_INCLUDED_ANGLE)
+    parser.add_argument("--no-open-edges", action="store_true", help="Do not add open (boundary) edges")
+    parser.add_argument("--non-manifold-edges", action="store_true", help="Add non-manifold edges")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.source):
+        written = write_case_features(args.source, args.included_angle)
+    else:
+        output_file = args.output or f"{os.path.splitext(args.source)[0]}.eMesh"
+        written = [write_feature_file(args.source, output_file, args.included_angle,
+                                      not args.no_open_edges, args.non_manifold_edges)]
+    for path in written:
+        print(f"Feature edges written: {path}")
+    return 0 if written else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import io
+import os
+import json
+import gzip
+import numpy as np
+
+# Optional back-ends: zstd compression and Parquet array tables
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = parquet = None
+
+# ---------------------------------------------------------------------------
+# Report writers/loaders for STLProcessor.
+# Scalars go to compact JSON; per-facet and per-vertex arrays go to a binary
+# sidecar (NPZ or Parquet). Both can be gzip or zstd compressed. Array keys
+# are grouped by prefix ("facet_...", "vertex_...") so every group has one
+# row per facet or per vertex.
+# ---------------------------------------------------------------------------
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+def _require_zstd():
+    if zstandard is None:
+        raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+
+def _compression_from_path(path):
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return None
+
+def _open_compressed(path, mode, compression):
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        _require_zstd()
+        return zstandard.open(path, mode)
+    if compression is None:
+        return open(path, mode)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+def _report_stem(json_path):
+    # ".../geom_report.json.gz" -> ".../geom_report"
+    path = json_path[:len(json_path) - len(COMPRESSION_SUFFIXES[_compression_from_path(json_path)])]
+    return path[:-len(".json")] if path.endswith(".json") else path
+
+def _group_arrays(arrays):
+    groups = {}
+    for key, values in arrays.items():
+        group = key.split("_", 1)[0]
+        groups.setdefault(group, {})[key] = np.asarray(values)
+    return groups
+
+# -------------------------------- NPZ ---------------------------------------
+def write_npz_arrays(stem, arrays, compression=None):
+    path = f"{stem}_arrays.npz{COMPRESSION_SUFFIXES[compression]}"
+    if compression == "gzip":
+        # NPZ is a zip archive, so use its own deflate instead of wrapping it
+        path = f"{stem}_arrays.npz"
+        np.savez_compressed(path, **arrays)
+    else:
+        with _open_compressed(path, "wb", compression) as array_file:
+            np.savez(array_file, **arrays)
+    return [path]
+
+def read_npz_arrays(paths):
+    arrays = {}
+    for path in paths:
+        compression = _compression_from_path(path)
+        if compression is None:
+            with np.load(path) as npz:
+                arrays.update({key: npz[key] for key in npz.files})
+        else:
+            with _open_compressed(path, "rb", compression) as array_file:
+                with np.load(io.BytesIO(array_file.read())) as npz:
+                    arrays.update({key: npz[key] for key in npz.files})
+    return arrays
+
+# ------------------------------ Parquet -------------------------------------
+def write_parquet_arrays(stem, arrays, compression=None):
+    if parquet is None:
+        raise ImportError("Parquet reports require the 'pyarrow' package (pip install pyarrow)")
+    paths = []
+    for group, group_arrays in _group_arrays(arrays).items():
+        columns = {}
+        for key, values in group_arrays.items():
+            if values.ndim == 1:
+                columns[key] = values
+            else:
+                # Vector columns (normals, positions) are split into key__0, key__1, ...
+                for component in range(values.shape[1]):
+                    columns[f"{key}__{component}"] = values[:, component]
+        path = f"{stem}_{group}.parquet"
+        parquet.write_table(pyarrow.table(columns), path, compression=compression or "none")
+        paths.append(path)
+    return paths
+
+def read_parquet_arrays(paths):
+    if parquet is None:
+        raise ImportError("Parquet reports require the 'pyarrow' package (pip install pyarrow)")
+    arrays = {}
+    for path in paths:
+        table = parquet.read_table(path)
+        vectors = {}
+        for name in table.column_names:
+            values = table.column(name).to_numpy()
+            if "__" in name:
+                key, component = name.rsplit("__", 1)
+                vectors.setdefault(key, {})[int(component)] = values
+            else:
+                arrays[name] = values
+        for key, components in vectors.items():
+            arrays[key] = np.column_stack([components[i] for i in sorted(components)])
+    return arrays
+
+# Pluggable back-ends: name -> (writer, reader)
+ARRAY_FORMATS = {
+    "npz": (write_npz_arrays, read_npz_arrays),
+    "parquet": (write_parquet_arrays, read_parquet_arrays),
+}
+
+def register_array_format(name, writer, reader):
+    # writer(stem, arrays, compression) -> [paths]; reader([paths]) -> {key: array}
+    ARRAY_FORMATS[name] = (writer, reader)
+
+# ------------------------------ Public API ----------------------------------
+def write_report(json_path, report_data, arrays=None, array_format="npz", compression=None):
+    """Write report_data as compact JSON plus an optional binary array sidecar.
+
+    ``json_path`` gets the ".gz"/".zst" suffix of the chosen compression added
+    if it is not already there. Returns the path of the JSON file written.
+    """
+    suffix = COMPRESSION_SUFFIXES[compression]
+    if suffix and not json_path.endswith(suffix):
+        json_path += suffix
+
+    report = dict(report_data)
+    if arrays:
+        writer, _ = ARRAY_FORMATS[array_format]
+        paths = writer(_report_stem(json_path), arrays, compression)
+        report["Arrays"] = {
+            "Format": array_format,
+            "Files": [os.path.basename(path) for path in paths],
+            "Keys": sorted(arrays),
+        }
+
+    with _open_compressed(json_path, "wb", compression) as report_file:
+        report_file.write(json.dumps(report, separators=(",", ":")).encode())
+    return json_path
+
+def load_report(json_path):
+    """Read the scalar part of a report written by write_report (or a legacy JSON report)."""
+    with _open_compressed(json_path, "rb", _compression_from_path(json_path)) as report_file:
+        return json.loads(report_file.read())
+
+def load_report_arrays(json_path, report=None):
+    """Read the per-facet/per-vertex arrays referenced by a report, as {key: ndarray}."""
+    report = report if report is not None else load_report(json_path)
+    array_info = report.get("Arrays")
+    if not array_info:
+        return {}
+    _, reader = ARRAY_FORMATS[array_info["Format"]]
+    directory = os.path.dirname(os.path.abspath(json_path))
+    return reader([os.path.join(directory, name) for name in array_info["Files"]])
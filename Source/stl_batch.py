@@ -0,0 +1,158 @@
+import os
+import sys
+import csv
+import glob
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Optional Parquet output
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = parquet = None
+
+# Importing local modules
+from STLProcessor import STLProcessor
+from STLReportCache import STLReportCache
+from stl_io import is_geometry_file
+
+# ---------------------------------------------------------------------------
+# Headless batch geometry analysis.
+#
+#   python stl_batch.py Resources/Geometry "variants/**/*.stl" -o summary.csv
+#
+# Every input (STL/OBJ, optionally gzipped or zipped) is decompressed as a
+# stream, without an inflated copy on disk, analysed by STLProcessor in a
+# pool of worker processes and reduced to one flat row of the summary table.
+# ---------------------------------------------------------------------------
+
+# Nested report entries that do not fit a one-row summary
+SKIPPED_REPORT_KEYS = {"Histogram", "Top Regions", "Sidecar", "Arrays"}
+
+def collect_inputs(patterns, recursive=False):
+    """Expand directories and glob patterns into a sorted list of geometry files."""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            search = os.path.join(pattern, "**", "*") if recursive else os.path.join(pattern, "*")
+            candidates = glob.glob(search, recursive=recursive)
+        else:
+            candidates = glob.glob(pattern, recursive=True) or [pattern]
+        files.update(os.path.abspath(path) for path in candidates if os.path.isfile(path) and is_geometry_file(path))
+    return sorted(files)
+
+def flatten_report(report_data, prefix=""):
+    # {"Bounding Box": {"Min Bounds": [x, y, z]}} -> {"Bounding Box.Min Bounds.0": x, ...}
+    row = {}
+    for key, value in report_data.items():
+        if key in SKIPPED_REPORT_KEYS:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(flatten_report(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            row.update({f"{name}.{i}": item for i, item in enumerate(value)})
+        else:
+            row[name] = value
+    return row
+
+# A broken cache only costs a re-analysis: its errors are logged, never reported as a failed file
+def _cached_report(cache, filename, options):
+    if cache is None:
+        return None
+    try:
+        return cache.get(filename, options)
+    except Exception as e:
+        print(f"Report cache lookup failed for {filename}: {type(e).__name__}: {e}", file=sys.stderr)
+        return None
+
+def _store_report(cache, filename, options, report_data):
+    if cache is None:
+        return
+    try:
+        cache.put(filename, options, report_data)
+    except Exception as e:
+        print(f"Report cache write failed for {filename}: {type(e).__name__}: {e}", file=sys.stderr)
+
+def analyze_file(filename, streaming=False, cache_dir=None):
+    """Worker entry point: analyse one geometry file and return its summary row."""
+    row = {"File": filename}
+    start = time.perf_counter()
+    try:
+        processor = STLProcessor(None)
+        cache = STLReportCache(cache_dir) if cache_dir else None
+        options = processor.report_cache_options(streaming)
+        report_data = _cached_report(cache, filename, options)
+        if report_data is None:
+            report_data = processor.analyze_stl(filename, streaming=streaming)
+            _store_report(cache, filename, options, report_data)
+        row.update(flatten_report(report_data))
+        row["Error"] = ""
+    except Exception as e:
+        # One broken geometry must not stop an overnight run
+        row["Error"] = f"{type(e).__name__}: {e}"
+    row["Wall Time (s)"] = round(time.perf_counter() - start, 6)
+    return row
+
+def write_summary(rows, output_file):
+    # Union of all columns, "File" first and "Error" last
+    columns = ["File"]
+    for row in rows:
+        columns += [column for column in row if column not in columns and column != "Error"]
+    columns.append("Error")
+
+    if output_file.lower().endswith(".parquet"):
+        if parquet is None:
+            raise ImportError("Parquet output requires the 'pyarrow' package (pip install pyarrow)")
+        table = pyarrow.table({column: [row.get(column) for row in rows] for column in columns})
+        parquet.write_table(table, output_file)
+    else:
+        with open(output_file, "w", newline="") as summary_file:
+            writer = csv.DictWriter(summary_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+def run_batch(files, output_file, workers=None, streaming=False, cache_dir=None, progress=print):
+    """Analyse every file in a process pool and write the consolidated summary."""
+    workers = workers or os.cpu_count() or 1
+    rows = []
+    # Spawned workers keep VTK state per process and are safe next to threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(analyze_file, filename, streaming, cache_dir): filename for filename in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            status = f"FAILED ({row['Error']})" if row["Error"] else f"{row['Wall Time (s)']:.2f} s"
+            progress(f"[{done}/{len(files)}] {os.path.basename(futures[future])}: {status}")
+
+    rows.sort(key=lambda row: row["File"])
+    write_summary(rows, output_file)
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch STL/OBJ geometry analysis (files may be gzipped).")
+    parser.add_argument("inputs", nargs="+", help="Geometry files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="geometry_summary.csv", help="Summary file (.csv or .parquet)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("--streaming", action="store_true", help="Chunked analysis without curvature (huge files)")
+    parser.add_argument("--cache-dir", default=None, help="Reuse reports from an STL report cache directory")
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if not files:
+        print("No STL/OBJ files found.", file=sys.stderr)
+        return 1
+
+    print(f"Analysing {len(files)} geometries ...")
+    rows = run_batch(files, args.output, args.workers, args.streaming, args.cache_dir)
+    failed = sum(1 for row in rows if row["Error"])
+    print(f"Summary written to {args.output} ({len(rows) - failed} ok, {failed} failed)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import os
+import re
+import gzip
+import zipfile
+import itertools
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+# ---------------------------------------------------------------------------
+# Native STL reading without vtkSTLReader.
+# Binary files are memory-mapped and exposed as a structured NumPy view of
+# the 50-byte facet records, so nothing is parsed or copied up front.
+# ASCII files are tokenized in bounded blocks with a compiled regex.
+# Gzipped and zipped STL/OBJ files are decompressed as a stream straight into
+# the same parsers, without an inflated copy on disk.
+# ---------------------------------------------------------------------------
+
+# One binary STL facet record: normal, three vertices, attribute byte count
+FACET_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2"),
+])
+
+BINARY_HEADER_SIZE = 84  # 80-byte header + uint32 facet count
+ASCII_BLOCK_SIZE = 16 * 1024 * 1024  # Bytes tokenized per ASCII block
+ASCII_FACET_SIZE = 256  # Rough size of one ASCII facet, used to size streaming blocks
+CHUNK_FACETS = 1_000_000  # Facets per chunk in streaming mode (~50 MB binary)
+STREAM_PROBE_SIZE = 1024  # Leading bytes used to tell ASCII from binary in a stream
+COMPRESSED_SUFFIXES = (".gz", ".zip")
+SURFACE_SUFFIXES = (".stl", ".obj")  # Surfaces read from plain, gzipped or zipped files
+GEOMETRY_SUFFIXES = (".stl", ".obj", ".stl.gz", ".obj.gz", ".zip")
+
+_FLOAT = rb"([-+0-9.eEinfINFaA]+)"
+_NORMAL_PATTERN = re.compile(rb"facet\s+normal\s+" + rb"\s+".join([_FLOAT] * 3))
+_VERTEX_PATTERN = re.compile(rb"vertex\s+" + rb"\s+".join([_FLOAT] * 3))
+_SOLID_PATTERN = re.compile(rb"^[ \t]*solid\b[ \t]*([^\r\n]*)", re.M)
+_GROUP_PATTERN = re.compile(rb"^[go][ \t]+([^\r\n]*)", re.M)
+
+def is_binary_stl(filename):
+    # Some exporters start binary headers with "solid", so trust the size check first
+    file_size = os.path.getsize(filename)
+    if file_size < BINARY_HEADER_SIZE:
+        return False
+    with open(filename, "rb") as stl_file:
+        header = stl_file.read(BINARY_HEADER_SIZE)
+    facet_count = int(np.frombuffer(header, dtype="<u4", count=1, offset=80)[0])
+    if file_size == BINARY_HEADER_SIZE + facet_count * FACET_DTYPE.itemsize:
+        return True
+    return not header.lstrip().lower().startswith(b"solid")
+
+def read_binary_facets(filename):
+    """Memory-map a binary STL and return its facet records without copying."""
+    file_size = os.path.getsize(filename)
+    facet_count = (file_size - BINARY_HEADER_SIZE) // FACET_DTYPE.itemsize
+    if facet_count <= 0:
+        return np.zeros(0, dtype=FACET_DTYPE)
+    return np.memmap(filename, dtype=FACET_DTYPE, mode="r", offset=BINARY_HEADER_SIZE, shape=(facet_count,))
+
+def _parse_ascii_block(block):
+    # Regex scan of one block of complete facets into structured records
+    vertices = np.array(_VERTEX_PATTERN.findall(block), dtype=np.float32).reshape(-1, 3, 3)
+    facets = np.zeros(len(vertices), dtype=FACET_DTYPE)
+    facets["vertices"] = vertices
+    normals = _NORMAL_PATTERN.findall(block)
+    if len(normals) == len(vertices):
+        facets["normal"] = np.array(normals, dtype=np.float32).reshape(-1, 3)
+    return facets
+
+def _record_solids(block, solids, start, default_name):
+    # (name, first facet) of every "solid <name>" header in a block of whole facets
+    for match in _SOLID_PATTERN.finditer(block):
+        name = match.group(1).strip().decode(errors="replace") or default_name
+        solids.append((name, start + block.count(b"endfacet", 0, match.start())))
+
+def _iter_ascii_blocks(chunks, solids=None, base=0, default_name="solid"):
+    # With a ``solids`` list, the solid headers are recorded as (name, first facet + base)
+    remainder = b""
+    count = base
+    for chunk in chunks:
+        data = remainder + chunk
+        # Only hand complete facets to the tokenizer; carry the tail over
+        cut = data.rfind(b"endfacet")
+        if cut == -1:
+            remainder = data
+            continue
+        cut += len(b"endfacet")
+        remainder = data[cut:]
+        if solids is not None:
+            _record_solids(data[:cut], solids, count, default_name)
+        facets = _parse_ascii_block(data[:cut])
+        count += len(facets)
+        if len(facets):
+            yield facets
+    if remainder.strip():
+        if solids is not None:
+            _record_solids(remainder, solids, count, default_name)
+        facets = _parse_ascii_block(remainder)
+        if len(facets):
+            yield facets
+
+def iter_ascii_facets(filename, block_size=ASCII_BLOCK_SIZE, solids=None):
+    """Yield structured facet arrays from an ASCII STL one bounded block at a time."""
+    with open(filename, "rb") as stl_file:
+        yield from _iter_ascii_blocks(iter(lambda: stl_file.read(block_size), b""), solids, 0, geometry_stem(filename))
+
+def read_ascii_facets(filename):
+    blocks = list(iter_ascii_facets(filename))
+    if not blocks:
+        return np.zeros(0, dtype=FACET_DTYPE)
+    return np.concatenate(blocks)
+
+def iter_binary_facets(filename, chunk_facets=CHUNK_FACETS):
+    # Plain buffered reads (not the memory map) so resident memory stays at one chunk
+    with open(filename, "rb") as stl_file:
+        stl_file.seek(BINARY_HEADER_SIZE)
+        while True:
+            facets = np.fromfile(stl_file, dtype=FACET_DTYPE, count=chunk_facets)
+            if not len(facets):
+                break
+            yield facets
+
+def iter_facet_chunks(filename, chunk_facets=CHUNK_FACETS, solids=None):
+    """Yield bounded FACET_DTYPE chunks of any geometry file, whatever its size.
+
+    With a ``solids`` list, every solid is recorded as (name, first facet)
+    as soon as the stream reaches it (see solid_ranges).
+    """
+    if not is_plain_stl(filename):
+        yield from iter_geometry_facets(filename, chunk_facets, solids)
+        return
+    if solids is not None:
+        solids.append((geometry_stem(filename), 0))
+    if is_binary_stl(filename):
+        yield from iter_binary_facets(filename, chunk_facets)
+    else:
+        yield from iter_ascii_facets(filename, chunk_facets * ASCII_FACET_SIZE, solids)
+
+def read_facets(filename):
+    """Return the facets of any geometry file as a FACET_DTYPE array (memory-mapped for binary STL)."""
+    if not is_plain_stl(filename):
+        return read_geometry_facets(filename)
+    if is_binary_stl(filename):
+        return read_binary_facets(filename)
+    return read_ascii_facets(filename)
+
+def facet_triangles(facets):
+    # (n, 3, 3) view of the vertex coordinates; no copy for memory-mapped input
+    return facets["vertices"]
+
+def facets_to_polydata(facets):
+    """Build an unmerged vtkPolyData straight from facet records."""
+    points_array = np.ascontiguousarray(facets["vertices"].reshape(-1, 3))
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(points_array, deep=True))
+
+    point_ids = np.arange(len(points_array), dtype=np.int64)
+    offsets = np.arange(0, len(points_array) + 1, 3, dtype=np.int64)
+    cells = vtk.vtkCellArray()
+    cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(point_ids, deep=True))
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetPolys(cells)
+    return polydata
+
+# ---------------------------------------------------------------------------
+# Staging of other geometry inputs (gzipped files, OBJ) as plain STL
+# ---------------------------------------------------------------------------
+def is_geometry_file(filename):
+    return filename.lower().endswith(GEOMETRY_SUFFIXES)
+
+def is_plain_stl(filename):
+    # Anything else (OBJ, gzip, zip) goes through the stream readers below
+    return not filename.lower().endswith(COMPRESSED_SUFFIXES + (".obj",))
+
+def geometry_stem(filename):
+    """File name without directory, compression suffix or geometry extension (motorBike.obj.gz -> motorBike)."""
+    name = os.path.basename(filename)
+    if name.lower().endswith(COMPRESSED_SUFFIXES):
+        name = os.path.splitext(name)[0]
+    return os.path.splitext(name)[0]
+
+def open_geometry_streams(filename):
+    """Yield (member name, binary stream) for every STL/OBJ surface in a plain, gzipped or zipped file."""
+    lower = filename.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(filename) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(SURFACE_SUFFIXES):
+                    with archive.open(info) as stream:
+                        yield info.filename, stream
+    elif lower.endswith(".gz"):
+        with gzip.open(filename, "rb") as stream:
+            yield os.path.basename(filename)[:-len(".gz")], stream
+    else:
+        with open(filename, "rb") as stream:
+            yield os.path.basename(filename), stream
+
+def _iter_binary_stream(head, stream, chunk_facets):
+    # Streams have no size to check, so records are cut from the byte flow as they arrive
+    chunk_bytes = chunk_facets * FACET_DTYPE.itemsize
+    buffer = head[BINARY_HEADER_SIZE:]
+    while True:
+        # With small chunks the probe alone may already hold more than one
+        data = stream.read(chunk_bytes - len(buffer)) if len(buffer) < chunk_bytes else None
+        if data:
+            buffer += data
+        if len(buffer) >= chunk_bytes:
+            yield np.frombuffer(buffer, dtype=FACET_DTYPE, count=chunk_facets)
+            buffer = buffer[chunk_bytes:]
+        elif not data:
+            usable = len(buffer) // FACET_DTYPE.itemsize
+            if usable:
+                yield np.frombuffer(buffer, dtype=FACET_DTYPE, count=usable)
+            break
+
+def read_obj_facets(stream, solids=None, base=0):
+    """Triangulated facets of a Wavefront OBJ stream (polygons are fan-split).
+
+    With a ``solids`` list, every group/object ("g"/"o") is recorded as
+    (name, first facet + base).
+    """
+    data = stream.read()
+    vertices = np.array(re.findall(rb"^v[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", data, re.M), dtype=np.float64)
+    face_lines = re.findall(rb"^f[ \t]+([^\r\n]*)", data, re.M)
+    faces = b" ".join(face_lines)
+    tokens = faces.split()
+    if b"/" not in faces and b"-" not in faces and len(tokens) == 3 * len(face_lines):
+        # Plain absolute-index triangles (the common case): one vectorized parse
+        indices = np.array(tokens, dtype=np.int64).reshape(-1, 3) - 1
+        if solids is not None:
+            groups = [(match.start(), match.group(1)) for match in _GROUP_PATTERN.finditer(data)]
+            if groups:
+                face_positions = np.array([match.start() for match in re.finditer(rb"^f[ \t]", data, re.M)])
+                first_faces = np.searchsorted(face_positions, [position for position, _ in groups])
+                solids.extend((name.strip().decode(errors="replace"), base + int(first))
+                              for (_, name), first in zip(groups, first_faces))
+    else:
+        # General faces: v/vt/vn tokens, polygons (fan-split) and negative (relative) indices
+        vertex_count = 0
+        triangles = []
+        for kind, line in re.findall(rb"^([vfgo])[ \t]+([^\r\n]*)", data, re.M):
+            if kind == b"v":
+                vertex_count += 1
+            elif kind == b"f":
+                face = [int(token.split(b"/")[0]) for token in line.split()]
+                face = [index + vertex_count if index < 0 else index - 1 for index in face]
+                triangles.extend((face[0], face[i], face[i + 1]) for i in range(1, len(face) - 1))
+            elif solids is not None:
+                solids.append((line.strip().decode(errors="replace"), base + len(triangles)))
+        indices = np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+    triangles = vertices[indices].astype(np.float32)
+    facets = np.zeros(len(triangles), dtype=FACET_DTYPE)
+    facets["vertices"] = triangles
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    facets["normal"] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    return facets
+
+def iter_stream_facets(name, stream, chunk_facets=CHUNK_FACETS, solids=None, base=0):
+    """Yield FACET_DTYPE chunks from an open STL or OBJ stream (``name`` gives the format).
+
+    With a ``solids`` list, the member itself and every named solid or group
+    in it are recorded as (name, first facet + base) while streaming.
+    """
+    if solids is not None:
+        # Facets ahead of any solid header/group belong to a solid named after the member
+        solids.append((geometry_stem(name), base))
+    if name.lower().endswith(".obj"):
+        # OBJ faces index a global vertex list, so the member is parsed whole (in memory, never on disk)
+        facets = read_obj_facets(stream, solids, base)
+        for start in range(0, len(facets), chunk_facets):
+            yield facets[start:start + chunk_facets]
+        return
+    head = stream.read(STREAM_PROBE_SIZE)
+    if head.lstrip()[:5].lower() == b"solid" and (b"facet" in head or b"endsolid" in head):
+        block_size = chunk_facets * ASCII_FACET_SIZE
+        chunks = itertools.chain([head], iter(lambda: stream.read(block_size), b""))
+        yield from _iter_ascii_blocks(chunks, solids, base, geometry_stem(name))
+    else:
+        yield from _iter_binary_stream(head, stream, chunk_facets)
+
+def iter_geometry_facets(filename, chunk_facets=CHUNK_FACETS, solids=None):
+    """Yield FACET_DTYPE chunks of every surface in a plain, gzipped or zipped STL/OBJ file."""
+    count = 0
+    for name, stream in open_geometry_streams(filename):
+        for facets in iter_stream_facets(name, stream, chunk_facets, solids, count):
+            count += len(facets)
+            yield facets
+
+def _concatenate(chunks):
+    if not chunks:
+        return np.zeros(0, dtype=FACET_DTYPE)
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+def read_geometry_facets(filename):
+    return _concatenate(list(iter_geometry_facets(filename)))
+
+def solid_ranges(starts, facet_count):
+    """(name, first facet) markers -> non-empty (name, start, stop) ranges in file order."""
+    ranges = []
+    for index, (name, start) in enumerate(starts):
+        stop = starts[index + 1][1] if index + 1 < len(starts) else facet_count
+        if stop > start:
+            ranges.append((name, start, stop))
+    return ranges
+
+def read_solids(filename):
+    """(facets, solids) of any geometry file; ``solids`` lists the (name, start, stop) facet range of every named solid."""
+    if is_plain_stl(filename) and is_binary_stl(filename):
+        # Binary STL has no solid names: one memory-mapped solid named after the file
+        facets = read_binary_facets(filename)
+        return facets, solid_ranges([(geometry_stem(filename), 0)], len(facets))
+    starts = []
+    facets = _concatenate(list(iter_facet_chunks(filename, solids=starts)))
+    return facets, solid_ranges(starts, len(facets))
+
+def stage_as_stl(filename, directory):
+    """Return a plain STL path for any supported geometry file.
+
+    Plain STL files are returned unchanged; OBJ and compressed files are
+    decoded in one streamed pass and written to ``directory`` as binary STL.
+    """
+    if is_plain_stl(filename):
+        return filename
+    return write_binary_stl(os.path.join(directory, f"{geometry_stem(filename)}.stl"), read_facets(filename))
+
+def write_binary_stl(filename, facets, header=b"Splash binary STL"):
+    """Write FACET_DTYPE records (or an (n, 3, 3) triangle array) as a binary STL."""
+    if facets.dtype != FACET_DTYPE:
+        triangles = np.asarray(facets, dtype=np.float32).reshape(-1, 3, 3)
+        facets = np.zeros(len(triangles), dtype=FACET_DTYPE)
+        facets["vertices"] = triangles
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        facets["normal"] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    with open(filename, "wb") as stl_file:
+        stl_file.write(header[:80].ljust(80, b"\0"))
+        stl_file.write(np.uint32(len(facets)).tobytes())
+        np.ascontiguousarray(facets, dtype=FACET_DTYPE).tofile(stl_file)
+    return filename
+
+def flip_facets(facets, flip):
+    """Copy of the facet records with the winding (and stored normal) reversed where ``flip`` is set."""
+    facets = np.array(facets, dtype=FACET_DTYPE)
+    facets["vertices"][flip] = facets["vertices"][flip][:, [0, 2, 1]]
+    facets["normal"][flip] *= -1
+    return facets
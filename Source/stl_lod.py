@@ -0,0 +1,152 @@
+import os
+import glob
+import threading
+import vtk
+
+# Importing local modules
+from STLReportCache import STLReportCache
+from GeometryCache import session_geometry_cache
+
+# ---------------------------------------------------------------------------
+# Level-of-detail surfaces for the Splash STL viewer.
+# Large surfaces are decimated progressively (each level from the previous
+# one) with vtkQuadricDecimation; the levels are stored as .vtp files keyed
+# by the STL content hash, so the cost is paid once per geometry.
+# ---------------------------------------------------------------------------
+
+LOD_CACHE_DIR_NAME = ".stl_lod_cache"
+LOD_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # Evict least-recently-used levels above this size
+LOD_MIN_TRIANGLES = 1_000_000  # Smaller surfaces render interactively at full resolution
+LOD_TARGET_TRIANGLES = (2_000_000, 500_000, 100_000)  # Finest to coarsest
+
+# Frame-time window for picking the level shown while the camera moves
+INTERACTIVE_FRAME_TIME = 1.0 / 15
+FINE_FRAME_TIME = 1.0 / 60
+
+def merge_points(polydata):
+    # Decimation needs shared vertices; facets_to_polydata output is an unmerged soup
+    cleaner = vtk.vtkCleanPolyData()
+    cleaner.SetInputData(polydata)
+    cleaner.PointMergingOn()
+    cleaner.Update()
+    return cleaner.GetOutput()
+
+def decimate(polydata, target_triangles):
+    decimation = vtk.vtkQuadricDecimation()
+    decimation.SetInputData(polydata)
+    decimation.SetTargetReduction(1.0 - target_triangles / max(polydata.GetNumberOfCells(), 1))
+    decimation.VolumePreservationOn()
+    decimation.Update()
+    return decimation.GetOutput()
+
+def _read_level(path):
+    reader = vtk.vtkXMLPolyDataReader()
+    reader.SetFileName(path)
+    reader.Update()
+    return reader.GetOutput()
+
+def _write_level(path, polydata):
+    temp_path = f"{path}.tmp.vtp"
+    writer = vtk.vtkXMLPolyDataWriter()
+    writer.SetFileName(temp_path)
+    writer.SetInputData(polydata)
+    writer.SetDataModeToAppended()
+    writer.SetCompressorTypeToZLib()
+    writer.Write()
+    os.replace(temp_path, path)
+
+def evict_lod_cache(cache_dir, max_bytes=LOD_CACHE_MAX_BYTES):
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, "*_*.vtp")):
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        os.remove(path)
+        total_bytes -= size
+
+def load_lod_levels(filename, polydata, cache_dir=None, targets=LOD_TARGET_TRIANGLES, progress=print):
+    """Decimated versions of ``polydata`` (finest first), read from or written to the LOD cache.
+
+    Returns an empty list for surfaces small enough to render at full resolution.
+    """
+    triangle_count = polydata.GetNumberOfCells()
+    targets = [target for target in targets if target < triangle_count]
+    if triangle_count < LOD_MIN_TRIANGLES or not targets:
+        return []
+
+    cache_dir = cache_dir or os.path.abspath(LOD_CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    content_hash = STLReportCache(cache_dir).content_hash(filename)
+
+    levels = []
+    source = None
+    for target in targets:
+        path = os.path.join(cache_dir, f"{content_hash}_{target}.vtp")
+        if os.path.exists(path):
+            level = _read_level(path)
+            os.utime(path)  # Mark as recently used
+        else:
+            progress(f"Building level of detail: {target:,} triangles ...")
+            if source is None:
+                source = merge_points(polydata)
+            level = decimate(source, target)
+            _write_level(path, level)
+        levels.append(level)
+        source = level  # Progressive: the next, coarser level starts from this one
+    evict_lod_cache(cache_dir)
+    return levels
+
+def load_lod_levels_async(filename, on_complete, on_error=None, progress=print):
+    """Surface and LOD levels of ``filename`` built in a daemon thread -> on_complete(polydata, levels).
+
+    Parsing, content hashing and decimation all run off the GUI thread; the
+    callbacks run on the worker thread (marshal them with root.after).
+    """
+    def worker():
+        try:
+            polydata = session_geometry_cache().polydata(filename)
+            levels = load_lod_levels(filename, polydata, progress=progress)
+        except Exception as error:
+            if on_error is not None:
+                on_error(error)
+            return
+        on_complete(polydata, levels)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+def attach_lod_switching(interactor, renderer, mapper, full_resolution, levels):
+    """Render a coarse level while the camera moves and the full surface at rest.
+
+    The level used during motion adapts to the measured frame time, stepping
+    coarser when frames are slower than INTERACTIVE_FRAME_TIME and finer when
+    they are faster than FINE_FRAME_TIME.
+    """
+    state = {"level": len(levels) // 2}
+
+    def on_start(caller, event):
+        mapper.SetInputData(levels[state["level"]])
+
+    def on_interaction(caller, event):
+        frame_time = renderer.GetLastRenderTimeInSeconds()
+        level = state["level"]
+        if frame_time > INTERACTIVE_FRAME_TIME and level < len(levels) - 1:
+            level += 1
+        elif frame_time < FINE_FRAME_TIME and level > 0:
+            level -= 1
+        if level != state["level"]:
+            state["level"] = level
+            mapper.SetInputData(levels[level])
+
+    def on_end(caller, event):
+        mapper.SetInputData(full_resolution)
+        interactor.GetRenderWindow().Render()
+
+    style = interactor.GetInteractorStyle()
+    style.AddObserver("StartInteractionEvent", on_start)
+    style.AddObserver("InteractionEvent", on_interaction)
+    style.AddObserver("EndInteractionEvent", on_end)
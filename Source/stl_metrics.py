@@ -0,0 +1,199 @@
+import time
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Vectorized per-facet geometry kernels used by STLProcessor.
+# Every function works on a (n, 3, 3) array of triangle corner coordinates
+# (facet, corner, xyz) so the whole surface is handled in one NumPy pass.
+# ---------------------------------------------------------------------------
+
+def facet_aspect_ratios(edge_lengths):
+    # Longest over shortest edge; collapsed edges give inf instead of raising
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return edge_lengths.max(axis=1) / edge_lengths.min(axis=1)
+
+class _StageTimer:
+    # Accumulates wall-clock seconds per named stage into a plain dict
+    def __init__(self, timings):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        if self.timings is not None:
+            self.timings[stage] = self.timings.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+def compute_facet_metrics(triangles, timings=None):
+    """Derive every per-facet quantity from one shared set of edge vectors.
+
+    Areas, edge lengths, aspect ratios, unit normals and the divergence-theorem
+    volume terms all come out of the same sweep over the triangles. When a
+    ``timings`` dict is given, the seconds spent in each stage are added to it.
+    """
+    timer = _StageTimer(timings)
+    triangles = np.asarray(triangles, dtype=np.float64)
+    p1, p2, p3 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+
+    # Edge vectors are computed once and reused by every later stage
+    edge21, edge31, edge32 = p2 - p1, p3 - p1, p3 - p2
+    edge_lengths = np.empty((len(triangles), 3))
+    edge_lengths[:, 0] = np.linalg.norm(edge21, axis=1)
+    edge_lengths[:, 1] = np.linalg.norm(edge31, axis=1)
+    edge_lengths[:, 2] = np.linalg.norm(edge32, axis=1)
+    timer.lap("Edges")
+
+    # Twice-area vector gives both the facet area and its unit normal
+    area_vectors = np.cross(edge21, edge31)
+    double_areas = np.linalg.norm(area_vectors, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normals = np.where(double_areas[:, None] > 0, area_vectors / double_areas[:, None], 0.0)
+    timer.lap("Areas and Normals")
+
+    aspect_ratios = facet_aspect_ratios(edge_lengths)
+    timer.lap("Aspect Ratios")
+
+    # Signed volume of the tetrahedron (origin, p1, p2, p3) and its centroid weight
+    centroids = (p1 + p2 + p3) / 3
+    signed_volumes = np.einsum('ij,ij->i', centroids, area_vectors) / 6
+    timer.lap("Volume Integrals")
+
+    bounds = (triangles.min(axis=(0, 1)), triangles.max(axis=(0, 1)))
+    timer.lap("Bounding Box")
+
+    return {
+        "areas": double_areas / 2,
+        "edge_lengths": edge_lengths,
+        "aspect_ratios": aspect_ratios,
+        "normals": normals,
+        "centroids": centroids,
+        "signed_volumes": signed_volumes,
+        "bounds": bounds,
+    }
+
+def reduce_facet_metrics(metrics):
+    """Collapse per-facet arrays into additive sums and running extrema."""
+    areas = metrics["areas"]
+    signed_volumes = metrics["signed_volumes"]
+    centroids = metrics["centroids"]
+    return {
+        "Facet Count": len(areas),
+        "Degenerate Facets": int(np.count_nonzero(areas == 0)),
+        "Area Sum": float(areas.sum()),
+        "Area Min": float(areas.min()),
+        "Area Max": float(areas.max()),
+        "Edge Min": float(metrics["edge_lengths"].min()),
+        "Edge Max": float(metrics["edge_lengths"].max()),
+        "Aspect Min": float(metrics["aspect_ratios"].min()),
+        "Aspect Max": float(metrics["aspect_ratios"].max()),
+        "Bounds Min": metrics["bounds"][0],
+        "Bounds Max": metrics["bounds"][1],
+        "Signed Volume": float(signed_volumes.sum()),
+        # Tetra centroid is 3/4 of the facet centroid (the fourth corner is the origin)
+        "Volume Moment": (signed_volumes[:, None] * centroids).sum(axis=0) * 0.75,
+        "Area Moment": (areas[:, None] * centroids).sum(axis=0),
+    }
+
+def combine_facet_metrics(first, second):
+    """Merge two reduced partials (e.g. from consecutive chunks) into one."""
+    return {
+        "Facet Count": first["Facet Count"] + second["Facet Count"],
+        "Degenerate Facets": first["Degenerate Facets"] + second["Degenerate Facets"],
+        "Area Sum": first["Area Sum"] + second["Area Sum"],
+        "Area Min": min(first["Area Min"], second["Area Min"]),
+        "Area Max": max(first["Area Max"], second["Area Max"]),
+        "Edge Min": min(first["Edge Min"], second["Edge Min"]),
+        "Edge Max": max(first["Edge Max"], second["Edge Max"]),
+        "Aspect Min": min(first["Aspect Min"], second["Aspect Min"]),
+        "Aspect Max": max(first["Aspect Max"], second["Aspect Max"]),
+        "Bounds Min": np.minimum(first["Bounds Min"], second["Bounds Min"]),
+        "Bounds Max": np.maximum(first["Bounds Max"], second["Bounds Max"]),
+        "Signed Volume": first["Signed Volume"] + second["Signed Volume"],
+        "Volume Moment": first["Volume Moment"] + second["Volume Moment"],
+        "Area Moment": first["Area Moment"] + second["Area Moment"],
+    }
+
+def finalize_facet_metrics(partials):
+    """Turn reduced sums into the scalar values reported by STLProcessor."""
+    signed_volume = partials["Signed Volume"]
+    surface_area = partials["Area Sum"]
+
+    # Volume centroid for closed surfaces, area centroid for open or flat ones
+    if abs(signed_volume) > 1e-12 * max(surface_area, 1e-300) ** 1.5:
+        center_of_mass = partials["Volume Moment"] / signed_volume
+    elif surface_area > 0:
+        center_of_mass = partials["Area Moment"] / surface_area
+    else:
+        center_of_mass = (np.asarray(partials["Bounds Min"]) + np.asarray(partials["Bounds Max"])) / 2
+
+    return {
+        "Volume": abs(signed_volume),
+        "Surface Area": surface_area,
+        "Center of Mass": [float(c) for c in center_of_mass],
+        "Bounding Box": {
+            "Min Bounds": [float(b) for b in partials["Bounds Min"]],
+            "Max Bounds": [float(b) for b in partials["Bounds Max"]]
+        },
+        "Min Facet Area": partials["Area Min"],
+        "Max Facet Area": partials["Area Max"],
+        "Min Edge Length": partials["Edge Min"],
+        "Max Edge Length": partials["Edge Max"],
+        "Min Aspect Ratio": partials["Aspect Min"],
+        "Max Aspect Ratio": partials["Aspect Max"],
+    }
+
+# ---------------------------------------------------------------------------
+# Curvature summary: a compact description instead of one value per vertex
+# ---------------------------------------------------------------------------
+CURVATURE_PERCENTILES = [0, 1, 5, 25, 50, 75, 95, 99, 100]
+CURVATURE_BINS = 32
+CURVATURE_TOP_REGIONS = 10
+
+def top_curvature_regions(values, points, top_n=CURVATURE_TOP_REGIONS, separation=None):
+    # Highest |curvature| vertices, keeping one seed per neighbourhood so a single
+    # sharp corner does not fill the whole list
+    if separation is None:
+        separation = 0.02 * float(np.linalg.norm(points.max(axis=0) - points.min(axis=0)))
+    candidate_count = min(len(values), top_n * 50)
+    candidates = np.argpartition(-np.abs(values), candidate_count - 1)[:candidate_count]
+    candidates = candidates[np.argsort(-np.abs(values[candidates]))]
+
+    regions = []
+    picked = np.empty((0, 3))
+    for index in candidates:
+        location = points[index]
+        if len(picked) and np.min(np.linalg.norm(picked - location, axis=1)) < separation:
+            continue
+        regions.append({"Location": [float(c) for c in location], "Value": float(values[index])})
+        picked = np.vstack([picked, location])
+        if len(regions) == top_n:
+            break
+    return regions
+
+def summarize_curvature(values, points, bins=CURVATURE_BINS, top_n=CURVATURE_TOP_REGIONS):
+    """Percentiles, a fixed-bin histogram and the top-N high-curvature regions."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    finite_values = values[finite]
+    summary = {"Vertex Count": int(len(values)), "Non-finite Values": int(np.count_nonzero(~finite))}
+    if not len(finite_values):
+        return summary
+
+    percentiles = np.percentile(finite_values, CURVATURE_PERCENTILES)
+    summary["Mean"] = float(finite_values.mean())
+    summary["Std"] = float(finite_values.std())
+    summary["Percentiles"] = {f"p{p}": float(v) for p, v in zip(CURVATURE_PERCENTILES, percentiles)}
+
+    # Bins span p1..p99 so a few spikes do not flatten the rest; tails are counted separately
+    low, high = percentiles[1], percentiles[-2]
+    if high <= low:
+        low, high = percentiles[0], percentiles[-1] + (1.0 if percentiles[-1] == percentiles[0] else 0.0)
+    counts, edges = np.histogram(finite_values, bins=bins, range=(low, high))
+    summary["Histogram"] = {
+        "Bin Edges": [float(e) for e in edges],
+        "Counts": [int(c) for c in counts],
+        "Below Range": int(np.count_nonzero(finite_values < low)),
+        "Above Range": int(np.count_nonzero(finite_values > high)),
+    }
+    summary["Top Regions"] = top_curvature_regions(finite_values, np.asarray(points)[finite], top_n)
+    return summary
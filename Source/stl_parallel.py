@@ -0,0 +1,83 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Importing local modules
+from stl_metrics import compute_facet_metrics, reduce_facet_metrics, combine_facet_metrics
+from stl_io import is_plain_stl, is_binary_stl, read_binary_facets, read_facets, CHUNK_FACETS
+
+# ---------------------------------------------------------------------------
+# Multi-process STL analysis.
+# The facet range is split into shards; every worker reduces its shard to
+# the same partial sums used by the streaming mode and the parent folds them.
+# Only these per-facet metrics are sharded: topology, orientation and
+# curvature work on the whole welded surface and run after, in the parent.
+# Binary files are shared through the OS page cache (each worker memory-maps
+# the file); parsed ASCII facets are placed once in a shared-memory block.
+# ---------------------------------------------------------------------------
+
+SHARDS_PER_WORKER = 4  # Extra shards smooth out uneven worker speeds
+
+def _shard_partials(source, start, stop, chunk_facets):
+    # Runs in the worker: attach to the shared facets and reduce [start, stop)
+    shm = None
+    if source[0] == "file":
+        vertices = read_binary_facets(source[1])["vertices"]
+    else:
+        shm = shared_memory.SharedMemory(name=source[1])
+        vertices = np.ndarray((source[2], 3, 3), dtype=np.float32, buffer=shm.buf)
+
+    try:
+        partials = None
+        for chunk_start in range(start, stop, chunk_facets):
+            chunk = vertices[chunk_start:min(chunk_start + chunk_facets, stop)]
+            chunk_partials = reduce_facet_metrics(compute_facet_metrics(chunk))
+            partials = chunk_partials if partials is None else combine_facet_metrics(partials, chunk_partials)
+        return partials
+    finally:
+        del vertices
+        if shm is not None:
+            shm.close()
+
+def shard_ranges(facet_count, shard_count):
+    # Contiguous, nearly equal [start, stop) ranges covering every facet
+    bounds = np.linspace(0, facet_count, shard_count + 1).astype(np.int64)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def compute_parallel_partials(filename, workers=None, chunk_facets=CHUNK_FACETS):
+    """Reduce an STL file to facet partials using a pool of worker processes."""
+    workers = workers or os.cpu_count() or 1
+    shm = None
+    if is_plain_stl(filename) and is_binary_stl(filename):
+        facet_count = len(read_binary_facets(filename))
+        source = ("file", os.path.abspath(filename))
+    else:
+        # ASCII, OBJ and compressed input are decoded once and shared with the workers
+        vertices = read_facets(filename)["vertices"]
+        facet_count = len(vertices)
+        if facet_count:
+            shm = shared_memory.SharedMemory(create=True, size=vertices.nbytes)
+            np.ndarray(vertices.shape, dtype=np.float32, buffer=shm.buf)[:] = vertices
+            source = ("shm", shm.name, facet_count)
+        del vertices
+
+    if facet_count == 0:
+        raise ValueError(f"No facets found in {filename}")
+
+    try:
+        # Spawned workers stay safe when the caller runs Tk or other threads
+        context = multiprocessing.get_context("spawn")
+        shards = shard_ranges(facet_count, workers * SHARDS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_shard_partials, source, start, stop, chunk_facets) for start, stop in shards]
+            partials = None
+            for future in futures:
+                shard = future.result()
+                partials = shard if partials is None else combine_facet_metrics(partials, shard)
+        return partials
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+
+# Importing local modules
+from stl_io import read_solids, facet_triangles, write_binary_stl, FACET_DTYPE
+
+# ---------------------------------------------------------------------------
+# Multi-solid (multi-patch) STL handling.
+# Solids are (name, start, stop) facet ranges over one facet array, as
+# returned by stl_io.read_solids or recorded while streaming, so per-patch
+# metrics, splitting and merging never re-read the file. Solids sharing a
+# name are one patch, as in snappyHexMesh/cfMesh.
+#
+#   python stl_solids.py geometry.stl                       # per-patch table
+#   python stl_solids.py geometry.stl --split patches/       # one STL per patch
+#   python stl_solids.py geometry.stl -m "inlet.*=inlet" -o merged.stl
+# ---------------------------------------------------------------------------
+
+def patch_names(solids):
+    """Unique solid names in order of first appearance."""
+    return list(dict.fromkeys(solid[0] for solid in solids))
+
+def facet_patch_ids(solids, start, stop, names):
+    """Index into ``names`` of facets start..stop-1 (``solids`` may be (name, first facet) markers or ranges)."""
+    marks = np.array([solid[1] for solid in solids], dtype=np.int64)
+    name_ids = np.array([names.index(solid[0]) for solid in solids], dtype=np.int64)
+    return name_ids[np.searchsorted(marks, np.arange(start, stop), side="right") - 1]
+
+def compute_patch_partials(triangles, ids, patch_count):
+    """Per-patch running sums/extrema of one chunk of triangles; merge with combine_patch_partials."""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    area_vectors = 0.5 * np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    areas = np.linalg.norm(area_vectors, axis=1)
+    centroids = triangles.mean(axis=1)
+
+    partials = {
+        "facets": np.bincount(ids, minlength=patch_count),
+        "area": np.bincount(ids, weights=areas, minlength=patch_count),
+        "moment": np.stack([np.bincount(ids, weights=areas * centroids[:, axis], minlength=patch_count) for axis in range(3)], axis=1),
+        "area_vector": np.stack([np.bincount(ids, weights=area_vectors[:, axis], minlength=patch_count) for axis in range(3)], axis=1),
+        "min": np.full((patch_count, 3), np.inf),
+        "max": np.full((patch_count, 3), -np.inf),
+    }
+    if len(ids):
+        # Patches are contiguous runs of facets: reduce each run, then fold the runs into their patch
+        run_starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1]
+        np.minimum.at(partials["min"], ids[run_starts], np.minimum.reduceat(triangles.min(axis=1), run_starts))
+        np.maximum.at(partials["max"], ids[run_starts], np.maximum.reduceat(triangles.max(axis=1), run_starts))
+    return partials
+
+def _grow_partials(partials, patch_count):
+    # Streaming discovers patches as it goes, so earlier partials may cover fewer of them
+    missing = patch_count - len(partials["facets"])
+    if missing <= 0:
+        return partials
+    grown = {}
+    for key, value in partials.items():
+        fill = np.inf if key == "min" else -np.inf if key == "max" else 0
+        grown[key] = np.concatenate([value, np.full((missing,) + value.shape[1:], fill, dtype=value.dtype)])
+    return grown
+
+def combine_patch_partials(first, second):
+    patch_count = max(len(first["facets"]), len(second["facets"]))
+    first, second = _grow_partials(first, patch_count), _grow_partials(second, patch_count)
+    combined = {key: first[key] + second[key] for key in ("facets", "area", "moment", "area_vector")}
+    combined["min"] = np.minimum(first["min"], second["min"])
+    combined["max"] = np.maximum(first["max"], second["max"])
+    return combined
+
+def finalize_patch_metrics(partials, names):
+    """Report entries {name: metrics} from combined patch partials."""
+    partials = _grow_partials(partials, len(names))
+    metrics = {}
+    for index, name in enumerate(names):
+        area = float(partials["area"][index])
+        area_vector = partials["area_vector"][index]
+        projected_area = float(np.linalg.norm(area_vector))
+        metrics[name] = {
+            "Facets": int(partials["facets"][index]),
+            "Area": area,
+            # |sum of area vectors|: equals Area for a flat patch, ~0 for a closed one
+            "Projected Area": projected_area,
+            "Mean Normal": (area_vector / projected_area).tolist() if projected_area > 0 else [0.0, 0.0, 0.0],
+            "Centroid": (partials["moment"][index] / area).tolist() if area > 0 else partials["min"][index].tolist(),
+            "Bounding Box": {"Min Bounds": partials["min"][index].tolist(), "Max Bounds": partials["max"][index].tolist()},
+        }
+    return metrics
+
+def patch_metrics(facets, solids):
+    """Per-patch metrics of in-memory facets and their solid ranges."""
+    names = patch_names(solids)
+    ids = facet_patch_ids(solids, 0, len(facets), names)
+    return finalize_patch_metrics(compute_patch_partials(facet_triangles(facets), ids, len(names)), names)
+
+def merge_solids(facets, solids, rules):
+    """Rename solids by regex and regroup them -> (facets, solids) with one contiguous range per patch.
+
+    ``rules`` is a list of (pattern, new name) pairs, tried in order against
+    the whole solid name (as meshDict/snappyHexMeshDict patch regexes are);
+    unmatched solids keep their name.
+    """
+    compiled = [(re.compile(pattern), new_name) for pattern, new_name in rules]
+
+    def rename(name):
+        for pattern, new_name in compiled:
+            if pattern.fullmatch(name):
+                return new_name
+        return name
+
+    renamed = [(rename(name), start, stop) for name, start, stop in solids]
+    order, merged, start = [], [], 0
+    for name in patch_names(renamed):
+        ranges = [np.arange(first, stop) for solid_name, first, stop in renamed if solid_name == name]
+        order.extend(ranges)
+        count = sum(len(facet_range) for facet_range in ranges)
+        merged.append((name, start, start + count))
+        start += count
+    order = np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+    return np.asarray(facets)[order], merged
+
+ASCII_FACET_TEMPLATE = ("  facet normal %.9g %.9g %.9g\n    outer loop\n" + "      vertex %.9g %.9g %.9g\n" * 3
+                        + "    endloop\n  endfacet\n")
+ASCII_CHUNK_FACETS = 65536  # Facets formatted per write: memory stays bounded however large the solid
+
+def write_solids(filename, facets, solids):
+    """Write every solid as a named block of one multi-solid ASCII STL."""
+    facets = np.asarray(facets, dtype=FACET_DTYPE)
+    with open(filename, "w") as stl_file:
+        for name, start, stop in solids:
+            stl_file.write(f"solid {name}\n")
+            for chunk_start in range(start, stop, ASCII_CHUNK_FACETS):
+                chunk = facets[chunk_start:min(chunk_start + ASCII_CHUNK_FACETS, stop)]
+                values = np.concatenate([chunk["normal"], chunk["vertices"].reshape(-1, 9)], axis=1)
+                stl_file.write(ASCII_FACET_TEMPLATE * len(values) % tuple(values.ravel().tolist()))
+            stl_file.write(f"endsolid {name}\n")
+    return filename
+
+def split_solids(facets, solids, directory, binary=True):
+    """Write one STL per patch into ``directory`` -> list of written files."""
+    os.makedirs(directory, exist_ok=True)
+    facets, merged = merge_solids(facets, solids, [])
+    written = []
+    for name, start, stop in merged:
+        file_name = re.sub(r"[^\w.-]+", "_", name)
+        path = os.path.join(directory, f"{file_name}.stl")
+        if binary:
+            write_binary_stl(path, facets[start:stop], header=f"solid {name}".encode())
+        else:
+            write_solids(path, facets, [(name, start, stop)])
+        written.append(path)
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-patch metrics, splitting and merging of multi-solid STL files.")
+    parser.add_argument("source", help="STL/OBJ file (optionally gzipped or zipped)")
+    parser.add_argument("-m", "--merge", action="append", default=[], metavar="REGEX=NAME",
+                        help="Rename solids matching REGEX to NAME (repeatable)")
+    parser.add_argument("-o", "--output", help="Write the (merged) solids as one multi-solid ASCII STL")
+    parser.add_argument("--split", metavar="DIR", help="Write one binary STL per patch into DIR")
+    args = parser.parse_args(argv)
+
+    facets, solids = read_solids(args.source)
+    if args.merge:
+        facets, solids = merge_solids(facets, solids, [rule.rsplit("=", 1) for rule in args.merge])
+
+    print(f"{'Patch':<32} {'Facets':>10} {'Area':>14} {'Projected':>14}")
+    for name, metrics in patch_metrics(facets, solids).items():
+        print(f"{name:<32} {metrics['Facets']:>10} {metrics['Area']:>14.6g} {metrics['Projected Area']:>14.6g}")
+
+    if args.output:
+        print(f"Solids written: {write_solids(args.output, facets, solids)}")
+    if args.split:
+        for path in split_solids(facets, solids, args.split):
+            print(f"Patch written: {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
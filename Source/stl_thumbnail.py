@@ -0,0 +1,82 @@
+import os
+import threading
+import vtk
+
+# Importing local modules
+from STLReportCache import STLReportCache
+from GeometryCache import session_geometry_cache
+from stl_io import GEOMETRY_SUFFIXES
+
+# ---------------------------------------------------------------------------
+# Off-screen geometry thumbnails.
+# A PNG preview is rendered without an interactive window (no
+# interactor.Start()), in a background thread, and cached by the geometry's
+# content hash so re-importing the same file shows its preview instantly.
+# ---------------------------------------------------------------------------
+
+THUMBNAIL_CACHE_DIR_NAME = ".stl_thumbnail_cache"
+THUMBNAIL_SIZE = (320, 240)
+THUMBNAIL_SURFACE_COLOR = (0.0, 0.6, 0.8)  # Same cyan-blue as the Splash viewer
+THUMBNAIL_BACKGROUND = (1.0, 1.0, 1.0)
+THUMBNAIL_SUFFIXES = GEOMETRY_SUFFIXES
+
+def render_thumbnail(polydata, output_file, size=THUMBNAIL_SIZE):
+    """Render ``polydata`` off-screen from an isometric view and write it as PNG."""
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(polydata)
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    actor.GetProperty().SetColor(*THUMBNAIL_SURFACE_COLOR)
+
+    renderer = vtk.vtkRenderer()
+    renderer.AddActor(actor)
+    renderer.SetBackground(*THUMBNAIL_BACKGROUND)
+    camera = renderer.GetActiveCamera()
+    camera.Azimuth(30)
+    camera.Elevation(30)
+    renderer.ResetCamera()
+
+    render_window = vtk.vtkRenderWindow()
+    render_window.SetOffScreenRendering(1)
+    render_window.SetSize(*size)
+    render_window.AddRenderer(renderer)
+    render_window.Render()
+
+    capture = vtk.vtkWindowToImageFilter()
+    capture.SetInput(render_window)
+    capture.Update()
+
+    # Write next to the target and rename, so a reader never sees a half-written PNG
+    temp_file = f"{output_file}.tmp.png"
+    writer = vtk.vtkPNGWriter()
+    writer.SetFileName(temp_file)
+    writer.SetInputConnection(capture.GetOutputPort())
+    writer.Write()
+    render_window.Finalize()
+    os.replace(temp_file, output_file)
+    return output_file
+
+def thumbnail_path(filename, cache_dir=None, size=THUMBNAIL_SIZE):
+    """Cached PNG preview of a geometry file, rendered on the first request."""
+    cache_dir = cache_dir or os.path.abspath(THUMBNAIL_CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    content_hash = STLReportCache(cache_dir).content_hash(filename)
+    path = os.path.join(cache_dir, f"{content_hash}_{size[0]}x{size[1]}.png")
+    if not os.path.exists(path):
+        render_thumbnail(session_geometry_cache().polydata(filename), path, size)
+    return path
+
+def render_thumbnail_async(filename, on_complete, on_error=None, cache_dir=None, size=THUMBNAIL_SIZE):
+    """thumbnail_path() in a daemon thread; the callbacks run on that thread."""
+    def worker():
+        try:
+            path = thumbnail_path(filename, cache_dir, size)
+        except Exception as error:
+            if on_error is not None:
+                on_error(error)
+            return
+        on_complete(path)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,264 @@
+import numpy as np
+
+# Importing local modules
+from GeometryCache import session_geometry_cache
+
+# ---------------------------------------------------------------------------
+# Vectorized topology checks for triangle soups (STL facets).
+# Corners are welded into vertex ids, every facet edge becomes a sorted
+# vertex-pair key, and np.unique on those keys gives the edge use counts:
+#   1 use  -> open (boundary) edge
+#   2 uses -> manifold edge shared by two facets
+#   3+     -> non-manifold edge
+# Everything is sorting and array indexing, so the cost is O(n log n).
+# ---------------------------------------------------------------------------
+
+def _sorted_groups(keys):
+    # (group id per key, sort order, group count) for a 1-D key array, from a single argsort
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    new_group = np.empty(len(keys), dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    group_ids = np.empty(len(keys), dtype=np.int64)
+    group_ids[order] = np.cumsum(new_group) - 1
+    return group_ids, order, int(new_group.sum())
+
+def _group_rows(words):
+    # Group ids for equal rows of an (n, k) uint32 array. Words are folded into
+    # 64-bit keys (previous group id << 32 | next word), so k words cost k - 1
+    # integer sorts, much faster than np.lexsort or np.unique(axis=0)
+    keys = words[:, 0].astype(np.uint64)
+    group_ids, group_count = keys.astype(np.int64), len(words)
+    for column in words.T[1:]:
+        keys = (keys << np.uint64(32)) | column.astype(np.uint64)
+        group_ids, _, group_count = _sorted_groups(keys)
+        keys = group_ids.astype(np.uint64)
+    if words.shape[1] == 1:
+        group_ids, _, group_count = _sorted_groups(keys)
+    return group_ids, group_count
+
+def weld_vertices(triangles, tolerance=0.0):
+    """Map the (n, 3, 3) corners to shared vertex ids -> ((n, 3) ids, vertex count).
+
+    With tolerance 0 corners are merged only when bit-identical (STL exporters
+    repeat coordinates exactly); otherwise they are snapped to a grid first.
+    """
+    points = np.asarray(triangles).reshape(-1, 3)
+    if tolerance > 0:
+        points = np.round(points / tolerance).astype(np.int64)
+    else:
+        # Adding 0.0 turns -0.0 into 0.0 so both weld together
+        points = points + points.dtype.type(0)
+    # Explicit word count per point: -1 cannot be inferred for an empty mesh
+    words = np.ascontiguousarray(points).view(np.uint32).reshape(len(points), 3 * points.itemsize // 4)
+    vertex_ids, vertex_count = _group_rows(words)
+    return vertex_ids.reshape(-1, 3), vertex_count
+
+def connected_components(node_count, first, second):
+    """Component label per node for the undirected edges (first[i], second[i])."""
+    labels = np.arange(node_count)
+    while len(first):
+        # Hook: every root takes the smallest root it is connected to ...
+        root_first, root_second = labels[first], labels[second]
+        if np.array_equal(root_first, root_second):
+            break
+        lowest = np.minimum(root_first, root_second)
+        np.minimum.at(labels, root_first, lowest)
+        np.minimum.at(labels, root_second, lowest)
+        # ... then pointer jumping flattens the trees back to roots
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    return np.unique(labels, return_inverse=True)[1]
+
+def build_topology(triangles, tolerance=0.0):
+    """Weld the facets and derive edge, duplicate and shell information.
+
+    Returns a dict of arrays shared by summarize_topology and the orientation
+    checks: welded ``vertex_ids``, ``collapsed`` facets (two corners welded
+    together), per-edge-use ``edge_facets``/``edge_ids``/``edge_flipped``,
+    ``edge_counts`` per unique edge, and ``shell_ids`` per facet.
+    """
+    triangles = np.asarray(triangles)
+    facet_count = len(triangles)
+    vertex_ids, vertex_count = weld_vertices(triangles, tolerance)
+    collapsed = ((vertex_ids[:, 0] == vertex_ids[:, 1]) | (vertex_ids[:, 1] == vertex_ids[:, 2])
+                 | (vertex_ids[:, 0] == vertex_ids[:, 2]))
+
+    # Directed edges p0->p1, p1->p2, p2->p0 of every facet that still is a triangle
+    valid = np.flatnonzero(~collapsed)
+    starts = vertex_ids[valid].reshape(-1)
+    ends = vertex_ids[valid][:, [1, 2, 0]].reshape(-1)
+    edge_facets = np.repeat(valid, 3)
+    edge_keys = np.minimum(starts, ends) * np.int64(vertex_count) + np.maximum(starts, ends)
+    edge_ids, order, edge_count = _sorted_groups(edge_keys)
+    edge_counts = np.bincount(edge_ids, minlength=edge_count)
+
+    # Facets that use the same edge are neighbours: link consecutive uses of each edge
+    same_edge = edge_ids[order[1:]] == edge_ids[order[:-1]]
+    shell_labels = connected_components(facet_count, edge_facets[order[:-1][same_edge]],
+                                        edge_facets[order[1:][same_edge]])
+    shell_ids = np.full(facet_count, -1, dtype=np.int64)
+    if len(valid):
+        shell_ids[valid] = np.unique(shell_labels[valid], return_inverse=True)[1].reshape(-1)
+
+    # Duplicates: same three welded vertices, in any order
+    facet_keys = np.sort(vertex_ids[valid], axis=1).astype(np.uint32)
+    _, unique_facets = _group_rows(facet_keys)
+
+    return {
+        "vertex_ids": vertex_ids,
+        "vertex_count": vertex_count,
+        "collapsed": collapsed,
+        "edge_facets": edge_facets,
+        "edge_ids": edge_ids,
+        "edge_flipped": starts > ends,
+        "edge_counts": edge_counts,
+        "edge_order": order,
+        "duplicate_facets": len(valid) - unique_facets,
+        "shell_ids": shell_ids,
+        "shell_count": int(shell_ids.max()) + 1 if len(valid) else 0,
+    }
+
+def summarize_topology(topology, areas=None):
+    """Report fields for the topology dict; ``areas`` adds zero-area facets to the degenerate count."""
+    edge_counts = topology["edge_counts"]
+    degenerate = topology["collapsed"]
+    if areas is not None:
+        degenerate = degenerate | (np.asarray(areas) == 0)
+    open_edges = int(np.count_nonzero(edge_counts == 1))
+    non_manifold_edges = int(np.count_nonzero(edge_counts > 2))
+    return {
+        "Welded Vertices": topology["vertex_count"],
+        "Edges": int(len(edge_counts)),
+        "Open Edges": open_edges,
+        "Non-manifold Edges": non_manifold_edges,
+        "Duplicate Facets": int(topology["duplicate_facets"]),
+        "Degenerate Facets": int(np.count_nonzero(degenerate)),
+        "Shells": topology["shell_count"],
+        "Watertight": open_edges == 0 and non_manifold_edges == 0,
+    }
+
+def file_topology(filename, tolerance=0.0):
+    """(triangles, topology) of an STL file, kept in the session geometry cache while the file is unchanged."""
+    cache = session_geometry_cache()
+    triangles = cache.triangles(filename)
+    return triangles, cache.get(filename, f"topology:{tolerance}", lambda: build_topology(triangles, tolerance))
+
+def check_topology(triangles, tolerance=0.0, areas=None):
+    """One-call topology report for an (n, 3, 3) triangle array."""
+    return summarize_topology(build_topology(triangles, tolerance), areas)
+
+# ---------------------------------------------------------------------------
+# Orientation: winding consistency (BFS over manifold edges) and the global
+# inside/outside decision (signed volume of every closed patch)
+# ---------------------------------------------------------------------------
+def edge_groups(topology):
+    """(use order, group start) such that order[start[e]:start[e] + count[e]] are the uses of edge e."""
+    order = topology["edge_order"]
+    group_starts = np.r_[0, np.cumsum(topology["edge_counts"])[:-1]]
+    return order, group_starts
+
+def edge_vertices(topology, uses):
+    # Welded (start, end) vertex ids of the given edge uses (uses are numbered 3 per valid facet)
+    facets = topology["edge_facets"][uses]
+    corners = uses % 3
+    vertex_ids = topology["vertex_ids"]
+    return vertex_ids[facets, corners], vertex_ids[facets, (corners + 1) % 3]
+
+def manifold_facet_pairs(topology):
+    """(first facet, second facet, same winding) for every edge shared by exactly two facets.
+
+    Two neighbours are wound consistently when they traverse the shared edge
+    in opposite directions.
+    """
+    order, group_starts = edge_groups(topology)
+    first_use = group_starts[topology["edge_counts"] == 2]
+    first, second = order[first_use], order[first_use + 1]
+    flipped = topology["edge_flipped"]
+    edge_facets = topology["edge_facets"]
+    return edge_facets[first], edge_facets[second], flipped[first] == flipped[second]
+
+def _bfs_parity(node_count, first, second, parity, seeds):
+    # Level-synchronous BFS over a CSR adjacency: flip[n] = flip[parent] ^ parity(edge).
+    # Each level is a handful of array operations, so the Python loop runs once
+    # per BFS level, not once per facet.
+    sources = np.r_[first, second]
+    targets = np.r_[second, first]
+    edge_parity = np.r_[parity, parity]
+    order = np.argsort(sources, kind="stable")
+    targets, edge_parity = targets[order], edge_parity[order]
+    indptr = np.r_[0, np.cumsum(np.bincount(sources, minlength=node_count))]
+
+    flip = np.full(node_count, -1, dtype=np.int8)
+    flip[seeds] = 0
+    frontier = seeds
+    while len(frontier):
+        counts = indptr[frontier + 1] - indptr[frontier]
+        total = int(counts.sum())
+        if not total:
+            break
+        offsets = np.repeat(indptr[frontier] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        neighbours = targets[offsets]
+        neighbour_flip = np.repeat(flip[frontier], counts) ^ edge_parity[offsets]
+        unseen = flip[neighbours] < 0
+        neighbours, first_seen = np.unique(neighbours[unseen], return_index=True)
+        flip[neighbours] = neighbour_flip[unseen][first_seen]
+        frontier = neighbours
+    return flip
+
+def analyze_orientation(triangles, topology):
+    """Find the facets whose winding must be reversed for a consistent, outward surface.
+
+    Facets are grouped into patches connected through manifold edges. Inside a
+    patch a BFS fixes the relative winding; closed patches are then turned so
+    their signed volume is positive, open ones keep the majority winding.
+    Returns (summary dict, boolean flip mask per facet).
+    """
+    triangles = np.asarray(triangles, dtype=np.float64)
+    facet_count = len(triangles)
+    first, second, same_winding = manifold_facet_pairs(topology)
+    parity = same_winding.astype(np.int8)
+
+    valid = ~topology["collapsed"]
+    patch_ids = connected_components(facet_count, first, second)
+    patch_count = int(patch_ids.max()) + 1 if facet_count else 0
+    seeds = np.unique(patch_ids[valid], return_index=True)[1]
+    seeds = np.flatnonzero(valid)[seeds]
+    relative_flip = _bfs_parity(facet_count, first, second, parity, seeds) > 0
+
+    # Edges still wound the same way after the BFS cannot be fixed (e.g. a Moebius strip)
+    unresolved = int(np.count_nonzero(relative_flip[first] ^ relative_flip[second] ^ same_winding))
+
+    # Global orientation per patch from the signed volume of the corrected winding
+    p1, p2, p3 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    signed_volumes = np.einsum('ij,ij->i', p1, np.cross(p2, p3)) / 6
+    signed_volumes[~valid] = 0.0
+    corrected = np.where(relative_flip, -signed_volumes, signed_volumes)
+    patch_volumes = np.bincount(patch_ids, weights=corrected, minlength=patch_count)
+
+    # A patch is closed when none of its edges is open or non-manifold
+    edge_counts = topology["edge_counts"][topology["edge_ids"]]
+    open_patch = np.zeros(patch_count, dtype=bool)
+    open_patch[patch_ids[topology["edge_facets"][edge_counts != 2]]] = True
+    patch_sizes = np.bincount(patch_ids[valid], minlength=patch_count)
+    patch_flips = np.bincount(patch_ids[valid], weights=relative_flip[valid], minlength=patch_count)
+    closed = ~open_patch & (patch_sizes > 0)
+    invert_patch = np.where(closed, patch_volumes < 0, patch_flips > patch_sizes / 2)
+
+    flip = (relative_flip ^ invert_patch[patch_ids]) & valid
+    # A closed patch is inverted when most of its facets, as stored in the file, face inward
+    patch_flipped = np.bincount(patch_ids[valid], weights=flip[valid], minlength=patch_count)
+    summary = {
+        "Consistent": not np.any(same_winding),
+        "Inconsistent Edges": int(np.count_nonzero(same_winding)),
+        "Unresolvable Edges": unresolved,
+        "Patches": int(np.count_nonzero(patch_sizes)),
+        "Closed Patches": int(np.count_nonzero(closed)),
+        "Inverted Closed Patches": int(np.count_nonzero(closed & (patch_flipped > patch_sizes / 2))),
+        "Facets To Flip": int(np.count_nonzero(flip)),
+    }
+    return summary, flip
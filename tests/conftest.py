@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The Source modules import each other by bare name, as when Splash runs from Source/
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPOSITORY, "Source"))
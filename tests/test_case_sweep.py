@@ -0,0 +1,126 @@
+import os
+import csv
+import json
+import pytest
+
+import case_sweep
+from case_sweep import SweepParameter, grid_design, latin_hypercube, load_spec, generate_sweep
+from DictionaryCache import DictionaryCache
+
+HEADER = "FoamFile\n{\n    version 2.0;\n    format ascii;\n    class dictionary;\n}\n"
+MESH_DICT = HEADER + "maxCellSize 0.2;\nboundaryLayers\n{\n    nLayers 3;\n    patchBoundaryLayers\n    {\n        wall\n        {\n            nLayers 5;\n        }\n    }\n}\n"
+TRANSPORT = HEADER + "nu [0 2 -1 0 0 0 0] 1e-05;\n"
+CONTROL_DICT = HEADER + "application simpleFoam;\nendTime 100;\n"
+
+@pytest.fixture(autouse=True)
+def private_cache(monkeypatch):
+    # Every test parses the files it wrote, not a copy left over from another test
+    monkeypatch.setattr(case_sweep, "session_dictionary_cache", lambda cache=DictionaryCache(): cache)
+
+@pytest.fixture
+def base_case(tmp_path):
+    case = tmp_path / "base"
+    files = {"system/meshDict": MESH_DICT, "system/controlDict": CONTROL_DICT,
+             "constant/transportProperties": TRANSPORT, "constant/triSurface/body.stl": "solid body\nendsolid body\n",
+             "constant/triSurface/body.eMesh": "edges\n", "0/U": "internalField uniform (0 0 0);\n",
+             "100/U": "result\n", "processor0/boundary": "result\n"}
+    for name, text in files.items():
+        (case / name).parent.mkdir(parents=True, exist_ok=True)
+        (case / name).write_text(text)
+    return case
+
+def read(path):
+    with open(path) as file:
+        return file.read()
+
+def test_parameter_spec_errors():
+    with pytest.raises(ValueError):
+        SweepParameter("system/controlDict", [1])
+    with pytest.raises(ValueError):
+        SweepParameter("system/controlDict:endTime", {"min": 1})
+    with pytest.raises(ValueError):
+        SweepParameter("constant/transportProperties:nu", {"min": 0, "max": 1, "log": True})
+    with pytest.raises(ValueError):
+        SweepParameter("system/controlDict:endTime", {"min": 1, "max": 2}).grid_values()
+
+def test_grid_design_is_full_factorial():
+    parameters = [SweepParameter("a:x", [1, 2]), SweepParameter("a:y", {"min": 1, "max": 100, "levels": 3, "log": True}),
+                  SweepParameter("a:z", {"min": 0, "max": 1, "levels": 3, "integer": True})]
+    design = grid_design(parameters)
+    # The integer range collapses to two distinct levels
+    assert len(design) == 2 * 3 * 2
+    assert sorted({row[1] for row in design}) == pytest.approx([1, 10, 100])
+    assert {row[2] for row in design} == {0, 1}
+
+def test_latin_hypercube_has_one_sample_per_stratum():
+    parameters = [SweepParameter("a:x", {"min": 0, "max": 10}), SweepParameter("a:y", {"min": 1e-6, "max": 1e-2, "log": True}),
+                  SweepParameter("a:z", ["low", "mid", "high", "max"])]
+    design = latin_hypercube(parameters, 8, seed=4)
+    assert design == latin_hypercube(parameters, 8, seed=4)
+    x = sorted(row[0] for row in design)
+    assert [int(value // (10 / 8)) for value in x] == list(range(8))
+    assert all(1e-6 <= row[1] <= 1e-2 for row in design)
+    assert sorted(row[2] for row in design) == sorted(["low", "mid", "high", "max"] * 2)
+
+def test_load_spec(tmp_path):
+    spec = tmp_path / "sweep.json"
+    spec.write_text(json.dumps({"method": "lhs", "samples": 5, "seed": 2,
+                                "parameters": {"system/controlDict:endTime": {"min": 10, "max": 50, "integer": True}}}))
+    parameters, design = load_spec(str(spec))
+    assert [parameter.key for parameter in parameters] == ["endTime"]
+    assert len(design) == 5
+    spec.write_text(json.dumps({"method": "sobol", "parameters": {"a:x": [1]}}))
+    with pytest.raises(ValueError):
+        load_spec(str(spec))
+
+def test_sweep_writes_every_variant(base_case, tmp_path):
+    parameters = [SweepParameter("system/controlDict:endTime", [200, 300]),
+                  SweepParameter("constant/transportProperties:nu", {"values": [1e-6], "format": "[0 2 -1 0 0 0 0] {}"})]
+    output = tmp_path / "sweep"
+    case_dirs = generate_sweep(str(base_case), parameters, grid_design(parameters), str(output))
+    assert [os.path.basename(case_dir) for case_dir in case_dirs] == ["base_0", "base_1"]
+    for case_dir, end_time in zip(case_dirs, ["200", "300"]):
+        assert read(os.path.join(case_dir, "system/controlDict")) == CONTROL_DICT.replace("100;", f"{end_time};")
+        assert read(os.path.join(case_dir, "constant/transportProperties")) == TRANSPORT.replace("1e-05", "1e-06")
+        # Run results are not copied
+        assert sorted(os.listdir(case_dir)) == ["0", "constant", "system"]
+    # The base case is untouched
+    assert read(base_case / "system/controlDict") == CONTROL_DICT
+    with open(output / "sweep.csv") as manifest:
+        assert list(csv.reader(manifest)) == [["Case", "system/controlDict:endTime", "constant/transportProperties:nu"],
+                                              ["base_0", "200", "[0 2 -1 0 0 0 0] 1e-06"],
+                                              ["base_1", "300", "[0 2 -1 0 0 0 0] 1e-06"]]
+    with pytest.raises(FileExistsError):
+        generate_sweep(str(base_case), parameters, grid_design(parameters), str(output))
+
+def test_only_surfaces_are_hard_linked(base_case, tmp_path):
+    parameters = [SweepParameter("system/controlDict:endTime", [200])]
+    case_dir, = generate_sweep(str(base_case), parameters, grid_design(parameters), str(tmp_path / "sweep"))
+    surface = os.path.join(case_dir, "constant/triSurface/body.stl")
+    assert os.path.samefile(surface, base_case / "constant/triSurface/body.stl")
+    # Files the meshing tools rewrite in place are always copies
+    for name in ("constant/triSurface/body.eMesh", "system/meshDict", "0/U"):
+        assert not os.path.samefile(os.path.join(case_dir, name), base_case / name)
+
+def test_mesh_sweep_links_nothing_and_edits_every_occurrence(base_case, tmp_path):
+    parameters = [SweepParameter("system/meshDict:nLayers", [2])]
+    case_dir, = generate_sweep(str(base_case), parameters, grid_design(parameters), str(tmp_path / "sweep"))
+    surface = os.path.join(case_dir, "constant/triSurface/body.stl")
+    assert not os.path.samefile(surface, base_case / "constant/triSurface/body.stl")
+    assert read(os.path.join(case_dir, "system/meshDict")) == MESH_DICT.replace("nLayers 3;", "nLayers 2;").replace("nLayers 5;", "nLayers 2;")
+
+def test_dotted_key_edits_one_entry(base_case, tmp_path):
+    parameters = [SweepParameter("system/meshDict:boundaryLayers.patchBoundaryLayers.wall.nLayers", [7])]
+    case_dir, = generate_sweep(str(base_case), parameters, grid_design(parameters), str(tmp_path / "sweep"))
+    assert read(os.path.join(case_dir, "system/meshDict")) == MESH_DICT.replace("nLayers 5;", "nLayers 7;")
+
+def test_unknown_key_fails_before_writing(base_case, tmp_path):
+    parameters = [SweepParameter("system/controlDict:endTime", [200]), SweepParameter("system/meshDict:boundaryLayers", [1])]
+    with pytest.raises(KeyError):
+        generate_sweep(str(base_case), parameters, grid_design(parameters), str(tmp_path / "sweep"))
+    assert not (tmp_path / "sweep").exists()
+
+def test_output_inside_the_base_case(base_case):
+    parameters = [SweepParameter("system/controlDict:endTime", [200, 300])]
+    case_dirs = generate_sweep(str(base_case), parameters, grid_design(parameters), str(base_case / "sweep"))
+    assert sorted(os.listdir(case_dirs[1])) == ["0", "constant", "system"]
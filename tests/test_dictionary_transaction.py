@@ -0,0 +1,93 @@
+import os
+import pytest
+
+import DictionaryTransaction as transaction_module
+from DictionaryCache import DictionaryCache
+from DictionaryTransaction import DictionaryTransaction, DictionaryTransactionError
+
+CONTROL_DICT = "endTime 100;\ndeltaT 1;\n"
+TRANSPORT = "nu [0 2 -1 0 0 0 0] 1e-05; // air\n"
+FV_SOLUTION = "SIMPLE\n{\n    nNonOrthogonalCorrectors 0;\n}\n"
+
+@pytest.fixture
+def case(tmp_path):
+    files = {"controlDict": CONTROL_DICT, "transportProperties": TRANSPORT, "fvSolution": FV_SOLUTION}
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    return tmp_path, files
+
+def contents(directory):
+    return {name: (directory / name).read_text() for name in os.listdir(directory)}
+
+def test_commit_writes_every_file(case):
+    directory, files = case
+    transaction = DictionaryTransaction(DictionaryCache())
+    transaction.update_keys(directory / "controlDict", {"endTime": 200})
+    transaction.set(directory / "transportProperties", "nu", "[0 2 -1 0 0 0 0] 1.5e-05")
+    transaction.edit(directory / "fvSolution")  # Staged but unchanged: not rewritten
+    changed = transaction.commit()
+    assert changed == {str(directory / "controlDict"): ["endTime"], str(directory / "transportProperties"): ["nu"]}
+    assert contents(directory) == {"controlDict": "endTime 200;\ndeltaT 1;\n",
+                                   "transportProperties": "nu [0 2 -1 0 0 0 0] 1.5e-05; // air\n",
+                                   "fvSolution": FV_SOLUTION}
+
+def test_commit_stores_the_written_documents(case):
+    directory, files = case
+    cache = DictionaryCache()
+    with DictionaryTransaction(cache) as transaction:
+        transaction.update_keys(directory / "controlDict", {"endTime": 300})
+    # The next read comes from the cache, already at the new text
+    assert cache.get(directory / "controlDict").get("endTime") == "300"
+
+def test_failed_replace_rolls_back_every_file(case, monkeypatch):
+    directory, files = case
+    transaction = DictionaryTransaction(DictionaryCache())
+    transaction.update_keys(directory / "controlDict", {"endTime": 200})
+    transaction.update_keys(directory / "transportProperties", {"nu": "[0 2 -1 0 0 0 0] 2e-05"})
+    transaction.update_keys(directory / "fvSolution", {"nNonOrthogonalCorrectors": 2})
+
+    replace = os.replace
+    calls = []
+    def failing_replace(source, target):
+        # The second file to be swapped in fails; the first one must be put back
+        if not source.endswith(".bak"):
+            calls.append(target)
+            if len(calls) == 2:
+                raise OSError(28, "No space left on device", target)
+        replace(source, target)
+    monkeypatch.setattr(transaction_module.os, "replace", failing_replace)
+
+    with pytest.raises(DictionaryTransactionError) as error:
+        transaction.commit()
+    assert list(error.value.problems) == [calls[1]]
+    assert contents(directory) == files  # No temporary or backup files left either
+
+def test_file_changed_on_disk_fails_validation(case):
+    directory, files = case
+    transaction = DictionaryTransaction(DictionaryCache())
+    transaction.update_keys(directory / "controlDict", {"endTime": 200})
+    transaction.update_keys(directory / "fvSolution", {"nNonOrthogonalCorrectors": 2})
+    (directory / "fvSolution").write_text(FV_SOLUTION + "// edited elsewhere\n")
+
+    with pytest.raises(DictionaryTransactionError) as error:
+        transaction.commit()
+    assert list(error.value.problems) == [str(directory / "fvSolution")]
+    assert (directory / "controlDict").read_text() == CONTROL_DICT
+
+def test_unparsable_edit_fails_validation(case):
+    directory, files = case
+    transaction = DictionaryTransaction(DictionaryCache())
+    transaction.update_keys(directory / "controlDict", {"endTime": "100 /* open comment"})
+    transaction.update_keys(directory / "transportProperties", {"nu": "[0 2 -1 0 0 0 0] 2e-05"})
+    with pytest.raises(DictionaryTransactionError):
+        transaction.commit()
+    assert contents(directory) == files
+
+def test_exception_in_block_discards_the_edits(case):
+    directory, files = case
+    with pytest.raises(RuntimeError):
+        with DictionaryTransaction(DictionaryCache()) as transaction:
+            transaction.update_keys(directory / "controlDict", {"endTime": 200})
+            raise RuntimeError("cancelled")
+    assert transaction.documents == {}
+    assert contents(directory) == files
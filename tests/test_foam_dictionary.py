@@ -0,0 +1,241 @@
+import os
+import glob
+import difflib
+import pytest
+
+from conftest import REPOSITORY
+from FoamDictionary import FoamDictionary, FoamDictionaryError, Entry, Directive, Dictionary, tokenize
+
+def case_dictionaries():
+    # Every OpenFOAM dictionary shipped with the templates and example cases
+    files = []
+    for path in glob.glob(os.path.join(REPOSITORY, "Resources", "**", "*"), recursive=True) + \
+            glob.glob(os.path.join(REPOSITORY, "Meshing", "**", "*"), recursive=True):
+        if os.path.isfile(path) and not path.endswith((".stl", ".png", ".jpg", ".ico", ".gif")):
+            with open(path, "rb") as dict_file:
+                if b"FoamFile" in dict_file.read():
+                    files.append(path)
+    return sorted(files)
+
+def changed_lines(before, after):
+    # Lines removed and added between two texts
+    diff = list(difflib.ndiff(before.splitlines(True), after.splitlines(True)))
+    return [line for line in diff if line[:1] == "-"], [line for line in diff if line[:1] == "+"]
+
+MESH_DICT = """FoamFile
+{
+    version 2.0;   // header
+    object  meshDict;
+}
+
+maxCellSize 0.2; // coarse
+
+boundaryLayers
+{
+    nLayers 3;
+    patchBoundaryLayers
+    {
+        "inlet.*"
+        {
+            nLayers 5;
+        }
+        outlet { nLayers 4; }
+    }
+}
+
+/* keep this block
+   as it is */
+workflowControl
+{
+    stopAfter edgeExtraction;
+}
+"""
+
+# ------------------------------- Round trip ---------------------------------
+def test_template_dictionaries_are_found():
+    assert len(case_dictionaries()) > 40
+
+@pytest.mark.parametrize("path", case_dictionaries(), ids=lambda path: os.path.relpath(path, REPOSITORY))
+def test_template_dictionary_round_trip(path):
+    with open(path, "r", newline="") as dict_file:
+        text = dict_file.read()
+    document = FoamDictionary.read(path)
+    assert "".join(token.text for token in tokenize(text)) == text
+    assert document.root.text() == text
+    assert document.text() == text
+
+@pytest.mark.parametrize("path", case_dictionaries()[:5], ids=lambda path: os.path.basename(path))
+def test_crlf_round_trip_and_edit(path, tmp_path):
+    with open(path, "r") as dict_file:
+        text = dict_file.read().replace("\n", "\r\n")
+    target = tmp_path / "dict"
+    target.write_bytes(text.encode())
+    document = FoamDictionary.read(str(target))
+    assert document.text() == text
+    document.write()
+    assert target.read_bytes() == text.encode()
+
+def test_unterminated_comment_is_an_error():
+    with pytest.raises(FoamDictionaryError, match="line 2"):
+        FoamDictionary("a 1;\n/* never closed\nb 2;\n")
+
+def test_missing_brace_is_an_error():
+    with pytest.raises(FoamDictionaryError):
+        FoamDictionary("a { b 1;\n")
+
+# --------------------------------- Lookup -----------------------------------
+def test_nested_and_regex_lookup():
+    document = FoamDictionary(MESH_DICT)
+    assert document.get("maxCellSize") == "0.2"
+    assert document.get("boundaryLayers.nLayers") == "3"
+    assert document.get("boundaryLayers.patchBoundaryLayers.outlet.nLayers") == "4"
+    # A quoted regex key matches literal names, as OpenFOAM resolves it
+    assert document.get("boundaryLayers.patchBoundaryLayers.inlet1.nLayers") == "5"
+    assert document.get('boundaryLayers.patchBoundaryLayers."inlet.*".nLayers') == "5"
+    assert isinstance(document.get("workflowControl"), Dictionary)
+    assert document.get("missing.key", "default") == "default"
+    assert "boundaryLayers.nLayers" in document and "nLayers" not in document
+
+def test_values_read_the_last_definition():
+    document = FoamDictionary("a 1;\nb { a 2; }\nc 3;\na 4;\n")
+    assert document.values(["a", "c", "missing"]) == {"a": "4", "c": "3"}
+    assert document.values(["a"], scope="b") == {"a": "2"}
+
+def test_macros_and_directives_are_kept_but_not_indexed():
+    text = ('#include "initialConditions"\n'
+            "internalField uniform $flowVelocity;\n"
+            "#includeEtc \"caseDicts/setConstraintTypes\"\n"
+            "code\n#{\n    int x = 1; // {\n#};\n"
+            "boundaryField\n{\n    inlet { type fixedValue; value $internalField; }\n}\n")
+    document = FoamDictionary(text)
+    assert document.text() == text
+    assert [node.key for node in document.root.parts if isinstance(node, Directive)] == [
+        '#include', '#includeEtc']
+    assert document.get("internalField") == "uniform $flowVelocity"
+    assert document.get("boundaryField.inlet.value") == "$internalField"
+    assert document.find("#include") is None
+
+# --------------------------------- Editing ----------------------------------
+def test_set_in_nested_scope_changes_one_line():
+    document = FoamDictionary(MESH_DICT)
+    assert document.set("boundaryLayers.patchBoundaryLayers.outlet.nLayers", 6)
+    removed, added = changed_lines(MESH_DICT, document.text())
+    assert removed == ["-         outlet { nLayers 4; }\n"]
+    assert added == ["+         outlet { nLayers 6; }\n"]
+    assert document.changed == ["boundaryLayers.patchBoundaryLayers.outlet.nLayers"]
+    assert not document.set("boundaryLayers.patchBoundaryLayers.outlet.nLayers", 6)
+
+def test_set_keeps_comments_around_the_value():
+    text = "nu  [0 2 -1 0 0 0 0] /* old */ 1e-05; // air\n"
+    document = FoamDictionary(text)
+    document.set("nu", "[0 2 -1 0 0 0 0] 1.5e-05")
+    assert document.text() == "nu  [0 2 -1 0 0 0 0] 1.5e-05; // air\n"
+    document = FoamDictionary("maxCellSize 0.2; // coarse\n")
+    document.set("maxCellSize", 0.1)
+    assert document.text() == "maxCellSize 0.1; // coarse\n"
+
+def test_set_formats_python_values():
+    document = FoamDictionary("a 1;\nb 2;\n")
+    document.update({"a": True, "b": [1, 2.5, "x"]})
+    assert document.text() == "a true;\nb (1 2.5 x);\n"
+
+def test_set_missing_key_and_sub_dictionary():
+    document = FoamDictionary(MESH_DICT)
+    with pytest.raises(KeyError):
+        document.set("boundaryLayers.nSurfaceLayers", 2)
+    with pytest.raises(FoamDictionaryError):
+        document.set("workflowControl", 1)
+    assert document.text() == MESH_DICT
+
+def test_create_missing_key_adds_one_line():
+    document = FoamDictionary(MESH_DICT)
+    document.set("boundaryLayers.nSurfaceLayers", 2, create=True)
+    document.set("minCellSize", 0.05, create=True)
+    text = document.text()
+    removed, added = changed_lines(MESH_DICT, text)
+    assert removed == []
+    assert added == ["+     nSurfaceLayers 2;\n", "+ minCellSize 0.05;\n"]
+    assert text.index("patchBoundaryLayers") < text.index("nSurfaceLayers") < text.index("/* keep")
+    reparsed = FoamDictionary(text)
+    assert reparsed.get("boundaryLayers.nSurfaceLayers") == "2"
+    assert reparsed.get("minCellSize") == "0.05"
+
+def test_create_in_empty_scope_goes_before_closing_whitespace():
+    text = "/* header */\nmixture\n{\n}\n"
+    document = FoamDictionary(text)
+    document.set("mixture.molWeight", 28.9, create=True)
+    assert document.text() == "/* header */\nmixture\n{\n    molWeight 28.9;\n}\n"
+    document = FoamDictionary("/* header */\n")
+    document.set("application", "simpleFoam", create=True)
+    assert document.text() == "/* header */\napplication simpleFoam;\n"
+
+def test_create_keeps_trailing_comment_with_its_entry():
+    document = FoamDictionary("m\n{\n    a 1; // air\n}\n")
+    document.set("m.b", 2, create=True)
+    assert document.text() == "m\n{\n    a 1; // air\n    b 2;\n}\n"
+
+def test_create_below_an_entry_is_an_error():
+    document = FoamDictionary("a 1;\n")
+    with pytest.raises(FoamDictionaryError):
+        document.set("a.b", 2, create=True)
+
+def test_update_keys_sets_every_occurrence():
+    document = FoamDictionary(MESH_DICT)
+    assert document.update_keys({"nLayers": 7, "maxCellSize": 0.2, "missing": 1}) == ["nLayers"]
+    reparsed = FoamDictionary(document.text())
+    assert [node.value for node in reparsed.find_all("nLayers")] == ["7", "7", "7"]
+
+def test_update_keys_in_scope():
+    document = FoamDictionary(MESH_DICT)
+    document.update_keys({"nLayers": 9}, scope="boundaryLayers.patchBoundaryLayers")
+    assert [node.value for node in document.find_all("nLayers")] == ["3", "9", "9"]
+
+def test_comment_out_keeps_the_file_parsable():
+    document = FoamDictionary(MESH_DICT)
+    for node in document.find_all("nLayers"):
+        document.comment_out(node)
+    document.comment_out("maxCellSize")
+    text = document.text()
+    assert "// maxCellSize 0.2; // coarse" in text
+    assert "outlet { // nLayers 4;\n }" in text
+    reparsed = FoamDictionary(text)
+    assert reparsed.find_all("nLayers") == [] and "maxCellSize" not in reparsed
+    assert reparsed.get("workflowControl.stopAfter") == "edgeExtraction"
+
+def test_comment_out_a_created_entry():
+    document = FoamDictionary("m\n{\n    a 1;\n}\n")
+    document.set("m.b", 2, create=True)
+    document.comment_out("m.b")
+    assert document.text() == "m\n{\n    a 1;\n    // b 2;\n}\n"
+
+def test_several_edits_splice_into_the_source():
+    document = FoamDictionary(MESH_DICT)
+    document.update({"maxCellSize": 0.1, "workflowControl.stopAfter": "boundaryLayerGeneration"})
+    document.set("boundaryLayers.nLayers", 2)
+    removed, added = changed_lines(MESH_DICT, document.text())
+    assert len(removed) == len(added) == 3
+    assert document.changed == ["maxCellSize", "workflowControl.stopAfter", "boundaryLayers.nLayers"]
+
+# --------------------------------- Writing ----------------------------------
+def test_write_is_atomic_and_keeps_the_mode(tmp_path):
+    target = tmp_path / "controlDict"
+    target.write_text("endTime 100;\n")
+    os.chmod(target, 0o640)
+    document = FoamDictionary.read(str(target))
+    assert not document.write()
+    document.set("endTime", 200)
+    assert document.write()
+    assert target.read_text() == "endTime 200;\n"
+    assert os.stat(target).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["controlDict"]
+    # The written text is the new source
+    assert document.edits == {} and document.source == "endTime 200;\n"
+
+def test_write_to_a_new_path_uses_the_umask(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        document = FoamDictionary("a 1;\n")
+        document.write(str(tmp_path / "new"))
+    finally:
+        os.umask(umask)
+    assert os.stat(tmp_path / "new").st_mode & 0o777 == 0o666 & ~0o022
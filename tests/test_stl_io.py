@@ -0,0 +1,128 @@
+import gzip
+import zipfile
+import numpy as np
+import pytest
+
+from stl_io import (FACET_DTYPE, read_facets, read_solids, iter_facet_chunks, is_binary_stl,
+                    write_binary_stl, stage_as_stl, flip_facets, geometry_stem)
+
+def make_triangles(count, seed=0):
+    # Float32-exact coordinates, so every format round-trips bit for bit
+    return np.random.default_rng(seed).integers(-50, 50, size=(count, 3, 3)).astype(np.float32) / 4
+
+def ascii_stl(solids):
+    lines = []
+    for name, triangles in solids:
+        lines.append(f"solid {name}")
+        for triangle in triangles:
+            lines += ["  facet normal 0 0 1", "    outer loop"]
+            lines += [f"      vertex {x!r} {y!r} {z!r}" for x, y, z in triangle.tolist()]
+            lines += ["    endloop", "  endfacet"]
+        lines.append(f"endsolid {name}")
+    return ("\n".join(lines) + "\n").encode()
+
+def obj_text(groups):
+    lines, offset = [], 1
+    for name, triangles in groups:
+        lines.append(f"g {name}")
+        for triangle in triangles:
+            lines += [f"v {x!r} {y!r} {z!r}" for x, y, z in triangle.tolist()]
+            lines.append(f"f {offset} {offset + 1} {offset + 2}")
+            offset += 3
+    return ("\n".join(lines) + "\n").encode()
+
+def binary_stl(path, triangles):
+    return write_binary_stl(str(path), triangles)
+
+WING, BODY = make_triangles(5, 1), make_triangles(7, 2)
+BOTH = np.concatenate([WING, BODY])
+
+def test_binary_is_memory_mapped(tmp_path):
+    path = binary_stl(tmp_path / "part.stl", BOTH)
+    facets = read_facets(path)
+    assert isinstance(facets, np.memmap)
+    assert np.array_equal(facets["vertices"], BOTH)
+    assert np.array_equal(read_solids(path)[1], [("part", 0, 12)])
+
+def test_binary_header_starting_with_solid(tmp_path):
+    path = write_binary_stl(str(tmp_path / "part.stl"), BOTH, header=b"solid exported by a CAD tool")
+    assert is_binary_stl(path)
+    assert np.array_equal(read_facets(path)["vertices"], BOTH)
+
+def test_ascii_solids(tmp_path):
+    path = tmp_path / "case.stl"
+    path.write_bytes(ascii_stl([("wing", WING), ("body", BODY)]))
+    assert not is_binary_stl(str(path))
+    facets, solids = read_solids(str(path))
+    assert np.array_equal(facets["vertices"], BOTH)
+    assert solids == [("wing", 0, 5), ("body", 5, 12)]
+
+@pytest.mark.parametrize("chunk_facets", [1, 2, 5, 100])
+def test_chunks_cover_the_file_in_order(tmp_path, chunk_facets):
+    ascii_path = tmp_path / "case.stl"
+    ascii_path.write_bytes(ascii_stl([("wing", WING), ("body", BODY)]))
+    binary_path = binary_stl(tmp_path / "binary.stl", BOTH)
+    for path in (str(ascii_path), binary_path):
+        solids = []
+        chunks = list(iter_facet_chunks(path, chunk_facets, solids))
+        assert all(chunk.dtype == FACET_DTYPE for chunk in chunks)
+        assert np.array_equal(np.concatenate(chunks)["vertices"], BOTH)
+        if path == binary_path:
+            assert all(len(chunk) <= chunk_facets for chunk in chunks)
+
+def test_gzip_streams(tmp_path):
+    ascii_path = tmp_path / "case.stl.gz"
+    ascii_path.write_bytes(gzip.compress(ascii_stl([("wing", WING), ("body", BODY)])))
+    binary_path = tmp_path / "binary.stl.gz"
+    binary_path.write_bytes(gzip.compress(open(binary_stl(tmp_path / "plain.stl", BOTH), "rb").read()))
+
+    facets, solids = read_solids(str(ascii_path))
+    assert np.array_equal(facets["vertices"], BOTH)
+    assert solids == [("wing", 0, 5), ("body", 5, 12)]
+    for chunk_facets in (1, 3, 100):
+        chunks = list(iter_facet_chunks(str(binary_path), chunk_facets))
+        assert max(len(chunk) for chunk in chunks) <= chunk_facets
+        assert np.array_equal(np.concatenate(chunks)["vertices"], BOTH)
+
+def test_obj_groups_and_general_faces(tmp_path):
+    path = tmp_path / "case.obj"
+    path.write_bytes(obj_text([("wing", WING), ("body", BODY)]))
+    facets, solids = read_solids(str(path))
+    assert np.array_equal(facets["vertices"], BOTH)
+    assert solids == [("wing", 0, 5), ("body", 5, 12)]
+
+    # A quad with v/vt/vn tokens and relative indices is fan-split into two triangles
+    path = tmp_path / "quad.obj"
+    path.write_bytes(b"v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nvn 0 0 1\nf -4//1 -3//1 -2//1 -1//1\n")
+    facets = read_facets(str(path))
+    assert facets["vertices"].tolist() == [[[0, 0, 0], [1, 0, 0], [1, 1, 0]], [[0, 0, 0], [1, 1, 0], [0, 1, 0]]]
+    assert np.array_equal(facets["normal"], [[0, 0, 1], [0, 0, 1]])
+
+def test_zip_members_become_solids(tmp_path):
+    path = tmp_path / "parts.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("parts/wing.stl", open(binary_stl(tmp_path / "wing.stl", WING), "rb").read())
+        archive.writestr("parts/body.obj", obj_text([("fuselage", BODY)]))
+        archive.writestr("parts/readme.txt", b"not geometry")
+    facets, solids = read_solids(str(path))
+    assert np.array_equal(facets["vertices"], BOTH)
+    assert solids == [("wing", 0, 5), ("fuselage", 5, 12)]
+
+def test_stage_as_stl(tmp_path):
+    path = tmp_path / "case.obj.gz"
+    path.write_bytes(gzip.compress(obj_text([("wing", WING)])))
+    assert geometry_stem(str(path)) == "case"
+    staged = stage_as_stl(str(path), str(tmp_path))
+    assert staged == str(tmp_path / "case.stl")
+    assert np.array_equal(read_facets(staged)["vertices"], WING)
+    plain = binary_stl(tmp_path / "plain.stl", WING)
+    assert stage_as_stl(plain, str(tmp_path / "elsewhere")) == plain
+
+def test_flip_facets_reverses_winding_and_normal(tmp_path):
+    facets = read_facets(binary_stl(tmp_path / "part.stl", WING))
+    flip = np.zeros(len(facets), dtype=bool)
+    flip[[1, 3]] = True
+    flipped = flip_facets(facets, flip)
+    assert np.array_equal(flipped["vertices"][flip], WING[flip][:, [0, 2, 1]])
+    assert np.array_equal(flipped["normal"][flip], -facets["normal"][flip])
+    assert np.array_equal(flipped[~flip], facets[~flip])
@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+
+from stl_topology import build_topology, summarize_topology, check_topology, analyze_orientation, weld_vertices
+
+# Outward-wound closed fixtures
+TETRA_POINTS = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+TETRA_FACES = [(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)]
+CUBE_POINTS = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=np.float32)
+CUBE_FACES = [(0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+              (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)]
+
+def triangles(points, faces):
+    return points[np.array(faces)]
+
+def tetra():
+    return triangles(TETRA_POINTS, TETRA_FACES)
+
+def cube():
+    return triangles(CUBE_POINTS, CUBE_FACES)
+
+def report(mesh):
+    return check_topology(mesh)
+
+def orientation(mesh):
+    return analyze_orientation(mesh, build_topology(mesh))
+
+# ---------------------------------------------------------------------------
+# Welding and edge classification
+# ---------------------------------------------------------------------------
+def test_weld_merges_repeated_corners_and_signed_zero():
+    mesh = tetra()
+    mesh[0, 0] = [-0.0, 0.0, -0.0]
+    vertex_ids, vertex_count = weld_vertices(mesh)
+    assert vertex_count == 4
+    assert len(set(vertex_ids[:3, 0])) == 1  # The first three facets start at the origin
+
+def test_weld_tolerance_snaps_nearby_corners():
+    mesh = tetra()
+    mesh[1, 0] += 1e-7
+    assert weld_vertices(mesh)[1] == 5
+    assert weld_vertices(mesh, tolerance=1e-5)[1] == 4
+
+@pytest.mark.parametrize("mesh, vertices, edges, shells", [(tetra(), 4, 6, 1), (cube(), 8, 18, 1)])
+def test_closed_shell(mesh, vertices, edges, shells):
+    summary = report(mesh)
+    assert summary == {"Welded Vertices": vertices, "Edges": edges, "Open Edges": 0, "Non-manifold Edges": 0,
+                       "Duplicate Facets": 0, "Degenerate Facets": 0, "Shells": shells, "Watertight": True}
+
+def test_open_mesh():
+    summary = report(cube()[:-2])  # One side of the cube removed
+    assert summary["Open Edges"] == 4
+    assert summary["Non-manifold Edges"] == 0
+    assert not summary["Watertight"]
+
+def test_duplicate_facet():
+    mesh = tetra()
+    # Same three vertices in another order is still a duplicate; it also makes three edges non-manifold
+    mesh = np.concatenate([mesh, mesh[[1]][:, [1, 2, 0]]])
+    summary = report(mesh)
+    assert summary["Duplicate Facets"] == 1
+    assert summary["Non-manifold Edges"] == 3
+
+def test_degenerate_facets():
+    mesh = tetra()
+    collapsed = np.array([[[0, 0, 0], [0, 0, 0], [1, 1, 1]]], dtype=np.float32)
+    sliver = np.array([[[0, 0, 0], [1, 1, 1], [2, 2, 2]]], dtype=np.float32)  # Zero area, three distinct corners
+    mesh = np.concatenate([mesh, collapsed, sliver])
+    topology = build_topology(mesh)
+    assert topology["collapsed"].tolist() == [False] * 4 + [True, False]
+    assert topology["shell_ids"][4] == -1
+    areas = 0.5 * np.linalg.norm(np.cross(mesh[:, 1] - mesh[:, 0], mesh[:, 2] - mesh[:, 0]), axis=1)
+    assert summarize_topology(topology)["Degenerate Facets"] == 1
+    assert summarize_topology(topology, areas)["Degenerate Facets"] == 2
+
+def test_non_manifold_edge():
+    # Three fins hinged on the edge (0, 0, 0)-(0, 0, 1)
+    fins = np.array([[[0, 0, 0], [0, 0, 1], [x, y, 0]] for x, y in ((1, 0), (0, 1), (-1, 0))], dtype=np.float32)
+    summary = report(fins)
+    assert summary["Non-manifold Edges"] == 1
+    assert summary["Open Edges"] == 6
+    assert summary["Shells"] == 1
+
+def test_separate_shells():
+    mesh = np.concatenate([tetra(), cube() + np.float32(5)])
+    topology = build_topology(mesh)
+    assert topology["shell_count"] == 2
+    assert len(set(topology["shell_ids"][:4])) == 1
+    assert set(topology["shell_ids"][4:]) == {1 - topology["shell_ids"][0]}
+
+def test_empty_mesh():
+    mesh = np.zeros((0, 3, 3), dtype=np.float32)
+    summary = report(mesh)
+    assert summary["Edges"] == 0
+    assert summary["Shells"] == 0
+    assert orientation(mesh)[0]["Patches"] == 0
+
+# ---------------------------------------------------------------------------
+# Orientation: BFS winding parity and inside/outside decision
+# ---------------------------------------------------------------------------
+def test_consistent_outward_shell_needs_no_flip():
+    summary, flip = orientation(cube())
+    assert summary["Consistent"]
+    assert summary["Closed Patches"] == 1
+    assert summary["Inverted Closed Patches"] == 0
+    assert not flip.any()
+
+def test_inverted_shell_is_flipped_entirely():
+    mesh = cube()[:, [0, 2, 1]]
+    summary, flip = orientation(mesh)
+    assert summary["Consistent"]
+    assert summary["Inverted Closed Patches"] == 1
+    assert flip.all()
+
+@pytest.mark.parametrize("flipped", [[3], [0, 5, 9], [1, 2, 3, 4, 6, 7, 8, 10, 11]])
+def test_bfs_parity_finds_the_odd_facets(flipped):
+    mesh = cube()
+    mesh[flipped] = mesh[flipped][:, [0, 2, 1]]
+    summary, flip = orientation(mesh)
+    assert not summary["Consistent"]
+    assert summary["Unresolvable Edges"] == 0
+    assert np.flatnonzero(flip).tolist() == sorted(flipped)
+
+def test_each_shell_is_oriented_on_its_own():
+    mesh = np.concatenate([tetra()[:, [0, 2, 1]], cube() + np.float32(5)])
+    summary, flip = orientation(mesh)
+    assert summary["Patches"] == 2
+    assert summary["Inverted Closed Patches"] == 1
+    assert flip.tolist() == [True] * 4 + [False] * 12
+
+def test_open_patch_keeps_the_majority_winding():
+    mesh = cube()[:-2]
+    mesh[[0]] = mesh[[0]][:, [0, 2, 1]]
+    summary, flip = orientation(mesh)
+    assert summary["Closed Patches"] == 0
+    assert np.flatnonzero(flip).tolist() == [0]
+
+def test_moebius_strip_is_unresolvable():
+    # A strip of quads whose last one joins the first with a half twist
+    count = 6
+    angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    def point(index, side):
+        angle = angles[index % count]
+        # The half twist swaps the two sides after a full turn
+        side = side if index < count else 1 - side
+        width = (side - 0.5) * 0.4
+        twist = angle / 2
+        return [(1 + width * np.cos(twist)) * np.cos(angle), (1 + width * np.cos(twist)) * np.sin(angle), width * np.sin(twist)]
+    facets = []
+    for index in range(count):
+        a, b, c, d = point(index, 0), point(index, 1), point(index + 1, 0), point(index + 1, 1)
+        facets += [[a, c, b], [b, c, d]]
+    mesh = np.array(facets, dtype=np.float32)
+    # Index count wraps onto index 0 with the sides swapped: weld the same coordinates bit for bit
+    mesh = np.round(mesh, 5)
+    summary, flip = orientation(mesh)
+    assert summary["Unresolvable Edges"] > 0
+    assert summary["Closed Patches"] == 0
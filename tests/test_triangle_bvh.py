@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from TriangleBVH import TriangleBVH, closest_points_on_triangles, ray_triangle_hits
+
+def sphere(subdivisions=3):
+    # Outward-wound icosphere
+    t = (1 + 5 ** 0.5) / 2
+    points = [[-1, t, 0], [1, t, 0], [-1, -t, 0], [1, -t, 0], [0, -1, t], [0, 1, t],
+              [0, -1, -t], [0, 1, -t], [t, 0, -1], [t, 0, 1], [-t, 0, -1], [-t, 0, 1]]
+    points = np.array(points, dtype=np.float64)
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11), (1, 5, 9), (5, 11, 4), (11, 10, 2),
+             (10, 7, 6), (7, 1, 8), (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9), (4, 9, 5),
+             (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    triangles = points[np.array(faces)]
+    for _ in range(subdivisions):
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+        ab, bc, ca = (a + b) / 2, (b + c) / 2, (c + a) / 2
+        triangles = np.concatenate([np.stack(corners, axis=1) for corners in
+                                    ((a, ab, ca), (ab, b, bc), (ca, bc, c), (ab, bc, ca))])
+    return triangles / np.linalg.norm(triangles, axis=2, keepdims=True)
+
+def brute_nearest(triangles, points):
+    # Every (point, triangle) pair: squared distance matrix, then the row minimum
+    count = len(triangles)
+    repeated = np.repeat(points, count, axis=0)
+    tiled = np.tile(triangles, (len(points), 1, 1))
+    closest = closest_points_on_triangles(repeated, tiled[:, 0], tiled[:, 1], tiled[:, 2])
+    squared = np.sum((closest - repeated) ** 2, axis=1).reshape(len(points), count)
+    return np.sqrt(squared.min(axis=1)), squared
+
+@pytest.fixture(scope="module")
+def surfaces():
+    generator = np.random.default_rng(7)
+    ball = sphere()
+    # A tilted plate and a loose triangle soup exercise the oriented boxes and the Morton seed
+    plate = np.array([[[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[1, 0, 0], [1, 1, 0], [0, 1, 0]]], dtype=np.float64)
+    grid = np.concatenate([plate + [i, j, 0] for i in range(8) for j in range(8)]) / 8
+    rotation = np.linalg.qr(generator.normal(size=(3, 3)))[0]
+    soup = generator.normal(size=(300, 1, 3)) * 2 + generator.normal(size=(300, 3, 3)) * 0.1
+    return {"sphere": ball, "tilted plate": grid @ rotation.T, "soup": soup}
+
+@pytest.mark.parametrize("name", ["sphere", "tilted plate", "soup"])
+@pytest.mark.parametrize("leaf_size", [1, 8])
+def test_nearest_matches_brute_force(surfaces, name, leaf_size):
+    triangles = surfaces[name]
+    generator = np.random.default_rng(11)
+    # Points on, near, inside and far away from the surface
+    points = np.concatenate([triangles[generator.integers(len(triangles), size=40)].mean(axis=1),
+                             generator.normal(size=(80, 3)) * 0.3,
+                             generator.normal(size=(80, 3)) * 1.5,
+                             generator.normal(size=(20, 3)) * 50])
+    bvh = TriangleBVH(triangles, leaf_size=leaf_size)
+    distances, triangle_ids, closest = bvh.nearest(points)
+    expected, squared = brute_nearest(triangles, points)
+    np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-12)
+    # Ties aside, the reported triangle and point must realize that distance
+    np.testing.assert_allclose(squared[np.arange(len(points)), triangle_ids], expected ** 2, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(np.linalg.norm(closest - points, axis=1), expected, rtol=1e-9, atol=1e-12)
+
+def test_nearest_across_query_batches(surfaces, monkeypatch):
+    import TriangleBVH as bvh_module
+    monkeypatch.setattr(bvh_module, "QUERY_BATCH", 7)
+    triangles = surfaces["sphere"]
+    points = np.random.default_rng(3).normal(size=(50, 3))
+    np.testing.assert_allclose(TriangleBVH(triangles).distance(points), brute_nearest(triangles, points)[0], rtol=1e-9)
+
+def test_ray_cast_matches_brute_force(surfaces):
+    triangles = surfaces["soup"]
+    generator = np.random.default_rng(5)
+    origins = generator.normal(size=(100, 3)) * 3
+    # Half the rays aim at a triangle (and may hit others first), half go anywhere
+    targets = triangles[generator.integers(len(triangles), size=50)].mean(axis=1)
+    directions = np.concatenate([targets - origins[:50], generator.normal(size=(50, 3))])
+    hit_t, hit_ids = TriangleBVH(triangles).ray_cast(origins, directions)
+
+    count = len(triangles)
+    t = ray_triangle_hits(np.repeat(origins, count, axis=0), np.repeat(directions, count, axis=0),
+                          *np.tile(triangles, (len(origins), 1, 1)).transpose(1, 0, 2)).reshape(len(origins), count)
+    expected = t.min(axis=1)
+    np.testing.assert_allclose(hit_t, expected)
+    hit = np.isfinite(expected)
+    assert hit.any() and not hit.all()
+    assert np.array_equal(hit_ids[~hit], np.full(np.count_nonzero(~hit), -1))
+    np.testing.assert_allclose(t[np.flatnonzero(hit), hit_ids[hit]], expected[hit])
+
+def test_contains_matches_the_sphere(surfaces):
+    points = np.random.default_rng(9).uniform(-1.5, 1.5, size=(400, 3))
+    radii = np.linalg.norm(points, axis=1)
+    # The faceted sphere lies between its inscribed radius and 1; skip points in that shell
+    clear = (radii < 0.97) | (radii > 1.0)
+    inside = TriangleBVH(surfaces["sphere"]).contains(points)
+    assert np.array_equal(inside[clear], radii[clear] < 0.97)
+
+def test_empty_surface_is_rejected():
+    with pytest.raises(ValueError):
+        TriangleBVH(np.zeros((0, 3, 3)))